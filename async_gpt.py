@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from optimized_gpt import OptimizedGPT_API, without_proxy_env
+
+# ---------------------------------------------------------------------------
+# Async OpenAI client path with bounded concurrency
+# ---------------------------------------------------------------------------
+# AsyncOptimizedGPT_API runs an AsyncOpenAI client (one shared connection
+# pool) on a private event loop thread. Every completion is limited by a
+# semaphore and a per-call deadline. The inherited sync methods keep working
+# unchanged: _create_completion submits the request to the loop and waits,
+# so completions from different worker threads overlap instead of queueing
+# behind one blocking HTTP call.
+# ---------------------------------------------------------------------------
+
+
+class AsyncOptimizedGPT_API(OptimizedGPT_API):
+    """OptimizedGPT_API backed by AsyncOpenAI with concurrent request support."""
+
+    def __init__(self, api_key: str, model: str = "gpt-4.1-mini",
+                 max_concurrency: int = 8, deadline: float = 20.0, **kwargs):
+        super().__init__(api_key, model, **kwargs)
+
+        self.max_concurrency = max_concurrency
+        self.deadline = deadline
+        self._stats_lock = threading.Lock()
+        self._async_stats = {"in_flight": 0, "max_in_flight": 0, "completed": 0, "errors": 0, "timeouts": 0}
+
+        self.async_client = without_proxy_env(lambda: AsyncOpenAI(
+            api_key=api_key,
+            timeout=deadline,
+            max_retries=0,  # Tier fallback retries, within the chain's deadline
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+            )
+        ))
+
+        # Private event loop that owns the async client and the semaphore
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name="gpt-async-loop", daemon=True)
+        self._loop_thread.start()
+        self._semaphore = asyncio.run_coroutine_threadsafe(self._make_semaphore(), self._loop).result()
+
+    async def _make_semaphore(self) -> asyncio.Semaphore:
+        return asyncio.Semaphore(self.max_concurrency)
+
+    # ------------------------------------------------------------------
+    # 1) Async API
+    # ------------------------------------------------------------------
+
+    async def acall_chat(self, messages: List[Dict[str, str]], temp: float = 0.0, max_t: int = 512,
+                         deadline: Optional[float] = None, response_format: Optional[Dict] = None,
+                         model: Optional[str] = None) -> str:
+        """Async chat completion, bounded by the shared semaphore and a deadline (no caching)."""
+        deadline = deadline or self.deadline
+        model = model or self.model
+        extra = {"response_format": response_format} if response_format else {}
+        started = time.monotonic()
+
+        async with self._semaphore:
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                self._count("timeouts")
+                raise TimeoutError(f"GPT call waited {deadline:g}s for a free slot")
+
+            self._track_in_flight(1)
+            try:
+                response = await asyncio.wait_for(
+                    self.async_client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": m["role"], "content": m["content"]} for m in messages],
+                        temperature=temp,
+                        max_tokens=max_t,
+                        **extra
+                    ),
+                    timeout=remaining
+                )
+            except asyncio.TimeoutError:
+                self._count("timeouts")
+                raise TimeoutError(f"GPT call exceeded its {deadline:g}s deadline")
+            except Exception:
+                self._count("errors")
+                raise
+            finally:
+                self._track_in_flight(-1)
+
+        self._count("completed")
+        self._record_usage(model, response.usage)
+        content = response.choices[0].message.content
+        return content.strip() if content else ""
+
+    async def acall_many(self, requests: List[List[Dict[str, str]]], temp: float = 0.0,
+                         max_t: int = 512) -> List[str]:
+        """Run several completions concurrently; failed calls yield ""."""
+        results = await asyncio.gather(
+            *(self.acall_chat(messages, temp, max_t) for messages in requests),
+            return_exceptions=True
+        )
+        return [r if isinstance(r, str) else "" for r in results]
+
+    # ------------------------------------------------------------------
+    # 2) Sync wrappers for existing callers
+    # ------------------------------------------------------------------
+
+    def _create_completion(self, formatted_messages: List[Dict[str, str]], temp: float, max_t: int,
+                           response_format: Optional[Dict] = None, model: Optional[str] = None,
+                           timeout: Optional[float] = None) -> str:
+        """Blocking completion for the inherited sync methods, run on the async loop."""
+        # A tier timeout can only shorten the client's own deadline
+        deadline = min(timeout, self.deadline) if timeout else self.deadline
+        return self._run(self.acall_chat(formatted_messages, temp, max_t, deadline=deadline,
+                                         response_format=response_format, model=model), timeout=deadline)
+
+    def call_many(self, requests: List[List[Dict[str, str]]], temp: float = 0.0, max_t: int = 512) -> List[str]:
+        """Sync wrapper around acall_many for callers outside the event loop."""
+        return self._run(self.acall_many(requests, temp, max_t), timeout=self.deadline * 2)
+
+    def _run(self, coro, timeout: Optional[float] = None):
+        if threading.current_thread() is self._loop_thread:
+            coro.close()
+            raise RuntimeError("Sync GPT wrappers cannot be called from the async loop; await acall_chat instead")
+
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            # The coroutine enforces the deadline; the extra second covers scheduling
+            return future.result(timeout=(timeout or self.deadline) + 1)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    # ------------------------------------------------------------------
+    # 3) Stats and shutdown
+    # ------------------------------------------------------------------
+
+    def get_concurrency_stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return {**self._async_stats, "max_concurrency": self.max_concurrency}
+
+    def close(self) -> None:
+        """Close the connection pool and stop the event loop."""
+        try:
+            asyncio.run_coroutine_threadsafe(self.async_client.close(), self._loop).result(timeout=5)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _track_in_flight(self, delta: int) -> None:
+        with self._stats_lock:
+            self._async_stats["in_flight"] += delta
+            self._async_stats["max_in_flight"] = max(self._async_stats["max_in_flight"], self._async_stats["in_flight"])
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self._async_stats[key] += 1
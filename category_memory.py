@@ -0,0 +1,209 @@
+import os
+import json
+import difflib
+import tempfile
+import threading
+from typing import Dict, List, Optional, Union
+
+from hebrew_text import description_tokens, strip_prefix
+
+# ---------------------------------------------------------------------------
+# Learned description → category memory
+# ---------------------------------------------------------------------------
+# Built from the tracker's (פירוט, קטגוריה) history and updated on every new
+# expense, so repeat merchants ("נטפליקס" → בידור) are categorized locally
+# without a model call. New expenses only mark the index dirty; a background
+# thread writes it every `flush_seconds` or after `flush_every` learns, and
+# close() writes any rest at exit, so the request path never touches disk.
+# ---------------------------------------------------------------------------
+
+DEFAULT_MEMORY_PATH = os.path.join(tempfile.gettempdir(), "budgetbot_category_memory.json")
+
+
+class CategoryMemory:
+    """Token and phrase index of past expense categories with fuzzy lookup."""
+
+    def __init__(self, path: Optional[str] = DEFAULT_MEMORY_PATH, fuzzy_cutoff: float = 0.85,
+                 flush_seconds: float = 30.0, flush_every: int = 50):
+        self.path = path
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.flush_seconds = flush_seconds
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # One writer at a time
+
+        # Learns not yet on disk, and the background writer that flushes them
+        self._pending = 0
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+        # {normalized description: {category: count}}
+        self._phrases: Dict[str, Dict[str, int]] = {}
+        # {token: {category: count}}
+        self._tokens: Dict[str, Dict[str, int]] = {}
+
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._phrases)
+
+    # ------------------------------------------------------------------
+    # 1) Learning
+    # ------------------------------------------------------------------
+
+    def learn(self, description: str, category: str) -> None:
+        """Record one (פירוט, קטגוריה) observation; written to disk in the background."""
+        tokens = description_tokens(description)
+        if not tokens or not category:
+            return
+
+        with self._lock:
+            self._add(tokens, category)
+            self._pending += 1
+            pending = self._pending
+            start_flusher = self.path is not None and self._flusher is None and not self._stopped.is_set()
+            if start_flusher:
+                self._flusher = threading.Thread(target=self._flush_loop, name="category-memory-flush", daemon=True)
+        if start_flusher:
+            self._flusher.start()
+        if pending >= self.flush_every:
+            self._wake.set()
+
+    def build_from_rows(self, rows: List[Dict]) -> int:
+        """Rebuild the index from tracker rows. Returns number of rows learned."""
+        learned = 0
+        with self._lock:
+            self._phrases = {}
+            self._tokens = {}
+            for row in rows:
+                tokens = description_tokens(str(row.get("פירוט", "")))
+                category = str(row.get("קטגוריה", "")).strip()
+                if tokens and category:
+                    self._add(tokens, category)
+                    learned += 1
+        self.save()
+        return learned
+
+    def _add(self, tokens: List[str], category: str) -> None:
+        phrase = " ".join(tokens)
+        counts = self._phrases.setdefault(phrase, {})
+        counts[category] = counts.get(category, 0) + 1
+
+        for token in set(tokens):
+            counts = self._tokens.setdefault(token, {})
+            counts[category] = counts.get(category, 0) + 1
+
+    # ------------------------------------------------------------------
+    # 2) Lookup
+    # ------------------------------------------------------------------
+
+    def lookup(self, text: str, categories: Optional[List[str]] = None) -> Optional[Dict[str, Union[str, float, int]]]:
+        """
+        Find the most likely category for a description or free-text message.
+        Returns {"category", "confidence", "count", "match"} or None.
+        """
+        tokens = description_tokens(text)
+        if not tokens:
+            return None
+
+        allowed = set(categories) if categories else None
+
+        with self._lock:
+            # Exact phrase match - strongest signal
+            phrase_counts = self._phrases.get(" ".join(tokens))
+            if phrase_counts:
+                result = self._best(phrase_counts, allowed)
+                if result:
+                    result["match"] = "phrase"
+                    return result
+
+            # Token vote with prefix-stripped and fuzzy fallbacks per token
+            votes: Dict[str, int] = {}
+            match = "token"
+            for token in tokens:
+                counts = self._tokens.get(strip_prefix(token, self._tokens))
+                if counts is None:
+                    close = difflib.get_close_matches(token, self._tokens.keys(), n=1, cutoff=self.fuzzy_cutoff)
+                    if not close:
+                        continue
+                    counts = self._tokens[close[0]]
+                    match = "fuzzy"
+                for category, count in counts.items():
+                    votes[category] = votes.get(category, 0) + count
+
+        result = self._best(votes, allowed)
+        if result:
+            result["match"] = match
+        return result
+
+    @staticmethod
+    def _best(counts: Dict[str, int], allowed: Optional[set]) -> Optional[Dict[str, Union[str, float, int]]]:
+        if allowed is not None:
+            counts = {c: n for c, n in counts.items() if c in allowed}
+        total = sum(counts.values())
+        if not total:
+            return None
+        category = max(counts, key=lambda c: counts[c])
+        return {
+            "category": category,
+            "confidence": counts[category] / total,
+            "count": counts[category]
+        }
+
+    # ------------------------------------------------------------------
+    # 3) Persistence
+    # ------------------------------------------------------------------
+
+    def save(self) -> None:
+        """Write the index to disk atomically."""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                data = json.dumps({"phrases": self._phrases, "tokens": self._tokens}, ensure_ascii=False)
+                pending, self._pending = self._pending, 0
+            try:
+                tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Error saving category memory: {e}")
+                with self._lock:
+                    self._pending += pending  # Retried on the next flush
+
+    def flush(self) -> None:
+        """Save if anything was learned since the last save."""
+        with self._lock:
+            dirty = self._pending > 0
+        if dirty:
+            self.save()
+
+    def close(self) -> None:
+        """Stop the background writer and save what is left (registered with atexit)."""
+        self._stopped.set()
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5.0)
+        self.flush()
+
+    def load(self) -> None:
+        """Load a previously saved index, if any."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            with self._lock:
+                self._phrases = data.get("phrases", {})
+                self._tokens = data.get("tokens", {})
+            print(f"Loaded category memory with {len(self._phrases)} descriptions")
+        except (OSError, ValueError) as e:
+            print(f"Error loading category memory: {e}")
+
+    def _flush_loop(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(timeout=self.flush_seconds)
+            self._wake.clear()
+            self.flush()
@@ -0,0 +1,167 @@
+import time
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional, Union
+
+# ---------------------------------------------------------------------------
+# Circuit breaker for the GPT provider
+# ---------------------------------------------------------------------------
+# closed    → calls go through; outcomes are tracked in a rolling time window.
+#             The circuit opens after `consecutive_failures` failures in a
+#             row, or when failures/slow calls reach `failure_rate` of the
+#             window. Callers report only provider failures (timeouts,
+#             connection errors, 429, 5xx); "slow" can be set per call.
+# open      → calls fail immediately with CircuitOpenError, so the bot can
+#             answer in its limited local mode instead of waiting on timeouts.
+# half_open → after `open_seconds` one background probe runs; success closes
+#             the circuit, failure re-opens it. User requests never probe.
+# ---------------------------------------------------------------------------
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the provider while the circuit is open."""
+
+
+class ProviderUnavailableError(CircuitOpenError):
+    """
+    The provider failed every attempt of one call (all fallbacks or the time
+    budget used up). Callers handle it like an open circuit.
+    """
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker with a background half-open probe."""
+
+    def __init__(self, probe: Optional[Callable[[], object]] = None, window_seconds: float = 60.0,
+                 min_calls: int = 4, failure_rate: float = 0.5, consecutive_failures: int = 3,
+                 slow_call_seconds: float = 8.0, open_seconds: float = 30.0, name: str = "gpt"):
+        self.probe = probe
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.consecutive_failures = consecutive_failures
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._failures_in_row = 0
+        self._calls: "deque[tuple]" = deque()  # (timestamp, failed_or_slow, latency)
+        self._bad_calls = 0  # Failed or slow calls currently in the window
+        self._stats = {"opened": 0, "rejected": 0, "probes": 0, "probe_failures": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being rejected (open or waiting on a probe)."""
+        return self.state != CLOSED
+
+    # ------------------------------------------------------------------
+    # 1) Call hooks
+    # ------------------------------------------------------------------
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError if the call must not reach the provider."""
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            self._stats["rejected"] += 1
+            start_probe = self._state == OPEN and time.time() - self._opened_at >= self.open_seconds
+            if start_probe:
+                self._state = HALF_OPEN
+            retry_in = max(0.0, self.open_seconds - (time.time() - self._opened_at))
+
+        if start_probe:
+            threading.Thread(target=self._run_probe, name=f"{self.name}-breaker-probe", daemon=True).start()
+        raise CircuitOpenError(f"{self.name} circuit is open (retry in {retry_in:.0f}s)")
+
+    def record_success(self, latency: float, slow_after: Optional[float] = None) -> None:
+        """A call the provider answered; `slow_after` overrides slow_call_seconds (e.g. per model tier)."""
+        slow = latency >= (slow_after if slow_after is not None else self.slow_call_seconds)
+        with self._lock:
+            self._failures_in_row = 0
+            self._add(slow, latency)
+
+    def record_failure(self, latency: float = 0.0) -> None:
+        """A provider failure (timeout, connection error, 429, 5xx)."""
+        with self._lock:
+            self._failures_in_row += 1
+            self._add(True, latency)
+            if self._failures_in_row >= self.consecutive_failures:
+                self._open()
+
+    # ------------------------------------------------------------------
+    # 2) Statistics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Union[str, int, float, None]]:
+        with self._lock:
+            self._trim(time.time())
+            calls = len(self._calls)
+            bad = self._bad_calls
+            latencies = sorted(latency for _, _, latency in self._calls)
+            return {
+                "state": self._state,
+                **self._stats,
+                "window_calls": calls,
+                "window_failure_rate": bad / calls if calls else 0.0,
+                "window_p95_ms": round(latencies[int(calls * 0.95)] * 1000) if calls else None,
+                "open_for_seconds": round(time.time() - self._opened_at) if self._state != CLOSED else None
+            }
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    def _run_probe(self) -> None:
+        with self._lock:
+            self._stats["probes"] += 1
+        try:
+            if self.probe is not None:
+                self.probe()
+        except Exception as e:
+            print(f"Circuit '{self.name}' probe failed, staying open: {e}")
+            with self._lock:
+                self._stats["probe_failures"] += 1
+                self._open()
+            return
+
+        print(f"Circuit '{self.name}' probe succeeded, closing")
+        with self._lock:
+            self._state = CLOSED
+            self._failures_in_row = 0
+            self._calls.clear()
+            self._bad_calls = 0
+
+    # Caller holds the lock for the methods below
+
+    def _add(self, failed: bool, latency: float) -> None:
+        now = time.time()
+        self._calls.append((now, failed, latency))
+        self._bad_calls += failed
+        self._trim(now)
+        if self._state == CLOSED and len(self._calls) >= self.min_calls:
+            if self._bad_calls / len(self._calls) >= self.failure_rate:
+                self._open()
+
+    def _trim(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            _, failed, _ = self._calls.popleft()
+            self._bad_calls -= failed
+
+    def _open(self) -> None:
+        if self._state != OPEN:
+            print(f"Circuit '{self.name}' opened")
+            self._stats["opened"] += 1
+        self._state = OPEN
+        self._opened_at = time.time()
@@ -0,0 +1,87 @@
+from typing import Dict, List, Literal, Tuple
+
+from hebrew_text import tokenize
+
+# ---------------------------------------------------------------------------
+# Local yes/no classifier for confirmations in the budget setup flow
+# ---------------------------------------------------------------------------
+# Built from the examples in OptimizedGPT_API.parse_confirmation. Returns
+# "unsure" whenever the lexicon does not settle the answer, so GPT is only
+# needed for the genuinely ambiguous replies.
+# ---------------------------------------------------------------------------
+
+ConfirmationResult = Literal["yes", "no", "unsure"]
+
+AFFIRMATIVE_PHRASES = [
+    "כן", "כן בטח", "כן כן", "בטח", "אישור", "מאשר", "מאשרת", "מאושר", "אשר", "תאשר",
+    "בואו נעשה את זה", "בוא נעשה את זה", "יאללה", "קדימה", "אני מסכים", "אני מסכימה",
+    "מסכים", "מסכימה", "נשמע טוב", "נשמע מצוין", "אוקיי", "אוקי", "אוקיי אוקיי",
+    "מעולה", "מצוין", "אחלה", "סבבה", "בהחלט", "למה לא", "אני רוצה", "רוצה",
+    "בואו נתקדם", "בוא נתקדם", "נתקדם", "תמשיך", "המשך", "בסדר", "בסדר גמור",
+    "עובד עליי", "עובד לי", "נכון", "פיקס", "יופי", "ok", "okay", "yes", "yep", "sure",
+]
+
+NEGATIVE_PHRASES = [
+    "לא", "לא לא", "ביטול", "בטל", "תבטל", "לא תודה", "אני לא רוצה", "לא רוצה",
+    "זה לא מתאים", "לא מתאים", "בואו נדחה", "בוא נדחה", "נדחה", "אולי אחר כך",
+    "אחר כך", "לא עכשיו", "לא זמן מתאים", "אני מתחרט", "אני מתחרטת", "מתחרט",
+    "מתחרטת", "לא נעשה", "תירגע", "עצור", "עצרי", "לא צריך", "לא מסכים",
+    "לא מסכימה", "לא מאשר", "לא מאשרת", "עזוב", "עזבי", "שכח מזה", "no", "nope",
+    "cancel", "stop",
+]
+
+# Politeness that does not change the intent ("כן תודה", "אישור בבקשה")
+IGNORED_WORDS = {"תודה", "רבה", "בבקשה", "אז", "טוב", "נו", "אה", "אממ"}
+
+YES_EMOJI = ("👍", "✅", "👌")
+NO_EMOJI = ("👎", "❌", "🚫")
+
+# Replies with more unrecognized words than this are left to GPT
+MAX_UNKNOWN_WORDS = 2
+
+
+def _build_lexicon() -> Dict[Tuple[str, ...], str]:
+    lexicon = {}
+    for phrase in AFFIRMATIVE_PHRASES:
+        lexicon[tuple(tokenize(phrase))] = "yes"
+    for phrase in NEGATIVE_PHRASES:
+        lexicon[tuple(tokenize(phrase))] = "no"
+    return lexicon
+
+
+_LEXICON = _build_lexicon()
+_MAX_PHRASE_LEN = max(len(phrase) for phrase in _LEXICON)
+
+
+def classify_confirmation(text: str) -> ConfirmationResult:
+    """Classify a reply as "yes", "no" or "unsure" without calling GPT."""
+    has_yes_emoji = any(e in text for e in YES_EMOJI)
+    has_no_emoji = any(e in text for e in NO_EMOJI)
+
+    tokens = tokenize(text, drop_numbers=False)
+    found: List[str] = []
+    unknown = 0
+
+    # Greedy longest match, so "למה לא" is yes and "לא תודה" is no
+    i = 0
+    while i < len(tokens):
+        for length in range(min(_MAX_PHRASE_LEN, len(tokens) - i), 0, -1):
+            label = _LEXICON.get(tuple(tokens[i:i + length]))
+            if label:
+                found.append(label)
+                i += length
+                break
+        else:
+            if tokens[i] not in IGNORED_WORDS:
+                unknown += 1
+            i += 1
+
+    if has_yes_emoji:
+        found.append("yes")
+    if has_no_emoji:
+        found.append("no")
+
+    labels = set(found)
+    if len(labels) != 1 or unknown > MAX_UNKNOWN_WORDS:
+        return "unsure"
+    return "yes" if "yes" in labels else "no"
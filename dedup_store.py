@@ -0,0 +1,134 @@
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Union
+
+from state_store import StateStore
+
+# ---------------------------------------------------------------------------
+# Idempotency store for incoming WhatsApp message IDs
+# ---------------------------------------------------------------------------
+# Entries are kept in arrival order, so expired IDs are always at the front
+# and expiry costs O(1) amortized per message (no full scans). An optional
+# SQLite file lets every worker process on the host share one view: the
+# INSERT OR IGNORE decides atomically which process handles a message. A
+# shared StateStore (e.g. Redis) does the same across instances via add().
+# ---------------------------------------------------------------------------
+
+
+class DedupStore:
+    """Remembers message IDs for `ttl` seconds; check-and-mark is atomic."""
+
+    def __init__(self, ttl: float = 24 * 3600, max_entries: int = 50000, path: Optional[str] = None,
+                 purge_every: int = 200, store: Optional[StateStore] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.purge_every = purge_every
+        self.store = store
+
+        self._seen: "OrderedDict[str, float]" = OrderedDict()  # message_id -> seen_at, oldest first
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self._stats = {"checked": 0, "duplicates": 0, "expired": 0, "errors": 0}
+
+        self._conn = None
+        if path:
+            try:
+                self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS seen_messages (message_id TEXT PRIMARY KEY, seen_at REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS seen_messages_seen_at ON seen_messages (seen_at)")
+            except sqlite3.Error as e:
+                print(f"Shared dedup store disabled ({path}): {e}")
+                self._conn = None
+
+    def seen_before(self, message_id: str) -> bool:
+        """Return True if the ID was already seen; otherwise record it and return False."""
+        now = time.time()
+        with self._lock:
+            self._stats["checked"] += 1
+            self._expire(now)
+
+            if message_id in self._seen:
+                self._stats["duplicates"] += 1
+                return True
+
+            # Not cached locally: the claiming worker may still forget() the ID
+            if (self._conn is not None or self.store is not None) and not self._claim_shared(message_id, now):
+                self._stats["duplicates"] += 1
+                return True
+
+            self._seen[message_id] = now
+            return False
+
+    def forget(self, message_id: str) -> None:
+        """Drop an ID so a redelivery is processed (e.g. the job could not be queued)."""
+        with self._lock:
+            self._seen.pop(message_id, None)
+            if self._conn is not None:
+                try:
+                    self._conn.execute("DELETE FROM seen_messages WHERE message_id = ?", (message_id,))
+                except sqlite3.Error as e:
+                    self._stats["errors"] += 1
+                    print(f"Dedup store delete failed: {e}")
+            if self.store is not None:
+                try:
+                    self.store.delete(f"msg:{message_id}")
+                except Exception as e:
+                    self._stats["errors"] += 1
+                    print(f"Dedup store delete failed: {e}")
+
+    def stats(self) -> Dict[str, Union[int, str, None]]:
+        with self._lock:
+            return {**self._stats, "size": len(self._seen), "shared_path": self.path if self._conn else None,
+                    "shared_store": self.store.backend if self.store is not None else None}
+
+    # ------------------------------------------------------------------
+    # Internal helpers (caller holds the lock)
+    # ------------------------------------------------------------------
+
+    def _expire(self, now: float) -> None:
+        while self._seen:
+            message_id, seen_at = next(iter(self._seen.items()))
+            if now - seen_at < self.ttl and len(self._seen) < self.max_entries:
+                break
+            self._seen.popitem(last=False)
+            self._stats["expired"] += 1
+
+    def _claim_shared(self, message_id: str, now: float) -> bool:
+        """True if this process is the first to record the ID in the shared file or store."""
+        if self.store is not None:
+            try:
+                return self.store.add(f"msg:{message_id}", now, ttl=self.ttl)
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"Dedup store write failed: {e}")
+                return True
+        try:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO seen_messages (message_id, seen_at) VALUES (?, ?)", (message_id, now)
+            )
+            if cursor.rowcount == 0:
+                # Already there: a duplicate unless the old row has expired. The conditional
+                # UPDATE is the claim, so of two workers reclaiming one expired row only one wins.
+                cursor = self._conn.execute(
+                    "UPDATE seen_messages SET seen_at = ? WHERE message_id = ? AND seen_at <= ?",
+                    (now, message_id, now - self.ttl)
+                )
+                if cursor.rowcount != 1:
+                    return False
+
+            self._inserts += 1
+            if self._inserts % self.purge_every == 0:
+                self._conn.execute("DELETE FROM seen_messages WHERE seen_at < ?", (now - self.ttl,))
+            return True
+        except sqlite3.Error as e:
+            # Fail open: processing a rare duplicate beats dropping a message
+            self._stats["errors"] += 1
+            print(f"Dedup store write failed: {e}")
+            return True
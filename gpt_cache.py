@@ -0,0 +1,342 @@
+import sys
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# ---------------------------------------------------------------------------
+# Bounded LRU cache with TTL for GPT responses
+# ---------------------------------------------------------------------------
+# get/put are O(1): entries live in an OrderedDict kept in recency order, so
+# eviction always pops from the front. Expired entries are dropped when they
+# are read or when they reach the front, never by scanning the whole cache.
+#
+# An optional SQLite L2 tier (SQLiteCache + TieredCache) keeps warm entries
+# across worker recycles and shares them between workers on the same host.
+# ---------------------------------------------------------------------------
+
+
+def _default_sizeof(key: Hashable, value: Any) -> int:
+    return sys.getsizeof(key) + sys.getsizeof(value)
+
+
+class LRUCache:
+    """Thread-safe LRU cache with TTL, entry cap and optional memory budget."""
+
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = 300,
+                 max_bytes: Optional[int] = None,
+                 sizeof: Callable[[Hashable, Any], int] = _default_sizeof):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()  # key -> (value, stored_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "oversized": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get_entry(key, record=False) is not None
+
+    # ------------------------------------------------------------------
+    # 1) Core operations
+    # ------------------------------------------------------------------
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value or `default`."""
+        entry = self.get_entry(key)
+        return entry[0] if entry else default
+
+    def get_entry(self, key: Hashable, record: bool = True) -> Optional[Tuple[Any, float]]:
+        """Return (value, age_seconds) for a fresh entry, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                self._remove(key)
+                self._stats["expirations"] += 1
+                entry = None
+
+            if entry is None:
+                if record:
+                    self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            if record:
+                self._stats["hits"] += 1
+            return entry[0], now - entry[1]
+
+    def put(self, key: Hashable, value: Any, stored_at: Optional[float] = None) -> None:
+        """Insert or replace a value, evicting least recently used entries as needed."""
+        size = self._sizeof(key, value)
+        now = time.time()
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Would not fit even in an empty cache: skip it rather than flush everything else
+                self._stats["oversized"] += 1
+                return
+            self._entries[key] = (value, stored_at if stored_at is not None else now, size)
+            self._bytes += size
+            self._evict(now)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value, computing and storing it on a miss."""
+        entry = self.get_entry(key)
+        if entry is not None:
+            return entry[0]
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Drop all entries and reset statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "oversized": 0}
+
+    # ------------------------------------------------------------------
+    # 2) Statistics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / total if total > 0 else 0.0,
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes
+            }
+
+    # ------------------------------------------------------------------
+    # Internal helpers (caller holds the lock)
+    # ------------------------------------------------------------------
+
+    def _expired(self, entry: Tuple[Any, float, int], now: float) -> bool:
+        return self.ttl is not None and now - entry[1] >= self.ttl
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _evict(self, now: float) -> None:
+        # Expired entries that reached the front go first
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if not self._expired(entry, now):
+                break
+            self._remove(key)
+            self._stats["expirations"] += 1
+
+        # Then enforce the entry cap and memory budget, least recently used first
+        while self._entries and (
+            len(self._entries) > self.max_entries or
+            (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self._stats["evictions"] += 1
+
+
+class SQLiteCache:
+    """
+    Disk-backed cache shared by all processes that open the same file.
+    Values must be JSON serializable. Expired and overflow entries are removed
+    by a compaction pass every `compact_every` writes.
+    """
+
+    def __init__(self, path: str, table: str = "cache", ttl: Optional[float] = 3600, max_entries: int = 5000,
+                 max_bytes: Optional[int] = 20 * 1024 * 1024, compact_every: int = 50):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.compact_every = compact_every
+
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "errors": 0}
+
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_stored_at ON {table} (stored_at)")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def get_entry(self, key: Hashable, record: bool = True) -> Optional[Tuple[Any, float, float]]:
+        """Return (value, age_seconds, stored_at) for a fresh entry, or None."""
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    f"SELECT value, stored_at FROM {self.table} WHERE key = ?", (str(key),)
+                ).fetchone()
+                if row is not None and self.ttl is not None and now - row[1] >= self.ttl:
+                    self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (str(key),))
+                    self._stats["expirations"] += 1
+                    row = None
+
+                if row is None:
+                    if record:
+                        self._stats["misses"] += 1
+                    return None
+
+                if record:
+                    self._stats["hits"] += 1
+            return json.loads(row[0]), now - row[1], row[1]
+        except (sqlite3.Error, ValueError) as e:
+            self._stats["errors"] += 1
+            print(f"SQLite cache read failed: {e}")
+            return None
+
+    def put(self, key: Hashable, value: Any, stored_at: Optional[float] = None) -> None:
+        try:
+            data = json.dumps(value, ensure_ascii=False)
+            if self.max_bytes is not None and len(data.encode()) > self.max_bytes:
+                return  # Could never be kept; compaction would only delete it again
+            with self._lock:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at, size) VALUES (?, ?, ?, ?)",
+                    (str(key), data, stored_at if stored_at is not None else time.time(), len(data.encode()))
+                )
+                self._writes += 1
+                if self._writes % self.compact_every == 0:
+                    self._compact()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            self._stats["errors"] += 1
+            print(f"SQLite cache write failed: {e}")
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (str(key),))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "errors": 0}
+
+    def compact(self) -> None:
+        """Remove expired entries and trim to the size limits (oldest first)."""
+        with self._lock:
+            self._compact()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, total_bytes = self._conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+            total = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / total if total > 0 else 0.0,
+                "size": count,
+                "bytes": total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "path": self.path,
+                "table": self.table
+            }
+
+    def _compact(self) -> None:
+        if self.ttl is not None:
+            cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE stored_at <= ?", (time.time() - self.ttl,))
+            self._stats["expirations"] += max(cursor.rowcount, 0)
+
+        # Keep the newest entries that fit both the entry cap and the byte budget; a dropped
+        # entry does not count against the budget, so one oversized row cannot flush the rest
+        kept, keep_bytes = 0, 0
+        stale_keys = []
+        rows = self._conn.execute(f"SELECT key, size FROM {self.table} ORDER BY stored_at DESC").fetchall()
+        for key, size in rows:
+            if kept >= self.max_entries or (self.max_bytes is not None and keep_bytes + size > self.max_bytes):
+                stale_keys.append((key,))
+            else:
+                kept += 1
+                keep_bytes += size
+        if stale_keys:
+            self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", stale_keys)
+            self._stats["evictions"] += len(stale_keys)
+
+
+class TieredCache:
+    """In-memory LRUCache (L1) in front of an optional shared SQLiteCache (L2)."""
+
+    def __init__(self, l1: LRUCache, l2: Optional[SQLiteCache] = None):
+        self.l1 = l1
+        self.l2 = l2
+
+    def __len__(self) -> int:
+        return len(self.l1)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return entry[0] if entry else default
+
+    def get_entry(self, key: Hashable, record: bool = True) -> Optional[Tuple[Any, float]]:
+        """Return (value, age_seconds) from L1, falling back to L2 and promoting hits."""
+        entry = self.l1.get_entry(key, record=record)
+        if entry is not None or self.l2 is None:
+            return entry
+
+        # L2 always counts its own lookups, so cross-worker hits stay visible
+        l2_entry = self.l2.get_entry(key)
+        if l2_entry is None:
+            return None
+        value, age, stored_at = l2_entry
+        self.l1.put(key, value, stored_at=stored_at)
+        return value, age
+
+    def put(self, key: Hashable, value: Any, persist: bool = True) -> None:
+        """Store in L1, and in L2 unless persist=False (process-local keys)."""
+        self.l1.put(key, value)
+        if persist and self.l2 is not None:
+            self.l2.put(key, value)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        entry = self.get_entry(key)
+        if entry is not None:
+            return entry[0]
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def delete(self, key: Hashable) -> None:
+        self.l1.delete(key)
+        if self.l2 is not None:
+            self.l2.delete(key)
+
+    def clear(self) -> None:
+        self.l1.clear()
+        if self.l2 is not None:
+            self.l2.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """L1 statistics, with the L2 statistics nested under "l2"."""
+        stats = self.l1.stats()
+        if self.l2 is not None:
+            stats["l2"] = self.l2.stats()
+        return stats
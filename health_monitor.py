@@ -0,0 +1,123 @@
+import time
+import threading
+from typing import Any, Callable, Dict, Optional
+
+# ---------------------------------------------------------------------------
+# Background health monitor
+# ---------------------------------------------------------------------------
+# Each dependency (Google Sheets, OpenAI) is probed by a daemon thread on its
+# own cadence, and the outcome, latency and consecutive failure count are
+# kept in memory. /health serves that snapshot with its age, so polling it
+# costs microseconds and never adds API calls or competes with user traffic.
+# A component whose last result is older than `stale_factor` intervals is
+# reported as stale (the monitor itself may be stuck).
+# ---------------------------------------------------------------------------
+
+Check = Callable[[], Optional[Dict[str, Any]]]  # Raises when unhealthy; may return details
+
+
+class HealthMonitor:
+    """Runs registered checks in the background and serves cached results."""
+
+    def __init__(self, stale_factor: float = 3.0, name: str = "health-monitor"):
+        self.stale_factor = stale_factor
+        self.name = name
+
+        self._checks: Dict[str, Dict[str, Any]] = {}  # name -> {"check", "interval", "next_run"}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_check(self, name: str, check: Check, interval: float) -> None:
+        with self._lock:
+            self._checks[name] = {"check": check, "interval": interval, "next_run": 0.0}
+            self._results[name] = {"healthy": None, "error": "not checked yet", "latency_ms": None,
+                                   "checked_at": None, "consecutive_failures": 0}
+
+    # ------------------------------------------------------------------
+    # 1) Running checks
+    # ------------------------------------------------------------------
+
+    def run_once(self, name: Optional[str] = None) -> None:
+        """Run one check (or all of them) now, on the calling thread."""
+        with self._lock:
+            names = [name] if name else list(self._checks)
+        for check_name in names:
+            self._run(check_name)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+    # ------------------------------------------------------------------
+    # 2) Cached snapshot
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Latest result per component with its age; no probing happens here."""
+        now = time.time()
+        with self._lock:
+            components = {}
+            for name, result in self._results.items():
+                component = dict(result)
+                checked_at = component.pop("checked_at")
+                component["age_seconds"] = round(now - checked_at, 1) if checked_at else None
+                component["stale"] = (checked_at is None or
+                                      now - checked_at > self._checks[name]["interval"] * self.stale_factor)
+                components[name] = component
+
+        healthy = bool(components) and all(c["healthy"] and not c["stale"] for c in components.values())
+        return {"healthy": healthy, "monitor_running": self._thread is not None and self._thread.is_alive(),
+                "components": components}
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    def _run(self, name: str) -> None:
+        with self._lock:
+            entry = self._checks[name]
+            entry["next_run"] = time.time() + entry["interval"]
+
+        started = time.time()
+        try:
+            details = entry["check"]() or {}
+            healthy, error = True, None
+        except Exception as e:
+            details, healthy, error = {}, False, str(e)
+            print(f"Health check '{name}' failed: {e}")
+        latency_ms = round((time.time() - started) * 1000)
+
+        with self._lock:
+            previous = self._results[name]
+            self._results[name] = {
+                "healthy": healthy,
+                "error": error,
+                "latency_ms": latency_ms,
+                "checked_at": time.time(),
+                "consecutive_failures": 0 if healthy else previous["consecutive_failures"] + 1,
+                **details
+            }
+
+    def _loop(self) -> None:
+        while not self._stopped.is_set():
+            with self._lock:
+                due = sorted(self._checks.items(), key=lambda item: item[1]["next_run"])
+            if not due:
+                self._wake.wait(timeout=1.0)
+                continue
+
+            name, entry = due[0]
+            delay = entry["next_run"] - time.time()
+            if delay > 0:
+                self._wake.wait(timeout=delay)
+                self._wake.clear()
+                continue
+            self._run(name)
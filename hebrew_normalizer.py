@@ -0,0 +1,177 @@
+import re
+from datetime import date, timedelta
+from typing import List, Optional, Tuple, Union
+
+# ---------------------------------------------------------------------------
+# Local pre-normalizer for Hebrew expense messages
+# ---------------------------------------------------------------------------
+# Rewrites relative dates ("אתמול", "ביום שלישי", "לפני שלושה ימים") to ISO
+# dates and spelled-out amounts ("חמישים ושלוש", "מאתיים שקל") to digits,
+# so the local parser can handle more messages and dates never depend on the
+# model. The output is stable: normalizing twice gives the same text.
+# ---------------------------------------------------------------------------
+
+UNITS = {
+    "אחד": 1, "אחת": 1, "שניים": 2, "שתיים": 2, "שני": 2, "שתי": 2, "שנים": 2, "שתים": 2,
+    "שלוש": 3, "שלושה": 3, "שלושת": 3, "ארבע": 4, "ארבעה": 4, "ארבעת": 4,
+    "חמש": 5, "חמישה": 5, "חמשת": 5, "שש": 6, "שישה": 6, "ששת": 6,
+    "שבע": 7, "שבעה": 7, "שבעת": 7, "שמונה": 8, "שמונת": 8,
+    "תשע": 9, "תשעה": 9, "תשעת": 9, "עשר": 10, "עשרה": 10, "עשרת": 10,
+}
+TENS = {"עשרים": 20, "שלושים": 30, "ארבעים": 40, "חמישים": 50,
+        "שישים": 60, "שבעים": 70, "שמונים": 80, "תשעים": 90}
+HUNDREDS = {"מאה": 100, "מאתיים": 200}
+THOUSANDS = {"אלף": 1000, "אלפיים": 2000}
+HUNDRED_PLURAL = "מאות"
+THOUSAND_PLURAL = ("אלפים", "אלף")
+TEEN_SUFFIX = ("עשר", "עשרה")
+HALF = "חצי"
+
+# A lone small number word ("שני", "אחת") is usually not an amount; it only
+# counts when followed by one of these
+AMOUNT_FOLLOWERS = {"שקל", "שקלים", "שח", "ש\"ח", "₪", "ימים", "יום", "nis", "ils"}
+
+WEEKDAYS = {"ראשון": 6, "שני": 0, "שלישי": 1, "רביעי": 2, "חמישי": 3, "שישי": 4, "שבת": 5}
+_NUMBER_WORDS = set(UNITS) | set(TENS) | set(HUNDREDS) | set(THOUSANDS) | {HUNDRED_PLURAL, *THOUSAND_PLURAL}
+_AMOUNT_PREFIXES = "בו"
+
+_TOKEN_RE = re.compile(r"\S+|\s+")
+_EDGE_PUNCT_RE = re.compile(r"^([\"'(\[]*)(.*?)([.,!?:;)\]\"']*)$")
+# A bare "שבת" is usually the noun ("נרות שבת"); it is a date only as "בשבת"/"השבת" or after "יום"
+_WEEKDAY_RE = re.compile(
+    r"(?<![א-ת])(?:(?:ב|ה)?יום\s+(ראשון|שני|שלישי|רביעי|חמישי|שישי|שבת)|(?:ב|ה)(שבת))"
+    r"(?:\s+(שעבר|שעברה|הקודם|הקודמת))?(?![א-ת])"
+)
+_DAYS_AGO_RE = re.compile(r"(?<![א-ת])לפני\s+(\d+)\s+(ימים|יום|שבועות)(?![א-ת])")
+_FIXED_AGO = {"יומיים": 2, "שבוע": 7, "שבועיים": 14}
+_FIXED_AGO_RE = re.compile(r"(?<![א-ת])לפני\s+(יומיים|שבועיים|שבוע)(?![א-ת])")
+_RELATIVE_DAYS = {"היום": 0, "אתמול": 1, "שלשום": 2}
+_RELATIVE_RE = re.compile(r"(?<![א-ת])(?:מ)?(היום|אתמול|שלשום)(?![א-ת])")
+
+
+# ------------------------------------------------------------------
+# 1) Number words → digits
+# ------------------------------------------------------------------
+
+def _split_prefix(word: str, first: bool) -> Tuple[str, str]:
+    """Split a conjunction/preposition letter off a number word ("ושלוש" → "ו", "שלוש")."""
+    if word in _NUMBER_WORDS or word == HALF:
+        return "", word
+    if len(word) > 2 and word[0] in (_AMOUNT_PREFIXES if first else "ו") and (word[1:] in _NUMBER_WORDS or word[1:] == HALF):
+        return word[0], word[1:]
+    return "", word
+
+
+def _parse_number(words: List[str]) -> Optional[Tuple[Union[int, float], int, str]]:
+    """Parse a number phrase at the start of `words`: (value, words used, prefix) or None."""
+    prefix, word = _split_prefix(words[0], first=True)
+    if word not in _NUMBER_WORDS:
+        return None
+
+    total, current = 0, 0
+    i = 0
+    while i < len(words):
+        if i > 0:
+            conj, word = _split_prefix(words[i], first=False)
+            if word == HALF and conj:
+                current += 0.5
+                i += 1
+                break
+            if word not in _NUMBER_WORDS:
+                break
+        following = words[i + 1] if i + 1 < len(words) else ""
+
+        if word in UNITS:
+            value = UNITS[word]
+            if following in TEEN_SUFFIX and value < 10:
+                current += 10 + value
+                i += 1
+            elif following == HUNDRED_PLURAL:
+                current += value * 100
+                i += 1
+            elif following in THOUSAND_PLURAL:
+                total += (current + value) * 1000
+                current = 0
+                i += 1
+            else:
+                current += value
+        elif word in TENS:
+            current += TENS[word]
+        elif word in HUNDREDS:
+            current += HUNDREDS[word]
+        elif word in THOUSANDS:
+            total += max(current, 1) * THOUSANDS[word]
+            current = 0
+        else:
+            break
+        i += 1
+
+    value = total + current
+    return (value, i, prefix) if value else None
+
+
+def _format_number(value: Union[int, float]) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{value:g}"
+
+
+def normalize_numbers(text: str) -> str:
+    """Replace spelled-out Hebrew amounts with digits ("חמישים ושלוש שקל" → "53 שקל")."""
+    pieces = _TOKEN_RE.findall(text)
+    word_positions = [i for i, piece in enumerate(pieces) if not piece.isspace()]
+    bare = []
+    for i in word_positions:
+        match = _EDGE_PUNCT_RE.match(pieces[i])
+        bare.append((match.group(1), match.group(2), match.group(3)))
+
+    out = list(pieces)
+    k = 0
+    while k < len(bare):
+        # Stop the phrase at the first word with trailing punctuation ("עשרים, ..." ends at the comma)
+        words = []
+        for lead, core, trail in bare[k:]:
+            words.append(core)
+            if trail:
+                break
+        parsed = _parse_number(words) if not bare[k][0] else None
+        if parsed:
+            value, used, prefix = parsed
+            after = bare[k + used][1] if k + used < len(bare) else ""
+            if value >= 10 or used > 1 or after in AMOUNT_FOLLOWERS:
+                start, end = word_positions[k], word_positions[k + used - 1]
+                replacement = (f"{prefix}-" if prefix else "") + _format_number(value) + bare[k + used - 1][2]
+                out[start:end + 1] = [replacement] + [""] * (end - start)
+                k += used
+                continue
+        k += 1
+    return "".join(out)
+
+
+# ------------------------------------------------------------------
+# 2) Relative dates → ISO dates
+# ------------------------------------------------------------------
+
+def _weekday_date(name: str, previous: bool, today: date) -> date:
+    """Most recent `name` day up to today (strictly before today with שעבר)."""
+    days_back = (today.weekday() - WEEKDAYS[name]) % 7
+    if previous and days_back == 0:
+        days_back = 7
+    return today - timedelta(days=days_back)
+
+
+def normalize_dates(text: str, today: Optional[date] = None) -> str:
+    """Replace relative date expressions with ISO dates ("אתמול" → "2025-07-14")."""
+    today = today or date.today()
+
+    text = _WEEKDAY_RE.sub(
+        lambda m: _weekday_date(m.group(1) or m.group(2), bool(m.group(3)), today).isoformat(), text
+    )
+    text = _DAYS_AGO_RE.sub(
+        lambda m: (today - timedelta(days=int(m.group(1)) * (7 if m.group(2) == "שבועות" else 1))).isoformat(), text
+    )
+    text = _FIXED_AGO_RE.sub(lambda m: (today - timedelta(days=_FIXED_AGO[m.group(1)])).isoformat(), text)
+    return _RELATIVE_RE.sub(lambda m: (today - timedelta(days=_RELATIVE_DAYS[m.group(1)])).isoformat(), text)
+
+
+def normalize_message(text: str, today: Optional[date] = None) -> str:
+    """Numbers first (so "לפני שלושה ימים" becomes "לפני 3 ימים"), then dates."""
+    return normalize_dates(normalize_numbers(text), today)
@@ -0,0 +1,78 @@
+import re
+from typing import Collection, Iterable, List
+
+# ---------------------------------------------------------------------------
+# Hebrew text helpers shared by the local (no-GPT) components
+# ---------------------------------------------------------------------------
+
+_NIQQUD_RE = re.compile(r"[֑-ׇ]")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_NUMBER_RE = re.compile(r"^\d+(?:[.,]\d+)?$")
+_SPACES_RE = re.compile(r"\s+")
+
+# Single-letter prefixes that attach to Hebrew words (ו, ה, ב, ל, מ, ש, כ)
+HEBREW_PREFIXES = "והבלמשכ"
+
+# Words that never describe *what* was bought
+EXPENSE_FILLER_WORDS = {
+    "קניתי", "קנינו", "שילמתי", "שילמנו", "הוצאתי", "הוצאנו", "הוצאה", "עלה", "עלתה",
+    "עלו", "לי", "לנו", "על", "של", "את", "עם", "היום", "סך", "הכל",
+    "שקל", "שקלים", "שח", "nis", "ils",
+}
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop niqqud and punctuation, collapse whitespace."""
+    text = _NIQQUD_RE.sub("", text.lower())
+    text = _PUNCT_RE.sub(" ", text)
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+def tokenize(text: str, drop_numbers: bool = True) -> List[str]:
+    """Split text into normalized tokens."""
+    tokens = normalize_text(text).split()
+    if drop_numbers:
+        tokens = [t for t in tokens if not _NUMBER_RE.match(t)]
+    return tokens
+
+
+def strip_prefix(token: str, known: Collection[str]) -> str:
+    """
+    Remove a single attached prefix letter ('בקניות' → 'קניות'), but only when
+    the rest is a known token: root letters look the same ('הוצאתי' stays).
+    """
+    if len(token) >= 4 and token[0] in HEBREW_PREFIXES and token not in known and token[1:] in known:
+        return token[1:]
+    return token
+
+
+def description_tokens(text: str) -> List[str]:
+    """Tokens that describe the purchased item (filler words, numbers and stray letters removed)."""
+    return [t for t in tokenize(text) if len(t) > 1 and t not in EXPENSE_FILLER_WORDS]
+
+
+# Words that do not change what a budget question is asking
+QUESTION_STOPWORDS = {
+    "לי", "לנו", "אני", "אנחנו", "את", "של", "שלי", "שלנו", "עם", "בבקשה", "תגיד",
+    "תגידי", "תראה", "תראי", "תבדוק", "תבדקי", "רגע", "בעצם", "פה", "כאן", "עכשיו",
+    "בערך", "יש", "אז", "נו", "היי", "תודה",
+}
+
+# Budget nouns a question may carry a prefix on ("בחודש", "מהתקציב")
+QUESTION_TERMS = {
+    "חודש", "שבוע", "יום", "שנה", "תקציב", "יתרה", "הוצאות", "הכנסות", "קטגוריה", "קטגוריות",
+}
+
+
+def question_signature(question: str, categories: Iterable[str] = ()) -> str:
+    """
+    Normalized intent signature of a question, so that "כמה נשאר בקניות?" and
+    "כמה נשאר לי קניות" share a cache entry. Word order, numbers and negations
+    are kept ("כמה יותר על אוכל מאשר בילויים" differs from the reverse).
+    Prefixes are stripped only from category names and QUESTION_TERMS.
+    """
+    known = set(QUESTION_TERMS)
+    for category in categories:
+        known.update(tokenize(category, drop_numbers=False))
+    tokens = [strip_prefix(t, known) for t in tokenize(question, drop_numbers=False) if t not in QUESTION_STOPWORDS]
+    return " ".join(tokens)
@@ -0,0 +1,128 @@
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from hebrew_text import tokenize
+
+# ---------------------------------------------------------------------------
+# Compiled intent router for quick commands and natural phrases
+# ---------------------------------------------------------------------------
+# All phrase tables are compiled once into a token-level Aho-Corasick
+# automaton, so one pass over the message finds every phrase of every intent,
+# however long the tables grow. Matching whole tokens means "הי" no longer
+# fires inside "היום".
+#
+# Overlaps are resolved explicitly: of two overlapping matches the longer
+# (more specific) one wins ("מה המצב עם הכסף" is a balance query, not the
+# greeting "מה המצב"); among the rest the intent listed first wins.
+# ---------------------------------------------------------------------------
+
+# Intent → trigger phrases, in priority order
+NATURAL_INTENTS: List[Tuple[str, List[str]]] = [
+    ("show_remaining_budgets", [
+        "כמה נשאר", "מה היתרה", "תראה לי את היתרה", "מה המצב עם הכסף",
+        "איך אני עומד", "מה יש לי", "כמה יש לי", "מה הסטטוס"
+    ]),
+    ("show_categories", [
+        "איזה קטגוריות", "מה הקטגוריות", "תראה לי קטגוריות", "רשימת קטגוריות",
+        "איזה אפשרויות", "מה אפשר", "איך מחלקים"
+    ]),
+    ("show_help", [
+        "איך זה עובד", "מה אפשר לעשות", "איך להשתמש", "מה הפקודות",
+        "עזרה", "הדרכה", "מדריך", "איך אני משתמש"
+    ]),
+    ("refresh_budgets", [
+        "רענן", "עדכן", "חשב מחדש", "בדוק שוב", "תקן את המספרים",
+        "עדכן יתרות", "תסנכרן"
+    ]),
+    ("thanks", ["תודה", "תודה רבה", "יפה", "מעולה", "כל הכבוד"]),
+    ("greeting", ["שלום", "היי", "הי", "מה נשמע", "מה המצב"]),
+]
+
+
+class IntentMatch(NamedTuple):
+    intent: str
+    phrase: str
+    start: int       # Token span [start, end) in the normalized message
+    end: int
+    priority: int    # Lower is stronger
+    exact: bool      # The whole message is a quick command
+
+
+class IntentRouter:
+    """Token-level Aho-Corasick automaton over all intent phrases."""
+
+    def __init__(self, intents: Sequence[Tuple[str, Sequence[str]]], exact: Optional[Dict[str, str]] = None):
+        self.exact = {" ".join(tokenize(command, drop_numbers=False)): intent
+                      for command, intent in (exact or {}).items()}
+
+        self._patterns: List[Tuple[str, str, int, int]] = []  # (intent, phrase, length, priority)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for priority, (intent, phrases) in enumerate(intents):
+            for phrase in phrases:
+                tokens = tokenize(phrase, drop_numbers=False)
+                if tokens:
+                    self._add(tokens, (intent, phrase, len(tokens), priority))
+        self._link()
+
+    # ------------------------------------------------------------------
+    # 1) Matching
+    # ------------------------------------------------------------------
+
+    def matches(self, text: str) -> List[IntentMatch]:
+        """Every phrase occurrence in the message, in one pass."""
+        found = []
+        state = 0
+        for position, token in enumerate(tokenize(text, drop_numbers=False)):
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            for index in self._out[state]:
+                intent, phrase, length, priority = self._patterns[index]
+                found.append(IntentMatch(intent, phrase, position + 1 - length, position + 1, priority, False))
+        return found
+
+    def route(self, text: str) -> Optional[IntentMatch]:
+        """The winning intent for a message, or None."""
+        tokens = tokenize(text, drop_numbers=False)
+        command = self.exact.get(" ".join(tokens))
+        if command:
+            return IntentMatch(command, text, 0, len(tokens), -1, True)
+
+        # Longest first: a match overlapping an already kept (longer) one is dropped
+        kept: List[IntentMatch] = []
+        for match in sorted(self.matches(text), key=lambda m: (m.start - m.end, m.priority, m.start)):
+            if all(match.end <= other.start or match.start >= other.end for other in kept):
+                kept.append(match)
+        return min(kept, key=lambda m: (m.priority, m.start)) if kept else None
+
+    # ------------------------------------------------------------------
+    # Internal helpers (automaton construction)
+    # ------------------------------------------------------------------
+
+    def _add(self, tokens: List[str], pattern: Tuple[str, str, int, int]) -> None:
+        node = 0
+        for token in tokens:
+            if token not in self._goto[node]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[node][token] = len(self._goto) - 1
+            node = self._goto[node][token]
+        self._patterns.append(pattern)
+        self._out[node].append(len(self._patterns) - 1)
+
+    def _link(self) -> None:
+        """Breadth-first failure links; each node also reports its suffixes' phrases."""
+        queue = deque(self._goto[0].values())  # Depth-1 nodes keep fail = root
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(token, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
@@ -0,0 +1,62 @@
+import re
+from datetime import date
+from typing import Dict, Optional, Union
+
+from hebrew_normalizer import normalize_message
+from hebrew_text import description_tokens, tokenize
+
+# ---------------------------------------------------------------------------
+# Rule-based expense parsing for the no-GPT fast path
+# ---------------------------------------------------------------------------
+
+JsonDict = Dict[str, Union[str, int, float]]
+
+_ISO_DATE_RE = re.compile(r"(?<!\d)\d{4}-\d{2}-\d{2}(?!\d)")
+_PRICE_RE = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?")
+QUESTION_WORDS = {"כמה", "מה", "איך", "איפה", "למה", "מתי", "האם", "תראה", "הראה"}
+MAX_DESCRIPTION_WORDS = 5
+
+
+def parse_price(text: str) -> Optional[Union[int, float]]:
+    """Return the single amount mentioned in the text, or None if zero or several."""
+    matches = _PRICE_RE.findall(text)
+    if len(matches) != 1:
+        return None
+    price = float(matches[0].replace(",", ""))
+    return int(price) if price.is_integer() else price
+
+
+def parse_simple_expense(text: str) -> Optional[JsonDict]:
+    """
+    Parse short expense messages like "נטפליקס 39.9" or "קניתי פלאפל ב-18".
+    Spelled-out amounts and relative dates ("פלאפל עשרים אתמול") are normalized
+    first. Returns {"פירוט", "מחיר", "תאריך"} (no category) or None when the
+    message is not an unambiguous single expense.
+    """
+    if "?" in text:
+        return None
+
+    text = normalize_message(text)
+    dates = _ISO_DATE_RE.findall(text)
+    if len(dates) > 1:
+        return None
+    expense_date = dates[0] if dates else date.today().isoformat()
+    text = _ISO_DATE_RE.sub(" ", text)
+
+    words = tokenize(text)
+    if not words or words[0] in QUESTION_WORDS:
+        return None
+
+    price = parse_price(text)
+    if price is None or price <= 0:
+        return None
+
+    description = description_tokens(text)
+    if not description or len(description) > MAX_DESCRIPTION_WORDS:
+        return None
+
+    return {
+        "פירוט": " ".join(description),
+        "מחיר": price,
+        "תאריך": expense_date
+    }
@@ -0,0 +1,110 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+# ---------------------------------------------------------------------------
+# Micro-batching: merge requests that arrive within a few milliseconds
+# ---------------------------------------------------------------------------
+# Callers block in submit() while a collector thread gathers requests. A
+# batch is sent when `max_batch` requests are waiting or `max_wait` seconds
+# after the first one arrived, whichever comes first. Batches run on a small
+# thread pool, so one slow batch does not hold back the next. Each caller
+# gets its own result (or exception) back through a Future.
+# ---------------------------------------------------------------------------
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_STOP = object()
+
+
+class MicroBatcher(Generic[T, R]):
+    """Collects single requests into batches for `process_batch(items) -> results`."""
+
+    def __init__(self, process_batch: Callable[[List[T]], List[R]], max_batch: int = 8,
+                 max_wait: float = 0.015, max_parallel_batches: int = 4, name: str = "micro-batcher"):
+        self.process_batch = process_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_parallel_batches, thread_name_prefix=f"{name}-run")
+        self._stats_lock = threading.Lock()
+        self._stats = {"batches": 0, "items": 0, "largest_batch": 0, "errors": 0}
+
+        self._collector = threading.Thread(target=self._collect, name=name, daemon=True)
+        self._collector.start()
+
+    def submit(self, item: T, timeout: Optional[float] = None) -> R:
+        """Queue one request and block until its result is ready."""
+        future: "Future[R]" = Future()
+        self._queue.put((item, future))
+        return future.result(timeout=timeout)
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            batches = self._stats["batches"]
+            return {
+                **self._stats,
+                "avg_batch_size": self._stats["items"] / batches if batches else 0.0,
+                "queued": self._queue.qsize()
+            }
+
+    def close(self) -> None:
+        """Stop collecting; batches already running are finished."""
+        self._queue.put(_STOP)
+        self._collector.join(timeout=5)
+        self._executor.shutdown(wait=True)
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    def _collect(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stop = True
+                    break
+                batch.append(entry)
+
+            self._executor.submit(self._dispatch, batch)
+            if stop:
+                return
+
+    def _dispatch(self, batch: List[Tuple[T, "Future[R]"]]) -> None:
+        items = [item for item, _ in batch]
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["items"] += len(items)
+            self._stats["largest_batch"] = max(self._stats["largest_batch"], len(items))
+
+        try:
+            results = self.process_batch(items)
+            if len(results) != len(items):
+                raise ValueError(f"Batch returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            with self._stats_lock:
+                self._stats["errors"] += 1
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
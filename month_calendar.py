@@ -0,0 +1,138 @@
+import re
+from typing import Optional, Tuple
+
+# ---------------------------------------------------------------------------
+# Deterministic month-name calendar for budget sheet (tab) names
+# ---------------------------------------------------------------------------
+# Understands Hebrew and English month names, English abbreviations, year
+# suffixes ("יולי 2025", "July-25") and numeric tabs ("2025-07", "07/2025").
+# The next month keeps the language, casing, separators and year style of the
+# current tab name, so "דצמבר 2025" → "ינואר 2026".
+# ---------------------------------------------------------------------------
+
+HEBREW_MONTHS = ["ינואר", "פברואר", "מרץ", "אפריל", "מאי", "יוני",
+                 "יולי", "אוגוסט", "ספטמבר", "אוקטובר", "נובמבר", "דצמבר"]
+ENGLISH_MONTHS = ["January", "February", "March", "April", "May", "June",
+                  "July", "August", "September", "October", "November", "December"]
+
+# Alternate spellings → month number (1-based)
+_HEBREW_ALIASES = {"מרס": 3, "מארס": 3, "ינו": 1, "פבר": 2, "אפר": 4, "אוג": 8, "ספט": 9,
+                   "אוק": 10, "נוב": 11, "דצמ": 12}
+_ENGLISH_ALIASES = {"sept": 9}
+
+_WORD_RE = re.compile(r"[A-Za-z]+|[א-ת]+")
+_YEAR_RE = re.compile(r"(?<!\d)(\d{4}|\d{2})(?!\d)")
+_YEAR_FIRST_RE = re.compile(r"^(\d{4})([-_./ ])(\d{1,2})$")
+_MONTH_FIRST_RE = re.compile(r"^(\d{1,2})([-_./ ])(\d{4}|\d{2})$")
+
+
+def _match_month_word(word: str) -> Optional[Tuple[int, str, bool]]:
+    """Return (month, language, is_abbreviation) for a single word."""
+    if word in HEBREW_MONTHS:
+        return HEBREW_MONTHS.index(word) + 1, "he", False
+    if word in _HEBREW_ALIASES:
+        return _HEBREW_ALIASES[word], "he", False
+
+    lower = word.lower()
+    for index, name in enumerate(ENGLISH_MONTHS):
+        if lower == name.lower():
+            return index + 1, "en", False
+        if lower == name[:3].lower():
+            return index + 1, "en", True
+    if lower in _ENGLISH_ALIASES:
+        return _ENGLISH_ALIASES[lower], "en", True
+    return None
+
+
+def _month_word(month: int, language: str, abbreviated: bool, like: str) -> str:
+    """Month name in the given language, matching the casing of `like`."""
+    if language == "he":
+        return HEBREW_MONTHS[month - 1]
+
+    name = ENGLISH_MONTHS[month - 1]
+    if abbreviated:
+        name = name[:3]
+    if like.isupper():
+        return name.upper()
+    if like.islower():
+        return name.lower()
+    return name
+
+
+def _format_year(year: int, like: str) -> str:
+    return f"{year % 100:02d}" if len(like) == 2 else str(year)
+
+
+def parse_month(name: str) -> Optional[Tuple[int, Optional[int]]]:
+    """Return (month, year or None) for a month/tab name, or None if unrecognized."""
+    text = name.strip()
+
+    numeric = _YEAR_FIRST_RE.match(text)
+    if numeric and 1 <= int(numeric.group(3)) <= 12:
+        return int(numeric.group(3)), int(numeric.group(1))
+    numeric = _MONTH_FIRST_RE.match(text)
+    if numeric and 1 <= int(numeric.group(1)) <= 12:
+        year = int(numeric.group(3))
+        return int(numeric.group(1)), year + 2000 if year < 100 else year
+
+    for word in _WORD_RE.findall(text):
+        found = _match_month_word(word)
+        if found:
+            year_match = _YEAR_RE.search(text)
+            if year_match:
+                year = int(year_match.group(1))
+                return found[0], year + 2000 if year < 100 else year
+            return found[0], None
+    return None
+
+
+def next_month_name(current: str) -> Optional[str]:
+    """
+    Name of the month after `current` in the same naming convention,
+    or None when `current` is not a recognizable month name.
+    """
+    text = current.strip()
+
+    # Numeric tabs: "2025-07" → "2025-08", "12/2025" → "01/2026"
+    numeric = _YEAR_FIRST_RE.match(text)
+    if numeric and 1 <= int(numeric.group(3)) <= 12:
+        year_str, sep, month_str = numeric.groups()
+        month, year = int(month_str) + 1, int(year_str)
+        if month > 12:
+            month, year = 1, year + 1
+        return f"{year}{sep}{month:0{len(month_str)}d}"
+
+    numeric = _MONTH_FIRST_RE.match(text)
+    if numeric and 1 <= int(numeric.group(1)) <= 12:
+        month_str, sep, year_str = numeric.groups()
+        month, year = int(month_str) + 1, int(year_str)
+        if month > 12:
+            month, year = 1, year + 1
+        return f"{month:0{len(month_str)}d}{sep}{_format_year(year, year_str)}"
+
+    # Named months, optionally with a year somewhere in the tab name
+    for word_match in _WORD_RE.finditer(text):
+        found = _match_month_word(word_match.group(0))
+        if not found:
+            continue
+
+        month, language, abbreviated = found
+        next_month = month % 12 + 1
+        new_word = _month_word(next_month, language, abbreviated, word_match.group(0))
+        result = text[:word_match.start()] + new_word + text[word_match.end():]
+
+        if next_month == 1:
+            year_match = _YEAR_RE.search(result)
+            if year_match:
+                year_str = year_match.group(1)
+                year = int(year_str) + 1
+                result = result[:year_match.start()] + _format_year(year, year_str) + result[year_match.end():]
+        return result
+
+    return None
+
+
+def looks_like_month(text: str) -> bool:
+    """True if the text is (mostly) a month or tab name."""
+    return parse_month(text) is not None and len(text.split()) <= 3
+
@@ -1,11 +1,25 @@
 import os
+import re
 import json
 import time
 import hashlib
+import threading
+from collections import deque
 from datetime import date
-from typing import List, Dict, Literal, Union, cast, Optional
+from typing import Callable, List, Dict, Literal, Sequence, TypeVar, Union, cast, Optional
 
-from openai import OpenAI
+from openai import APIConnectionError, APIStatusError, OpenAI
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError, ProviderUnavailableError
+from confirmation import classify_confirmation
+from gpt_cache import LRUCache, SQLiteCache, TieredCache
+from hebrew_text import question_signature
+from month_calendar import next_month_name
+from micro_batcher import MicroBatcher
+from prompt_context import build_prompt_context
+from response_validation import (BUDGET_CATEGORIES_SCHEMA, ResponseValidationError, batch_response_schema,
+                                 extract_json, multi_batch_response_schema, validate_batch_result,
+                                 validate_budget_categories, validate_multi_batch_result)
 
 # ---------------------------------------------------------------------------
 # Optimized GPT‑API with Caching and Batch Operations
@@ -13,70 +27,184 @@ from openai import OpenAI
 
 JsonDict = Dict[str, Union[str, int, float]]
 MessageType = Literal["budget_entry", "question", "budget_setup", "error"]
+T = TypeVar("T")
+
+def without_proxy_env(factory: Callable[[], T]) -> T:
+    """Build a client with proxy variables hidden (they break App Engine's OpenAI setup)."""
+    old_proxy_env = {}
+    proxy_vars = ['HTTP_PROXY', 'HTTPS_PROXY', 'http_proxy', 'https_proxy']
+    for var in proxy_vars:
+        if var in os.environ:
+            old_proxy_env[var] = os.environ[var]
+            del os.environ[var]
+    
+    try:
+        return factory()
+    finally:
+        for var, value in old_proxy_env.items():
+            os.environ[var] = value
+
+# ---------------------------------------------------------------------------
+# Model tiering: cheap calls go to a fast model, hard ones to a stronger one
+# ---------------------------------------------------------------------------
+
+TierName = Literal["fast", "standard", "strong"]
+CallType = Literal["short", "extraction", "question", "categories"]
+
+# model: None means the client's own model; fallback: next tier on error or timeout;
+# slow_after: latency the circuit breaker counts as a slow call for this tier
+DEFAULT_MODEL_TIERS: Dict[str, Dict] = {
+    "fast": {"model": "gpt-4.1-nano", "timeout": 8.0, "fallback": "standard", "slow_after": 5.0},
+    "standard": {"model": None, "timeout": 20.0, "fallback": "strong", "slow_after": 12.0},
+    "strong": {"model": "gpt-4.1", "timeout": 30.0, "fallback": None, "slow_after": 20.0},
+}
+# Budget for a whole fallback chain, so one message never waits on every tier's full timeout
+DEFAULT_TIER_DEADLINE = 30.0
+
+# USD per 1M tokens (input, output), for the cost counters
+MODEL_PRICES = {
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+_AMOUNT_RE = re.compile(r"\d+(?:[.,]\d+)?")
+ANALYTICAL_WORDS = ("השווה", "השוואה", "למה", "ניתוח", "תנתח", "מגמה", "תכנן", "תכנון", "המלצה", "תמליץ", "כדאי")
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """
+    True for errors that say the provider is down or overloaded (timeouts,
+    connection errors, 429, 5xx). Bad requests, auth errors and unusable
+    replies are our problem, not an outage, so the breaker ignores them.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError, APIConnectionError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def route_tier(call_type: CallType, text: str) -> TierName:
+    """Pick a model tier from the call type and how complex the input looks."""
+    words = len(text.split())
+    amounts = len(_AMOUNT_RE.findall(text))
+
+    if call_type == "short":
+        return "fast"
+    if call_type == "extraction":
+        # "פלאפל 18" needs no reasoning; several amounts or a story does
+        return "fast" if words <= 8 and amounts == 1 else "standard"
+    if call_type == "question":
+        if words > 25 or any(word in text for word in ANALYTICAL_WORDS):
+            return "strong"
+        return "standard"
+    if call_type == "categories":
+        return "strong" if amounts > 6 or words > 40 else "standard"
+    return "standard"
+
 
 class OptimizedGPT_API:
     """Enhanced GPT API with intelligent caching and batch operations."""
 
-    def __init__(self, api_key: str, model: str = "gpt-4.1-mini"):
-        # Initialize OpenAI client (same as original)
-        old_proxy_env = {}
-        proxy_vars = ['HTTP_PROXY', 'HTTPS_PROXY', 'http_proxy', 'https_proxy']
-        for var in proxy_vars:
-            if var in os.environ:
-                old_proxy_env[var] = os.environ[var]
-                del os.environ[var]
-        
-        try:
-            self.client = OpenAI(
-                api_key=api_key,
-                timeout=30.0,
-                max_retries=2
-            )
-        finally:
-            for var, value in old_proxy_env.items():
-                os.environ[var] = value
+    def __init__(self, api_key: str, model: str = "gpt-4.1-mini",
+                 cache_max_entries: int = 256, cache_max_bytes: Optional[int] = 2 * 1024 * 1024,
+                 cache_path: Optional[str] = None, model_tiers: Optional[Dict[str, Dict]] = None,
+                 tier_deadline: float = DEFAULT_TIER_DEADLINE):
+        # No client-side retries: the tier fallback is the retry, bounded by tier_deadline
+        self.client = without_proxy_env(lambda: OpenAI(
+            api_key=api_key,
+            timeout=30.0,
+            max_retries=0
+        ))
+        self.tier_deadline = tier_deadline
         
         self.model = model
         
-        # Initialize caching systems
-        self._question_cache = {}  # {cache_key: (response, timestamp)}
+        # Model tiers, each with its own latency/cost counters
+        self.model_tiers = {name: dict(settings) for name, settings in DEFAULT_MODEL_TIERS.items()}
+        for name, settings in (model_tiers or {}).items():
+            self.model_tiers.setdefault(name, {"model": None, "timeout": 20.0, "fallback": None,
+                                               "slow_after": None}).update(settings)
+        self._tier_lock = threading.Lock()
+        self._tier_stats = {
+            name: {"calls": 0, "errors": 0, "fallbacks": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                   "cost_usd": 0.0, "latencies": deque(maxlen=200)}
+            for name in self.model_tiers
+        }
+        
+        # Initialize caching systems (bounded LRU with O(1) get/put),
+        # optionally backed by a SQLite file shared by workers on this host
         self._cache_ttl = 300  # 5 minutes
-        self._cache_stats = {"hits": 0, "misses": 0}
+        response_ttl = 3600
+        question_l2 = response_l2 = None
+        if cache_path:
+            try:
+                question_l2 = SQLiteCache(cache_path, table="question_cache", ttl=self._cache_ttl)
+                response_l2 = SQLiteCache(cache_path, table="response_cache", ttl=response_ttl)
+            except Exception as e:
+                print(f"Persistent GPT cache disabled ({cache_path}): {e}")
+                question_l2 = response_l2 = None
+        
+        self._question_cache = TieredCache(
+            LRUCache(max_entries=cache_max_entries, ttl=self._cache_ttl, max_bytes=cache_max_bytes), question_l2
+        )
+        # Deterministic (temperature 0) completions, shared by the other GPT methods
+        self._response_cache = TieredCache(
+            LRUCache(max_entries=cache_max_entries, ttl=response_ttl, max_bytes=cache_max_bytes), response_l2
+        )
+        # Prompt digests of the budget data, keyed by data fingerprint and day
+        self._context_cache = LRUCache(max_entries=16, ttl=None)
+        
+        # Fail fast while the provider is down or very slow; a background probe closes it again
+        self.breaker = CircuitBreaker(probe=self._breaker_probe)
+        
+        # Optional cross-user batching of extraction calls (see enable_micro_batching)
+        self._extraction_batcher: Optional[MicroBatcher] = None
 
     # ------------------------------------------------------------------
     # 1) OPTIMIZATION: Smart Question Caching
     # ------------------------------------------------------------------
     
-    def answer_question_cached(self, question: str, summary_rows: List[JsonDict], tx_rows: List[JsonDict]) -> Dict[str, Union[str, bool, int]]:
-        """Answer question with intelligent caching."""
-        
-        # Create cache key from question intent + data state
-        question_hash = hashlib.md5(question.lower().encode()).hexdigest()[:8]
-        data_hash = hashlib.md5(str(summary_rows + tx_rows[:5]).encode()).hexdigest()[:8]
-        cache_key = f"{question_hash}_{data_hash}"
-        
-        current_time = time.time()
+    def answer_question_cached(self, question: str, summary_rows: List[JsonDict], tx_rows: List[JsonDict],
+                               data_version: Optional[Union[int, str]] = None,
+                               lookup: bool = True, categories: Sequence[str] = ()) -> Dict[str, Union[str, bool, int]]:
+        """
+        Answer question with intelligent caching.
+        `data_version` is the sheets' data version (see get_cached_answer).
+        Entries are also stored under a fingerprint of all the provided rows,
+        which is valid across processes and is the only key persisted to disk.
+        Pass lookup=False if get_cached_answer() was already checked.
+        `categories` lets the intent signature strip prefixes from category names.
+        """
+        data_fingerprint = hashlib.md5(str(summary_rows + tx_rows).encode()).hexdigest()[:16]
+        shared_key = self._question_cache_key(question, data_fingerprint, categories)
+        local_key = self._question_cache_key(question, data_version, categories) if data_version is not None else None
         
         # Check cache first
-        if cache_key in self._question_cache:
-            cached_response, timestamp = self._question_cache[cache_key]
-            if current_time - timestamp < self._cache_ttl:
-                self._cache_stats["hits"] += 1
-                return {
-                    "answer": f"⚡ {cached_response}",  # Lightning bolt indicates cached
-                    "cached": True,
-                    "cache_age": int(current_time - timestamp)
-                }
-        
-        # Cache miss - generate new response
-        self._cache_stats["misses"] += 1
-        answer = self._answer_question_uncached(question, summary_rows, tx_rows)
+        if lookup and local_key:
+            cached = self.get_cached_answer(question, data_version, categories)
+            if cached:
+                return cached
         
-        # Store in cache
-        self._question_cache[cache_key] = (answer, current_time)
+        # The local-key lookup (here or in the caller) already counted this request
+        entry = self._question_cache.get_entry(shared_key, record=local_key is None)
+        if entry is not None:
+            cached_response, age = entry
+            answer = str(cached_response)
+            if local_key:
+                self._question_cache.put(local_key, answer, persist=False)
+            return {
+                "answer": f"⚡ {answer}",
+                "cached": True,
+                "cache_age": int(age)
+            }
         
-        # Clean old cache entries (keep cache size manageable)
-        self._cleanup_cache()
+        # Cache miss - generate new response and store it
+        answer = self._answer_question_uncached(question, summary_rows, tx_rows, data_fingerprint)
+        self._question_cache.put(shared_key, answer)
+        if local_key:
+            self._question_cache.put(local_key, answer, persist=False)
         
         return {
             "answer": answer,
@@ -84,13 +212,47 @@ class OptimizedGPT_API:
             "cache_age": 0
         }
     
-    def _answer_question_uncached(self, question: str, summary_rows: List[JsonDict], tx_rows: List[JsonDict]) -> str:
+    def get_cached_answer(self, question: str, data_version: Union[int, str],
+                          categories: Sequence[str] = ()) -> Optional[Dict[str, Union[str, bool, int]]]:
+        """
+        Return a cached answer for this question intent and data version, if fresh.
+        The version (SheetsIO.data_version) changes on every write by any worker
+        sharing its state store; these entries are kept in memory only.
+        """
+        entry = self._question_cache.l1.get_entry(self._question_cache_key(question, data_version, categories))
+        if entry is None:
+            return None
+        
+        cached_response, age = entry
+        return {
+            "answer": f"⚡ {cached_response}",  # Lightning bolt indicates cached
+            "cached": True,
+            "cache_age": int(age)
+        }
+    
+    @staticmethod
+    def _question_cache_key(question: str, data_version: Union[int, str], categories: Sequence[str] = ()) -> str:
+        """Cache key from the normalized question intent + data version."""
+        return f"{question_signature(question, categories)}|v{data_version}"
+    
+    def get_prompt_context(self, summary_rows: List[JsonDict], tx_rows: List[JsonDict],
+                           data_fingerprint: Optional[str] = None) -> str:
+        """Compact digest of the budget data, built once per data version and day."""
+        if data_fingerprint is None:
+            data_fingerprint = hashlib.md5(str(summary_rows + tx_rows).encode()).hexdigest()[:16]
+        today = date.today()
+        return self._context_cache.get_or_compute(
+            (data_fingerprint, today.isoformat()),
+            lambda: build_prompt_context(summary_rows, tx_rows, today=today)
+        )
+    
+    def _answer_question_uncached(self, question: str, summary_rows: List[JsonDict], tx_rows: List[JsonDict],
+                                  data_fingerprint: Optional[str] = None) -> str:
         """Original question answering logic (uncached)."""
         system = (
             "אתה עוזר תקציב חכם שעונה בעברית על שאלות בצורה טבעית וחברותית.\n"
-            "יש לך גישה לנתוני התקציב:\n\n"
-            "**סיכום תקציב (summary_rows):**\n" + json.dumps(summary_rows[:3], ensure_ascii=False, indent=2) + "\n...\n\n"
-            "**הוצאות אחרונות (tx_rows):**\n" + json.dumps(tx_rows[:3], ensure_ascii=False, indent=2) + "\n...\n\n"
+            "נתוני התקציב (סכומים בש\"ח):\n"
+            + self.get_prompt_context(summary_rows, tx_rows, data_fingerprint) + "\n\n"
             "**אתה יכול לענות על:**\n"
             "• שאלות על יתרות ('כמה נשאר?', 'מה המצב?')\n"
             "• הוצאות לפי קטגוריה ('מה הוצאתי על קניות?')\n"
@@ -113,44 +275,134 @@ class OptimizedGPT_API:
             {"role": "system", "content": system},
             {"role": "user", "content": question}
         ]
-        return self._call_chat(messages, temp=0.3)
+        return self.call_tiered("question", question, messages, temp=0.3)
     
-    def _cleanup_cache(self):
-        """Remove old cache entries to prevent memory bloat."""
-        current_time = time.time()
-        expired_keys = [
-            k for k, (_, timestamp) in self._question_cache.items() 
-            if current_time - timestamp > self._cache_ttl
-        ]
-        for key in expired_keys:
-            del self._question_cache[key]
-
     # ------------------------------------------------------------------
     # 2) OPTIMIZATION: Batch GPT Operations for Expense Processing  
     # ------------------------------------------------------------------
     
-    def process_message_batch(self, text: str, categories: List[str]) -> Dict:
+    def process_message_batch(self, text: str, categories: List[str], category_hint: Optional[str] = None) -> Dict:
         """
         Combined classification + parsing in a single GPT call.
         Returns comprehensive analysis of the message.
+        `category_hint` is the category learned from past expenses, if any.
+        With micro-batching enabled, messages arriving together share one call.
+        """
+        if self._extraction_batcher is not None:
+            try:
+                result = self._extraction_batcher.submit((text, tuple(categories), category_hint),
+                                                         timeout=self.tier_deadline + 1)
+                if result is not None:
+                    return result
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                if self.breaker.is_open:
+                    raise CircuitOpenError(f"GPT circuit opened during batch: {e}") from e
+                if is_provider_failure(e):
+                    # Includes the batch wait timing out: the time budget is gone, answer in limited mode
+                    raise ProviderUnavailableError(f"GPT unavailable for batched extraction: {e!r}") from e
+                print(f"Micro-batch extraction failed, analysing alone: {e}")
+        return self._analyze_message(text, categories, category_hint)
+    
+    def enable_micro_batching(self, max_batch: int = 8, max_wait: float = 0.015) -> None:
+        """Batch process_message_batch calls that arrive within `max_wait` seconds of each other."""
+        if self._extraction_batcher is None:
+            self._extraction_batcher = MicroBatcher(self._analyze_messages, max_batch=max_batch,
+                                                    max_wait=max_wait, name="gpt-extraction-batcher")
+    
+    def get_batching_stats(self) -> Dict[str, float]:
+        return self._extraction_batcher.stats() if self._extraction_batcher else {"enabled": False}
+    
+    def _analyze_messages(self, items: List[tuple]) -> List[Optional[Dict]]:
+        """
+        MicroBatcher callback: analyse (text, categories, hint) items, one GPT call
+        per category list. Items the model skipped come back as None.
         """
+        results: List[Optional[Dict]] = [None] * len(items)
+        groups: Dict[tuple, List[int]] = {}
+        for position, (_, categories, _) in enumerate(items):
+            groups.setdefault(categories, []).append(position)
+        
+        for categories, positions in groups.items():
+            if len(positions) == 1:
+                text, _, hint = items[positions[0]]
+                results[positions[0]] = self._analyze_message(text, list(categories), hint)
+                continue
+            
+            group_results = self._analyze_message_group([items[p] for p in positions], list(categories))
+            for position, result in zip(positions, group_results):
+                results[position] = result
+        return results
+    
+    def _analyze_message_group(self, items: List[tuple], categories: List[str]) -> List[Optional[Dict]]:
+        """Analyse several messages that share a category list in one indexed GPT call."""
+        lines = []
+        for index, (text, _, hint) in enumerate(items):
+            hint_note = f" (פריטים דומים סווגו בעבר כ-\"{hint}\")" if hint else ""
+            lines.append(f"[{index}] \"{text}\"{hint_note}")
+        
+        group_prompt = f"""
+אתה עוזר תקציב חכם שמנתח הודעות בעברית. כל הודעה נשלחה בנפרד ויש לנתח כל אחת לחוד.
+קטגוריות זמינות: {', '.join(categories)}
+
+הודעות לניתוח:
+{chr(10).join(lines)}
+
+החזר JSON: {{"results": [...]}} עם אובייקט אחד לכל הודעה, כולל "index" של ההודעה, ובנוסף:
+message_type (budget_entry|question|budget_setup|other), confidence (0.0-1.0),
+expenses: רשימה עם הוצאה לכל פריט עם מחיר משלו, כל אחת {{"קטגוריה", "פירוט", "מחיר" (מספר), "תאריך" (YYYY-MM-DD, היום אם לא צוין)}},
+quick_answer, suggested_action, reasoning.
+
+**כללי סיווג:**
+- budget_entry: הוצאה או רכישה (קניתי, שילמתי, הוצאה)
+- question: שאלה על תקציב (כמה נשאר, מה הוצאתי)
+- budget_setup: יצירת תקציב חדש
+- other: שלום, תודה, מזג אוויר
+
+החזר רק JSON תקני, ללא הסברים נוספים.
+"""
+        try:
+            raw = self.call_tiered("extraction", " ".join(text for text, _, _ in items),
+                                   [{"role": "user", "content": group_prompt}], temp=0.1,
+                                   max_t=300 * len(items), response_format=multi_batch_response_schema(categories))
+            results = validate_multi_batch_result(extract_json(raw), len(items), categories)
+        except ResponseValidationError as e:
+            print(f"Batched extraction reply unusable: {e}")
+            return [None] * len(items)
         
+        for result in results:
+            if result is not None:
+                result["processing_time"] = time.time()
+                result["batch_processed"] = True
+                result["micro_batch_size"] = len(items)
+        return results
+    
+    def _analyze_message(self, text: str, categories: List[str], category_hint: Optional[str] = None) -> Dict:
+        """Single-message analysis call used by process_message_batch."""
+
+        hint_line = ""
+        if category_hint:
+            hint_line = f"\nמהיסטוריית ההוצאות: פריטים דומים סווגו בעבר כ-\"{category_hint}\" - העדף קטגוריה זו אם היא מתאימה."
+
         batch_prompt = f"""
 אתה עוזר תקציב חכם שמנתח הודעות בעברית. 
 הודעה לניתוח: "{text}"
-קטגוריות זמינות: {', '.join(categories)}
+קטגוריות זמינות: {', '.join(categories)}{hint_line}
 
 בצע ניתוח מלא והחזר JSON עם המבנה הבא:
 
 {{
     "message_type": "budget_entry|question|budget_setup|other",
     "confidence": 0.0-1.0,
-    "expense_data": {{
-        "קטגוריה": "...",
-        "פירוט": "...", 
-        "מחיר": מספר,
-        "תאריך": "YYYY-MM-DD"
-    }},
+    "expenses": [
+        {{
+            "קטגוריה": "...",
+            "פירוט": "...", 
+            "מחיר": מספר,
+            "תאריך": "YYYY-MM-DD"
+        }}
+    ],
     "quick_answer": "תשובה מהירה אם זו שאלה פשוטה",
     "suggested_action": "פעולה מומלצת",
     "reasoning": "הסבר קצר למה בחרת את הסיווג הזה"
@@ -163,6 +415,7 @@ class OptimizedGPT_API:
 - other: שלום, תודה, מזג אוויר
 
 **כללי פירוט הוצאות:**
+- הוצאה אחת לכל פריט עם מחיר משלו ("קפה 12, לחם 8" = שתי הוצאות)
 - השתמש בקטגוריה הכי מתאימה מהרשימה
 - פירוט צריך להיות טבעי קצר
 - תאריך - היום אם לא צוין אחרת
@@ -172,8 +425,9 @@ class OptimizedGPT_API:
 """
 
         try:
-            result = self._call_chat([{"role": "user", "content": batch_prompt}], temp=0.1)
-            parsed = json.loads(result)
+            result = self.call_tiered("extraction", text, [{"role": "user", "content": batch_prompt}], temp=0.1,
+                                      response_format=batch_response_schema(categories))
+            parsed = validate_batch_result(extract_json(result), categories)
             
             # Add processing metadata
             parsed["processing_time"] = time.time()
@@ -181,7 +435,7 @@ class OptimizedGPT_API:
             
             return parsed
         
-        except json.JSONDecodeError as e:
+        except ResponseValidationError as e:
             # Fallback if JSON parsing fails
             return {
                 "message_type": "error",
@@ -196,20 +450,39 @@ class OptimizedGPT_API:
     
     def get_cache_stats(self) -> Dict[str, Union[int, float]]:
         """Get cache performance statistics."""
-        total_requests = self._cache_stats["hits"] + self._cache_stats["misses"]
-        hit_rate = self._cache_stats["hits"] / total_requests if total_requests > 0 else 0.0
+        question_stats = self._question_cache.stats()
         
         return {
-            "cache_hits": self._cache_stats["hits"],
-            "cache_misses": self._cache_stats["misses"], 
-            "hit_rate": hit_rate,
-            "cache_size": len(self._question_cache)
+            "cache_hits": question_stats["hits"],
+            "cache_misses": question_stats["misses"], 
+            "hit_rate": question_stats["hit_rate"],
+            "cache_size": question_stats["size"],
+            "cache_bytes": question_stats["bytes"],
+            "cache_evictions": question_stats["evictions"],
+            "cache_expirations": question_stats["expirations"],
+            "response_cache": self._response_cache.stats(),
+            "persistent_cache": question_stats.get("l2", "disabled")
         }
     
     def clear_cache(self):
         """Clear all cached responses."""
         self._question_cache.clear()
-        self._cache_stats = {"hits": 0, "misses": 0}
+        self._response_cache.clear()
+    
+    def get_tier_stats(self) -> Dict[str, Dict]:
+        """Per-tier call counts, latency percentiles (ms) and estimated cost."""
+        stats = {}
+        with self._tier_lock:
+            for name, tier in self._tier_stats.items():
+                latencies = sorted(tier["latencies"])
+                stats[name] = {
+                    "model": self.model_tiers[name]["model"] or self.model,
+                    **{k: v for k, v in tier.items() if k != "latencies"},
+                    "cost_usd": round(tier["cost_usd"], 6),
+                    "p50_ms": round(latencies[len(latencies) // 2] * 1000) if latencies else None,
+                    "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000) if latencies else None
+                }
+        return stats
 
     # ------------------------------------------------------------------
     # 4) Backward Compatibility Methods (for existing code)
@@ -221,10 +494,19 @@ class OptimizedGPT_API:
         msg_type = result.get("message_type", "error")
         return cast(MessageType, msg_type) if msg_type in {"budget_entry", "question", "budget_setup", "error"} else "error"
     
-    def infer_budget_entry(self, text: str, categories: List[str]) -> JsonDict:
-        """Backward compatible expense parsing (uses batch processing internally)."""
+    def infer_budget_entries(self, text: str, categories: List[str]) -> List[JsonDict]:
+        """Every expense in the message ("קפה 12, לחם 8" → two), via batch processing."""
         result = self.process_message_batch(text, categories)
-        return result.get("expense_data", {})
+        return list(result.get("expenses", []))
+    
+    def infer_budget_entry(self, text: str, categories: List[str]) -> JsonDict:
+        """
+        Backward compatible single-expense parsing (same interface as GPT_API).
+        Returns only the first expense; use infer_budget_entries for messages
+        that may hold several.
+        """
+        entries = self.infer_budget_entries(text, categories)
+        return entries[0] if entries else {}
     
     def answer_question(self, question: str, summary_rows: List[JsonDict], tx_rows: List[JsonDict]) -> str:
         """Backward compatible question answering (uses caching internally)."""
@@ -253,7 +535,7 @@ class OptimizedGPT_API:
             "• זהה מספרים וקטגוריות גם אם הם מפוזרים\n"
             "• עבור קטגוריות דומות, בחר את השם הכי פשוט\n\n"
             "**פורמט תשובה:**\n"
-            "JSON array עם אובייקטים: [{\"קטגוריה\": \"שם\", \"תקציב\": מספר}, ...]\n"
+            "JSON עם מערך categories: {\"categories\": [{\"קטגוריה\": \"שם\", \"תקציב\": מספר}, ...]}\n"
             "החזר רק JSON, ללא הסברים."
         )
         
@@ -261,11 +543,15 @@ class OptimizedGPT_API:
             {"role": "system", "content": system},
             {"role": "user", "content": text}
         ]
-        raw = self._call_chat(messages)
-        return json.loads(raw)
+        raw = self.call_tiered("categories", text, messages, response_format=BUDGET_CATEGORIES_SCHEMA)
+        return validate_budget_categories(extract_json(raw))
 
     def suggest_next_month(self, current_month: str) -> str:
-        """Suggest next month name based on current month (unchanged)."""
+        """Suggest next month name based on current month (local calendar first, GPT for unknown names)."""
+        local_suggestion = next_month_name(current_month)
+        if local_suggestion:
+            return local_suggestion
+        
         system = (
             "אתה עוזר שמציע שם לחודש הבא בעברית.\n"
             "קבל שם חודש נוכחי והחזר שם החודש הבא.\n"
@@ -280,10 +566,14 @@ class OptimizedGPT_API:
             {"role": "system", "content": system},
             {"role": "user", "content": f"החודש הנוכחי: {current_month}"}
         ]
-        return self._call_chat(messages, temp=0).strip()
+        return self.call_tiered("short", current_month, messages, temp=0).strip()
 
     def parse_confirmation(self, text: str) -> bool:
-        """Parse user confirmation from natural Hebrew speech (unchanged)."""
+        """Parse user confirmation from natural Hebrew speech (local lexicon first, GPT when unsure)."""
+        local_answer = classify_confirmation(text)
+        if local_answer != "unsure":
+            return local_answer == "yes"
+        
         system = (
             "אתה עוזר שמזהה אישור או דחייה בדיבור טבעי בעברית.\n\n"
             "**מה אתה צריך לזהות:**\n"
@@ -314,14 +604,98 @@ class OptimizedGPT_API:
             {"role": "system", "content": system},
             {"role": "user", "content": text}
         ]
-        result = self._call_chat(messages, temp=0).strip().lower()
+        result = self.call_tiered("short", text, messages, temp=0).strip().lower()
         return result == "yes"
 
+    # ------------------------------------------------------------------
+    # Tier routing with fallback
+    # ------------------------------------------------------------------
+    def call_tiered(self, call_type: CallType, text: str, messages: List[Dict[str, str]], temp: float = 0.0,
+                    max_t: int = 512, response_format: Optional[Dict] = None) -> str:
+        """
+        Call the tier route_tier() picks for this input. If that tier errors or
+        exceeds its timeout, retry on its fallback tier. The whole chain shares
+        one deadline (tier_deadline). It raises CircuitOpenError as soon as the
+        breaker opens, and ProviderUnavailableError (a CircuitOpenError) when the
+        provider failed every attempt, so the caller can switch to its limited mode.
+        """
+        deadline = time.time() + self.tier_deadline
+        tier: Optional[str] = route_tier(call_type, text)
+        while tier:
+            settings = self.model_tiers[tier]
+            remaining = deadline - time.time()
+            start_time = time.time()
+            try:
+                result = self._call_chat(messages, temp, max_t, response_format=response_format,
+                                         model=settings["model"], timeout=min(settings["timeout"], remaining),
+                                         slow_after=settings.get("slow_after"))
+                self._record_tier_call(tier, time.time() - start_time)
+                return result
+            except CircuitOpenError:
+                raise  # Every tier uses the same provider
+            except Exception as e:
+                self._record_tier_call(tier, time.time() - start_time, error=True)
+                if self.breaker.is_open:
+                    raise CircuitOpenError(f"GPT circuit opened during {call_type} call: {e}") from e
+                if not settings["fallback"] or deadline - time.time() < 1.0:
+                    if is_provider_failure(e):
+                        raise ProviderUnavailableError(f"GPT unavailable for {call_type} call: {e}") from e
+                    raise
+                print(f"GPT tier '{tier}' failed for {call_type} ({e}); falling back to '{settings['fallback']}'")
+                with self._tier_lock:
+                    self._tier_stats[tier]["fallbacks"] += 1
+                tier = settings["fallback"]
+        raise RuntimeError(f"No model tier available for {call_type}")
+
+    def _record_tier_call(self, tier: str, elapsed: float, error: bool = False) -> None:
+        with self._tier_lock:
+            stats = self._tier_stats[tier]
+            stats["calls"] += 1
+            if error:
+                stats["errors"] += 1
+            else:
+                stats["latencies"].append(elapsed)
+
+    def _record_usage(self, model: str, usage) -> None:
+        """Add token usage of one completion to the counters of the tier serving `model`."""
+        if usage is None:
+            return
+        tier = next((name for name, settings in self.model_tiers.items()
+                     if (settings["model"] or self.model) == model), None)
+        if tier is None:
+            return
+        input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+        with self._tier_lock:
+            stats = self._tier_stats[tier]
+            stats["prompt_tokens"] += usage.prompt_tokens or 0
+            stats["completion_tokens"] += usage.completion_tokens or 0
+            stats["cost_usd"] += ((usage.prompt_tokens or 0) * input_price +
+                                  (usage.completion_tokens or 0) * output_price) / 1_000_000
+
     # ------------------------------------------------------------------
     # Internal helper to call the API once
     # ------------------------------------------------------------------
-    def _call_chat(self, messages: List[Dict[str, str]], temp: float = 0.0, max_t: int = 512) -> str:
-        """Internal helper to call OpenAI API."""
+    def _call_chat(self, messages: List[Dict[str, str]], temp: float = 0.0, max_t: int = 512,
+                   use_cache: bool = True, response_format: Optional[Dict] = None,
+                   model: Optional[str] = None, timeout: Optional[float] = None,
+                   slow_after: Optional[float] = None) -> str:
+        """
+        Internal helper to call OpenAI API. Deterministic (temp 0) calls are cached.
+        `response_format` requests JSON / structured output (see response_validation).
+        `model` and `timeout` override the client defaults (used by call_tiered);
+        `slow_after` is the tier's slow-call threshold for the circuit breaker.
+        """
+        model = model or self.model
+        if use_cache and temp == 0:
+            cache_key = hashlib.md5(
+                json.dumps([model, messages, max_t, response_format], ensure_ascii=False).encode()
+            ).hexdigest()
+            return self._response_cache.get_or_compute(
+                cache_key, lambda: self._call_chat(messages, temp, max_t, use_cache=False,
+                                                   response_format=response_format, model=model, timeout=timeout,
+                                                   slow_after=slow_after)
+            )
+        
         formatted_messages = []
         for msg in messages:
             formatted_msg = {
@@ -330,12 +704,50 @@ class OptimizedGPT_API:
             }
             formatted_messages.append(formatted_msg)
 
+        self.breaker.before_call()
+        start_time = time.time()
+        try:
+            result = self._create_completion(formatted_messages, temp, max_t, response_format, model, timeout)
+        except Exception as e:
+            if is_provider_failure(e):
+                self.breaker.record_failure(time.time() - start_time)
+            else:
+                # The provider answered (400, auth, schema...): not an outage
+                self.breaker.record_success(time.time() - start_time, slow_after)
+            raise
+        self.breaker.record_success(time.time() - start_time, slow_after)
+        return result
+
+    def probe_provider(self) -> Dict[str, str]:
+        """
+        Health check: the same tiny fast-tier completion as the breaker probe.
+        It bypasses the breaker, so it reports the provider itself and never
+        counts toward opening the circuit. Raises when the provider fails.
+        """
+        self._breaker_probe()
+        return {"circuit": self.breaker.state}
+
+    def _breaker_probe(self) -> None:
+        """Half-open probe: one tiny completion on the fast tier, outside the breaker."""
+        self._create_completion([{"role": "user", "content": "ping"}], 0.0, 1,
+                                model=self.model_tiers["fast"]["model"], timeout=self.model_tiers["fast"]["timeout"])
+
+    def _create_completion(self, formatted_messages: List[Dict[str, str]], temp: float, max_t: int,
+                           response_format: Optional[Dict] = None, model: Optional[str] = None,
+                           timeout: Optional[float] = None) -> str:
+        """Single blocking chat completion request."""
+        model = model or self.model
+        extra: Dict = {"response_format": response_format} if response_format else {}
+        if timeout:
+            extra["timeout"] = timeout
         response = self.client.chat.completions.create(
-            model=self.model,
+            model=model,
             messages=formatted_messages,
             temperature=temp,
-            max_tokens=max_t
+            max_tokens=max_t,
+            **extra
         )
+        self._record_usage(model, response.usage)
         content = response.choices[0].message.content
         if content is None:
             return ""
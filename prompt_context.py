@@ -0,0 +1,124 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Union
+
+# ---------------------------------------------------------------------------
+# Compact budget digest for question-answering prompts
+# ---------------------------------------------------------------------------
+# Instead of pretty-printed JSON of a few raw rows, GPT gets a terse digest
+# computed from all the rows: per-category budget/spent/remaining, totals,
+# weekly spending, the largest items and the latest expenses. Sections are
+# added in priority order until the character budget is used up.
+# ---------------------------------------------------------------------------
+
+JsonDict = Dict[str, Union[str, int, float]]
+
+DEFAULT_MAX_CHARS = 1800  # Roughly 600-900 tokens of Hebrew text
+WEEKS_SHOWN = 4
+TOP_ITEMS = 5
+RECENT_ITEMS = 5
+
+_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d.%m.%Y", "%d/%m/%y", "%Y/%m/%d")
+
+
+def _to_number(value) -> float:
+    try:
+        return float(str(value).replace(",", "").replace("₪", "").strip() or 0)
+    except ValueError:
+        return 0.0
+
+
+def _fmt(amount: float) -> str:
+    """Amount without a trailing .0 ("450", "39.9")."""
+    amount = round(amount, 2)
+    return str(int(amount)) if amount == int(amount) else f"{amount:g}"
+
+
+def _parse_date(value) -> Optional[date]:
+    text = str(value).strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _category_lines(summary_rows: List[JsonDict], spent_from_tx: Dict[str, float]) -> List[str]:
+    lines = ["קטגוריות (תקציב/יצא/נשאר):"]
+    totals = [0.0, 0.0, 0.0]
+    for row in summary_rows:
+        category = str(row.get("קטגוריה", "")).strip()
+        if not category:
+            continue
+        budget = _to_number(row.get("תקציב", 0))
+        # Prefer the sheet's own figures; fall back to the transactions
+        spent = _to_number(row["כמה יצא"]) if row.get("כמה יצא") not in (None, "") else spent_from_tx.get(category, 0.0)
+        remaining = _to_number(row["כמה נשאר"]) if row.get("כמה נשאר") not in (None, "") else budget - spent
+        flag = " !חריגה" if remaining < 0 else ""
+        lines.append(f"{category} {_fmt(budget)}/{_fmt(spent)}/{_fmt(remaining)}{flag}")
+        totals = [totals[0] + budget, totals[1] + spent, totals[2] + remaining]
+
+    if len(lines) == 1:
+        return []
+    lines.append(f"סה\"כ {'/'.join(_fmt(t) for t in totals)}")
+    return lines
+
+
+def _weekly_lines(dated: List[tuple], today: date) -> List[str]:
+    week_start = today - timedelta(days=(today.weekday() + 1) % 7)  # Weeks start on Sunday
+    totals: Dict[date, float] = defaultdict(float)
+    for tx_date, price, _, _ in dated:
+        start = tx_date - timedelta(days=(tx_date.weekday() + 1) % 7)
+        totals[start] += price
+
+    lines = []
+    for i in range(WEEKS_SHOWN):
+        start = week_start - timedelta(weeks=i)
+        if start in totals or i == 0:
+            label = "השבוע" if i == 0 else start.strftime("%d/%m")
+            lines.append(f"{label} {_fmt(totals.get(start, 0.0))}")
+    return ["לפי שבוע (יצא, מתחילת שבוע):"] + lines if lines else []
+
+
+def _item(tx: JsonDict, price: float) -> str:
+    tx_date = _parse_date(tx.get("תאריך", ""))
+    when = tx_date.strftime("%d/%m") if tx_date else str(tx.get("תאריך", "")).strip()
+    return f"{str(tx.get('פירוט', '')).strip() or '-'} {_fmt(price)} {str(tx.get('קטגוריה', '')).strip()} {when}".strip()
+
+
+def build_prompt_context(summary_rows: List[JsonDict], tx_rows: List[JsonDict],
+                         today: Optional[date] = None, max_chars: int = DEFAULT_MAX_CHARS) -> str:
+    """Terse multi-line digest of the budget data, at most `max_chars` characters."""
+    today = today or date.today()
+
+    priced = [(tx, _to_number(tx.get("מחיר", 0))) for tx in tx_rows]
+    priced = [(tx, price) for tx, price in priced if price]
+
+    spent_from_tx: Dict[str, float] = defaultdict(float)
+    dated = []
+    for tx, price in priced:
+        category = str(tx.get("קטגוריה", "")).strip()
+        spent_from_tx[category] += price
+        tx_date = _parse_date(tx.get("תאריך", ""))
+        if tx_date:
+            dated.append((tx_date, price, category, tx))
+
+    sections = [
+        [f"היום {today.isoformat()}"],
+        _category_lines(summary_rows, spent_from_tx),
+        _weekly_lines(dated, today) if dated else [],
+        ["הגדולות:"] + [_item(tx, price) for tx, price in sorted(priced, key=lambda p: -p[1])[:TOP_ITEMS]] if priced else [],
+        ["אחרונות:"] + [_item(tx, price) for tx, price in priced[-RECENT_ITEMS:][::-1]] if priced else [],
+    ]
+
+    # Add whole lines in priority order while they fit the budget
+    lines: List[str] = []
+    used = 0
+    for section in sections:
+        for line in section:
+            if used + len(line) + 1 > max_chars:
+                return "\n".join(lines)
+            lines.append(line)
+            used += len(line) + 1
+    return "\n".join(lines)
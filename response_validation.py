@@ -0,0 +1,320 @@
+import re
+import json
+import difflib
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Union
+
+from hebrew_text import normalize_text, strip_prefix
+
+# ---------------------------------------------------------------------------
+# JSON schemas for structured GPT output, plus local validation and repair
+# ---------------------------------------------------------------------------
+# The schemas are sent as response_format so the model returns well-formed
+# JSON. The validators still run on every reply: they strip code fences and
+# comments, coerce prices and dates, and snap categories to the sheet's
+# category list, so a slightly malformed reply never forces the user to resend.
+# ---------------------------------------------------------------------------
+
+JsonDict = Dict[str, Union[str, int, float]]
+
+MESSAGE_TYPES = ("budget_entry", "question", "budget_setup", "other")
+CATEGORY_SNAP_CUTOFF = 0.6
+
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+_LINE_COMMENT_RE = re.compile(r"^\s*//.*$|(?<=[,\[{])\s*//[^\n]*", re.MULTILINE)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_NUMBER_RE = re.compile(r"-?\d{1,3}(?:,\d{3})+(?:\.\d+)?|-?\d+(?:\.\d+)?")
+_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y", "%d.%m.%Y", "%d-%m-%Y", "%d/%m/%y", "%d.%m.%y")
+_DAY_MONTH_RE = re.compile(r"^(\d{1,2})[./](\d{1,2})$")
+_RELATIVE_DAYS = {"היום": 0, "today": 0, "אתמול": 1, "yesterday": 1, "שלשום": 2}
+
+
+class ResponseValidationError(ValueError):
+    """The model reply could not be repaired into the expected structure."""
+
+
+def batch_response_schema(categories: List[str]) -> Dict[str, Any]:
+    """
+    response_format for process_message_batch; categories are an enum when known.
+    A message can hold several expenses ("קפה 12, לחם 8"), so they come as a list.
+    """
+    category_schema: Dict[str, Any] = {"type": "string"}
+    if categories:
+        category_schema["enum"] = list(categories)
+
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "message_analysis",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "message_type": {"type": "string", "enum": list(MESSAGE_TYPES)},
+                    "confidence": {"type": "number"},
+                    "expenses": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "קטגוריה": category_schema,
+                                "פירוט": {"type": "string"},
+                                "מחיר": {"type": "number"},
+                                "תאריך": {"type": "string"}
+                            },
+                            "required": ["קטגוריה", "פירוט", "מחיר", "תאריך"],
+                            "additionalProperties": False
+                        }
+                    },
+                    "quick_answer": {"type": "string"},
+                    "suggested_action": {"type": "string"},
+                    "reasoning": {"type": "string"}
+                },
+                "required": ["message_type", "confidence", "expenses", "quick_answer",
+                             "suggested_action", "reasoning"],
+                "additionalProperties": False
+            }
+        }
+    }
+
+
+def multi_batch_response_schema(categories: List[str]) -> Dict[str, Any]:
+    """response_format for several messages analysed in one call (indexed results)."""
+    item_schema = dict(batch_response_schema(categories)["json_schema"]["schema"])
+    item_schema["properties"] = {"index": {"type": "integer"}, **item_schema["properties"]}
+    item_schema["required"] = ["index"] + item_schema["required"]
+
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "message_analysis_batch",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {"results": {"type": "array", "items": item_schema}},
+                "required": ["results"],
+                "additionalProperties": False
+            }
+        }
+    }
+
+
+# Structured output needs an object at the top level, so the list is wrapped
+BUDGET_CATEGORIES_SCHEMA: Dict[str, Any] = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "budget_categories",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "categories": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"קטגוריה": {"type": "string"}, "תקציב": {"type": "number"}},
+                        "required": ["קטגוריה", "תקציב"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["categories"],
+            "additionalProperties": False
+        }
+    }
+}
+
+
+# ------------------------------------------------------------------
+# 1) Raw text → JSON
+# ------------------------------------------------------------------
+
+def extract_json(raw: str) -> Any:
+    """Parse model output, tolerating code fences, comments, prose and trailing commas."""
+    text = _FENCE_RE.sub("", raw.strip())
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    # Keep the outermost {...} or [...] and clean it up
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        raise ResponseValidationError(f"No JSON found in model reply: {raw[:80]!r}")
+    start = min(starts)
+    end = text.rfind("}" if text[start] == "{" else "]")
+    if end <= start:
+        raise ResponseValidationError(f"Unterminated JSON in model reply: {raw[:80]!r}")
+
+    candidate = _LINE_COMMENT_RE.sub("", text[start:end + 1])
+    candidate = _TRAILING_COMMA_RE.sub(r"\1", candidate)
+    try:
+        return json.loads(candidate)
+    except ValueError as e:
+        raise ResponseValidationError(f"Malformed JSON in model reply: {e}")
+
+
+# ------------------------------------------------------------------
+# 2) Field coercion
+# ------------------------------------------------------------------
+
+def coerce_price(value: Any) -> Optional[Union[int, float]]:
+    """Number from 39.9, "39.9₪", "1,200 ש\"ח"; None when there is no positive amount."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        price = float(value)
+    else:
+        match = _NUMBER_RE.search(str(value))
+        if not match:
+            return None
+        price = float(match.group(0).replace(",", ""))
+    if price <= 0:
+        return None
+    return int(price) if price.is_integer() else round(price, 2)
+
+
+def coerce_date(value: Any, today: Optional[date] = None) -> str:
+    """ISO date from common formats and relative words; today when missing or unreadable."""
+    today = today or date.today()
+    text = str(value or "").strip()
+
+    if text.lower() in _RELATIVE_DAYS:
+        return (today - timedelta(days=_RELATIVE_DAYS[text.lower()])).isoformat()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+
+    day_month = _DAY_MONTH_RE.match(text)
+    if day_month:
+        try:
+            parsed = date(today.year, int(day_month.group(2)), int(day_month.group(1)))
+            if parsed > today:  # "28/12" in January means last year
+                parsed = parsed.replace(year=today.year - 1)
+            return parsed.isoformat()
+        except ValueError:
+            pass
+    return today.isoformat()
+
+
+def snap_category(value: Any, categories: List[str], cutoff: float = CATEGORY_SNAP_CUTOFF) -> Optional[str]:
+    """The sheet category closest to `value`, or None when nothing is close enough."""
+    name = str(value or "").strip()
+    if not name or not categories:
+        return name or None
+    if name in categories:
+        return name
+
+    known = {t for category in categories for t in normalize_text(category).split()}
+
+    def key(text: str) -> str:
+        return " ".join(strip_prefix(t, known) for t in normalize_text(text).split())
+
+    by_key = {key(category): category for category in categories}
+    wanted = key(name)
+    if wanted in by_key:
+        return by_key[wanted]
+    close = difflib.get_close_matches(wanted, list(by_key), n=1, cutoff=cutoff)
+    return by_key[close[0]] if close else None
+
+
+# ------------------------------------------------------------------
+# 3) Whole-reply validators
+# ------------------------------------------------------------------
+
+def validate_batch_result(data: Any, categories: List[str], today: Optional[date] = None) -> Dict[str, Any]:
+    """Repair a process_message_batch reply; raises ResponseValidationError if hopeless."""
+    if not isinstance(data, dict):
+        raise ResponseValidationError(f"Expected a JSON object, got {type(data).__name__}")
+
+    message_type = str(data.get("message_type", "")).strip().lower()
+    if message_type not in MESSAGE_TYPES:
+        raise ResponseValidationError(f"Unknown message_type: {message_type!r}")
+
+    try:
+        confidence = min(max(float(data.get("confidence", 0.0)), 0.0), 1.0)
+    except (TypeError, ValueError):
+        confidence = 0.0
+
+    result = dict(data)
+    result["message_type"] = message_type
+    result["confidence"] = confidence
+
+    # "expenses" is the list; older replies carry a single "expense_data"
+    raw_expenses = data.get("expenses")
+    if not isinstance(raw_expenses, list):
+        raw_expenses = [data["expense_data"]] if isinstance(data.get("expense_data"), dict) else []
+
+    expenses, rejected = [], []
+    if message_type == "budget_entry":
+        if not raw_expenses:
+            raise ResponseValidationError("budget_entry reply without expenses")
+        for expense in raw_expenses:
+            if not isinstance(expense, dict):
+                continue
+            cleaned = {
+                "קטגוריה": snap_category(expense.get("קטגוריה"), categories) or "",
+                "פירוט": str(expense.get("פירוט", "")).strip(),
+                "מחיר": coerce_price(expense.get("מחיר")),
+                "תאריך": coerce_date(expense.get("תאריך"), today)
+            }
+            # Unusable items are kept aside so the reply can name them
+            if cleaned["מחיר"] is None:
+                rejected.append({**cleaned, "reason": "missing_price"})
+            elif not cleaned["קטגוריה"]:
+                rejected.append({**cleaned, "קטגוריה": str(expense.get("קטגוריה") or "").strip(),
+                                 "reason": "unknown_category"})
+            else:
+                expenses.append(cleaned)
+
+    result["expenses"] = expenses
+    result["rejected"] = rejected
+    # First expense, for callers that handle a single one
+    result["expense_data"] = expenses[0] if expenses else {}
+    return result
+
+
+def validate_multi_batch_result(data: Any, count: int, categories: List[str],
+                                today: Optional[date] = None) -> List[Optional[Dict[str, Any]]]:
+    """
+    Split an indexed multi-message reply into one validated result per message.
+    Missing or unrepairable items are None, so the caller can retry just those.
+    """
+    items = data.get("results", []) if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ResponseValidationError(f"Expected a list of results, got {type(items).__name__}")
+
+    results: List[Optional[Dict[str, Any]]] = [None] * count
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get("index", position))
+        except (TypeError, ValueError):
+            continue
+        if 0 <= index < count and results[index] is None:
+            try:
+                results[index] = validate_batch_result(item, categories, today)
+            except ResponseValidationError:
+                pass
+    return results
+
+
+def validate_budget_categories(data: Any) -> List[Dict[str, Union[str, float]]]:
+    """Repair a parse_budget_categories reply into [{"קטגוריה", "תקציב"}, ...]."""
+    if isinstance(data, dict):
+        data = data.get("categories", [])
+    if not isinstance(data, list):
+        raise ResponseValidationError(f"Expected a list of categories, got {type(data).__name__}")
+
+    categories = []
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        name = str(item.get("קטגוריה", "")).strip()
+        amount = coerce_price(item.get("תקציב"))
+        if name and amount is not None:
+            categories.append({"קטגוריה": name, "תקציב": float(amount)})
+    return categories
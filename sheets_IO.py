@@ -3,8 +3,13 @@ from googleapiclient.discovery import build
 import json
 import os
 import time
+import uuid
+import threading
 from google.oauth2 import service_account
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
+
+# State store key holding the current data version, shared by all workers
+DATA_VERSION_KEY = "sheets_data_version"
 
 class SheetsIO:
     """
@@ -53,12 +58,50 @@ class SheetsIO:
         
         self.budget_spreadsheet_id = budget_spreadsheet_id
         self.tracker_spreadsheet_id = tracker_spreadsheet_id
-        self.service = build("sheets", "v4", credentials=creds)
+        self._creds = creds
+        self._local = threading.local()
+        self._version_lock = threading.Lock()
         
         # Cache for working sheet name to reduce API calls
         self._working_sheet_cache = None
         self._cache_timestamp = 0
         self._cache_ttl = 300  # 5 minutes cache
+        
+        # Changed on every write so derived caches know when data changed. With a
+        # shared state store (version_store) every worker sees every worker's writes.
+        self.version_store: Optional[Any] = None
+        self._data_version = 0
+
+    @property
+    def service(self):
+        """Sheets API client for the calling thread (its HTTP connection is not thread-safe)."""
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = self._local.service = build("sheets", "v4", credentials=self._creds)
+        return service
+
+    @property
+    def data_version(self) -> Optional[Union[int, str]]:
+        """Current data version; None if the shared version cannot be read."""
+        if self.version_store is None:
+            return self._data_version
+        try:
+            # Versions are random tokens, so a reset store never repeats an old one
+            self.version_store.add(DATA_VERSION_KEY, uuid.uuid4().hex)
+            return self.version_store.get(DATA_VERSION_KEY)
+        except Exception as e:
+            print(f"Could not read the shared data version: {e}")
+            return None
+
+    def _bump_data_version(self) -> None:
+        """Mark budget/tracker data as changed."""
+        with self._version_lock:
+            self._data_version += 1
+        if self.version_store is not None:
+            try:
+                self.version_store.set(DATA_VERSION_KEY, uuid.uuid4().hex)
+            except Exception as e:
+                print(f"Could not publish the data version: {e}")
 
     def _execute_with_retry(self, api_call, max_retries=3, delay=1):
         """Execute API call with retry logic for network resilience."""
@@ -145,6 +188,7 @@ class SheetsIO:
                     )
                 )
             
+            self._bump_data_version()
             print(f"Set config value: {key} = {value}")
             
         except Exception as e:
@@ -174,6 +218,13 @@ class SheetsIO:
             # If no cache, raise the error
             raise e
 
+    def ping(self) -> None:
+        """One-cell read of the budget sheet for health checks; API and credential errors propagate."""
+        self.service.spreadsheets().values().get(
+            spreadsheetId=self.budget_spreadsheet_id,
+            range="A1:A1"
+        ).execute()
+
     def get_budget_categories(self) -> List[str]:
         """Get all available categories from budget sheet."""
         try:
@@ -204,17 +255,13 @@ class SheetsIO:
 
     def add_expense_to_tracker(self, expense_data: Dict[str, Union[str, float]]) -> None:
         """Add expense to tracker sheet."""
+        self.add_expenses_to_tracker([expense_data])
+
+    def add_expenses_to_tracker(self, expenses: List[Dict[str, Union[str, float]]]) -> None:
+        """Add several expenses to the tracker sheet with one append call."""
         try:
             working_sheet = self.get_working_sheet_name()
             
-            # Map the expense data to match tracker columns
-            tracker_data = {
-                "קטגוריה": expense_data.get("קטגוריה", ""),
-                "פירוט": expense_data.get("פירוט", ""),
-                "מחיר": expense_data.get("מחיר", 0),
-                "תאריך": expense_data.get("תאריך", "")
-            }
-            
             # Get headers from tracker sheet
             header_range = f"{working_sheet}!A1:Z1"
             header_resp = self._execute_with_retry(
@@ -225,10 +272,18 @@ class SheetsIO:
             )
             headers = header_resp.get("values", [[]])[0] if header_resp else []
             
-            # Build row in correct order
-            row = [tracker_data.get(h, "") for h in headers]
+            # Map the expense data to match tracker columns, in header order
+            rows = []
+            for expense_data in expenses:
+                tracker_data = {
+                    "קטגוריה": expense_data.get("קטגוריה", ""),
+                    "פירוט": expense_data.get("פירוט", ""),
+                    "מחיר": expense_data.get("מחיר", 0),
+                    "תאריך": expense_data.get("תאריך", "")
+                }
+                rows.append([tracker_data.get(h, "") for h in headers])
             
-            # Append to tracker sheet
+            # Append all rows to tracker sheet
             append_range = f"{working_sheet}!A:Z"
             self._execute_with_retry(
                 self.service.spreadsheets().values().append(
@@ -236,87 +291,103 @@ class SheetsIO:
                     range=append_range,
                     valueInputOption="RAW",
                     insertDataOption="INSERT_ROWS",
-                    body={"values": [row]}
+                    body={"values": rows}
                 )
             )
             
-            print(f"Added expense to tracker: {tracker_data}")
+            self._bump_data_version()
+            print(f"Added {len(rows)} expense(s) to tracker")
             
         except Exception as e:
-            print(f"Error adding expense to tracker: {e}")
+            print(f"Error adding expenses to tracker: {e}")
             raise
 
     def update_budget_sheet(self, category: str) -> bool:
         """Update budget sheet by recalculating expenses for a category. Returns success status."""
+        return category in self.update_budget_categories([category])
+
+    def update_budget_categories(self, categories: List[str]) -> Dict[str, Dict[str, float]]:
+        """
+        Recalculate spent/remaining for the given categories: one tracker read,
+        one budget read and one batchUpdate. Returns the new budget info per
+        updated category (same shape as get_category_budget_info).
+        """
         try:
             working_sheet = self.get_working_sheet_name()
+            wanted = set(categories)
+            
+            # Read tracker sheet ONCE and total the wanted categories
+            tracker_response = self._execute_with_retry(
+                self.service.spreadsheets().values().get(
+                    spreadsheetId=self.tracker_spreadsheet_id,
+                    range=f"{working_sheet}!A:Z"
+                )
+            )
+            tracker_data = tracker_response.get('values', []) if tracker_response else []
+            tracker_headers = tracker_data[0] if tracker_data else []
+            tracker_cat_col = tracker_headers.index("קטגוריה") if "קטגוריה" in tracker_headers else 0
+            tracker_price_col = tracker_headers.index("מחיר") if "מחיר" in tracker_headers else 2
             
-            # Get total spent for this category from tracker
-            total_spent = self._calculate_category_total(category)
+            totals = {category: 0.0 for category in wanted}
+            for row in tracker_data[1:]:
+                if len(row) > max(tracker_cat_col, tracker_price_col) and row[tracker_cat_col] in wanted:
+                    try:
+                        totals[row[tracker_cat_col]] += float(row[tracker_price_col]) if row[tracker_price_col] else 0
+                    except ValueError:
+                        continue
             
-            # Find the category row in budget sheet
-            budget_range = f"{working_sheet}!A:Z"
-            response = self._execute_with_retry(
+            # Read budget sheet ONCE
+            budget_response = self._execute_with_retry(
                 self.service.spreadsheets().values().get(
                     spreadsheetId=self.budget_spreadsheet_id,
-                    range=budget_range
+                    range=f"{working_sheet}!A:Z"
                 )
             )
-            
-            values = response.get('values', []) if response else []
+            values = budget_response.get('values', []) if budget_response else []
             if not values:
-                return False
+                return {}
             
             headers = values[0]
-            data_rows = values[1:]
-            
-            # Find column indices
             category_col = headers.index("קטגוריה") if "קטגוריה" in headers else 0
             budget_col = headers.index("תקציב") if "תקציב" in headers else 1
             spent_col = headers.index("כמה יצא") if "כמה יצא" in headers else 2
             remaining_col = headers.index("כמה נשאר") if "כמה נשאר" in headers else 3
             
-            # Find category row
-            for row_idx, row in enumerate(data_rows):
-                if len(row) > category_col and row[category_col] == category:
-                    # Get budget amount
-                    budget_amount = float(row[budget_col]) if len(row) > budget_col and row[budget_col] else 0
-                    remaining_amount = budget_amount - total_spent
-                    
-                    # Update the budget sheet
-                    sheet_row = row_idx + 2  # +1 for header, +1 for 0-based index
-                    
-                    # Update spent amount
-                    spent_range = f"{working_sheet}!{chr(65 + spent_col)}{sheet_row}"
-                    self._execute_with_retry(
-                        self.service.spreadsheets().values().update(
-                            spreadsheetId=self.budget_spreadsheet_id,
-                            range=spent_range,
-                            valueInputOption="RAW",
-                            body={"values": [[total_spent]]}
-                        )
-                    )
-                    
-                    # Update remaining amount
-                    remaining_range = f"{working_sheet}!{chr(65 + remaining_col)}{sheet_row}"
-                    self._execute_with_retry(
-                        self.service.spreadsheets().values().update(
-                            spreadsheetId=self.budget_spreadsheet_id,
-                            range=remaining_range,
-                            valueInputOption="RAW",
-                            body={"values": [[remaining_amount]]}
-                        )
+            batch_updates = []
+            updated = {}
+            for row_idx, row in enumerate(values[1:], start=2):  # Sheet rows are 1-based, after the header
+                if len(row) <= category_col or row[category_col] not in wanted or row[category_col] in updated:
+                    continue
+                category = row[category_col]
+                budget_amount = float(row[budget_col]) if len(row) > budget_col and row[budget_col] else 0
+                total_spent = totals[category]
+                remaining_amount = budget_amount - total_spent
+                
+                batch_updates.extend([
+                    {"range": f"{working_sheet}!{chr(65 + spent_col)}{row_idx}", "values": [[total_spent]]},
+                    {"range": f"{working_sheet}!{chr(65 + remaining_col)}{row_idx}", "values": [[remaining_amount]]}
+                ])
+                updated[category] = {"תקציב": budget_amount, "כמה יצא": total_spent, "כמה נשאר": remaining_amount}
+                print(f"Updated budget for {category}: spent={total_spent}, remaining={remaining_amount}")
+            
+            for category in wanted - set(updated):
+                print(f"Category '{category}' not found in budget sheet")
+            
+            # ONE write for all categories
+            if batch_updates:
+                self._execute_with_retry(
+                    self.service.spreadsheets().values().batchUpdate(
+                        spreadsheetId=self.budget_spreadsheet_id,
+                        body={"valueInputOption": "RAW", "data": batch_updates}
                     )
-                    
-                    print(f"Updated budget for {category}: spent={total_spent}, remaining={remaining_amount}")
-                    return True
+                )
+                self._bump_data_version()
             
-            print(f"Category '{category}' not found in budget sheet")
-            return False
+            return updated
             
         except Exception as e:
-            print(f"Error updating budget sheet for {category}: {e}")
-            return False
+            print(f"Error updating budget sheet for {', '.join(categories)}: {e}")
+            return {}
 
     def _calculate_category_total(self, category: str) -> float:
         """Calculate total spent for a category from tracker sheet."""
@@ -359,20 +430,13 @@ class SheetsIO:
             return 0.0
 
     def refresh_all_budgets(self) -> Dict:
-        """Refresh all budget categories with optimized batch operations."""
+        """
+        Recalculate spent/remaining for every category and write only the cells
+        whose value changed (adjacent changed cells are merged into one range).
+        Two reads and at most one batchUpdate; a refresh with no changes writes nothing.
+        """
         try:
             working_sheet = self.get_working_sheet_name()
-            categories = self.get_budget_categories()
-            
-            if not categories:
-                return {
-                    "success": False,
-                    "error": "לא נמצאו קטגוריות לעדכון",
-                    "updated_count": 0,
-                    "failed_categories": []
-                }
-            
-            print(f"🚀 Starting optimized batch refresh for {len(categories)} categories...")
             
             # API Call #1: Read tracker sheet ONCE
             print("📖 Reading tracker sheet (all data)...")
@@ -384,13 +448,14 @@ class SheetsIO:
                 )
             )
             
-            # API Call #2: Read budget sheet ONCE
+            # API Call #2: Read budget sheet ONCE (raw numbers, so current cells compare exactly)
             print("📊 Reading budget sheet (all data)...")
             budget_range = f"{working_sheet}!A:Z"
             budget_response = self._execute_with_retry(
                 self.service.spreadsheets().values().get(
                     spreadsheetId=self.budget_spreadsheet_id,
-                    range=budget_range
+                    range=budget_range,
+                    valueRenderOption="UNFORMATTED_VALUE"
                 )
             )
             
@@ -403,6 +468,7 @@ class SheetsIO:
                     "success": False,
                     "error": "לא נמצא מידע בגיליונות",
                     "updated_count": 0,
+                    "unchanged_count": 0,
                     "failed_categories": []
                 }
             
@@ -411,29 +477,21 @@ class SheetsIO:
             budget_headers = budget_data[0] if budget_data else []
             
             # Find column indices
-            try:
-                tracker_cat_col = tracker_headers.index("קטגוריה") if "קטגוריה" in tracker_headers else 0
-                tracker_price_col = tracker_headers.index("מחיר") if "מחיר" in tracker_headers else 2
-                
-                budget_cat_col = budget_headers.index("קטגוריה") if "קטגוריה" in budget_headers else 0
-                budget_amt_col = budget_headers.index("תקציב") if "תקציב" in budget_headers else 1
-                spent_col = budget_headers.index("כמה יצא") if "כמה יצא" in budget_headers else 2
-                remaining_col = budget_headers.index("כמה נשאר") if "כמה נשאר" in budget_headers else 3
-            except ValueError as e:
-                return {
-                    "success": False,
-                    "error": f"לא נמצאו עמודות נדרשות: {e}",
-                    "updated_count": 0,
-                    "failed_categories": []
-                }
+            tracker_cat_col = tracker_headers.index("קטגוריה") if "קטגוריה" in tracker_headers else 0
+            tracker_price_col = tracker_headers.index("מחיר") if "מחיר" in tracker_headers else 2
+            
+            budget_cat_col = budget_headers.index("קטגוריה") if "קטגוריה" in budget_headers else 0
+            budget_amt_col = budget_headers.index("תקציב") if "תקציב" in budget_headers else 1
+            spent_col = budget_headers.index("כמה יצא") if "כמה יצא" in budget_headers else 2
+            remaining_col = budget_headers.index("כמה נשאר") if "כמה נשאר" in budget_headers else 3
             
             # Calculate totals for all categories in memory (FAST!)
             print("🧠 Processing all categories in memory...")
             category_totals = {}
             for row in tracker_data[1:]:  # Skip header
                 if len(row) > max(tracker_cat_col, tracker_price_col):
-                    cat = row[tracker_cat_col] if tracker_cat_col < len(row) else ""
-                    price_str = row[tracker_price_col] if tracker_price_col < len(row) else "0"
+                    cat = row[tracker_cat_col]
+                    price_str = row[tracker_price_col]
                     
                     if cat and price_str:
                         try:
@@ -442,83 +500,76 @@ class SheetsIO:
                         except ValueError:
                             continue
             
-            # Prepare batch updates
-            print("📝 Preparing batch updates...")
-            batch_updates = []
-            updated_count = 0
+            # Compare against the current cells; categories come from the same budget read
+            changed_cells = {}  # (row, col) -> new value
+            changed_categories = []
+            unchanged_count = 0
             failed_categories = []
-            
-            budget_rows = budget_data[1:] if len(budget_data) > 1 else []
-            for row_idx, row in enumerate(budget_rows, start=2):  # Start from row 2 (1-based)
-                if len(row) > budget_cat_col:
-                    category = row[budget_cat_col]
-                    if category in categories:  # Only update categories we track
-                        try:
-                            spent = category_totals.get(category, 0)
-                            budget_amt = float(row[budget_amt_col]) if budget_amt_col < len(row) and row[budget_amt_col] else 0
-                            remaining = budget_amt - spent
-                            
-                            # Prepare update for this row (spent and remaining columns)
-                            spent_cell = f"{working_sheet}!{chr(65 + spent_col)}{row_idx}"
-                            remaining_cell = f"{working_sheet}!{chr(65 + remaining_col)}{row_idx}"
-                            
-                            batch_updates.extend([
-                                {
-                                    "range": spent_cell,
-                                    "values": [[spent]]
-                                },
-                                {
-                                    "range": remaining_cell,
-                                    "values": [[remaining]]
-                                }
-                            ])
-                            
-                            updated_count += 1
-                            print(f"   ⚡ Prepared update for {category}: spent={spent}, remaining={remaining}")
-                            
-                        except Exception as e:
-                            print(f"   ❌ Failed to prepare update for {category}: {e}")
-                            failed_categories.append(category)
-            
-            # API Call #3: Execute batch update (ONE CALL FOR ALL CATEGORIES!)
-            if batch_updates:
-                print(f"📤 Executing batch update for {len(batch_updates)} cells...")
-                batch_body = {
-                    "valueInputOption": "RAW",
-                    "data": batch_updates
-                }
+            budget_info = {}
+            
+            for row_idx, row in enumerate(budget_data[1:], start=2):  # Start from row 2 (1-based)
+                category = str(row[budget_cat_col]).strip() if len(row) > budget_cat_col else ""
+                if not category or category in budget_info:
+                    continue
+                try:
+                    spent = category_totals.get(category, 0)
+                    budget_amt = float(row[budget_amt_col]) if budget_amt_col < len(row) and row[budget_amt_col] != "" else 0
+                    remaining = budget_amt - spent
+                except (TypeError, ValueError) as e:
+                    print(f"   ❌ Failed to prepare update for {category}: {e}")
+                    failed_categories.append(category)
+                    continue
                 
-                self._execute_with_retry(
-                    self.service.spreadsheets().values().batchUpdate(
-                        spreadsheetId=self.budget_spreadsheet_id,
-                        body=batch_body
-                    )
-                )
+                budget_info[category] = {"תקציב": budget_amt, "כמה יצא": spent, "כמה נשאר": remaining}
+                row_changed = False
+                for col, value in ((spent_col, spent), (remaining_col, remaining)):
+                    if not self._same_number(row[col] if col < len(row) else None, value):
+                        changed_cells[(row_idx, col)] = value
+                        row_changed = True
                 
-                print(f"✅ Batch update completed successfully!")
+                if row_changed:
+                    changed_categories.append(category)
+                    print(f"   ⚡ {category} changed: spent={spent}, remaining={remaining}")
+                else:
+                    unchanged_count += 1
             
-            # Return result in expected format
-            if updated_count == 0:
+            if not budget_info:
                 return {
                     "success": False,
-                    "error": "לא עודכנו קטגוריות",
+                    "error": "לא נמצאו קטגוריות לעדכון",
                     "updated_count": 0,
+                    "unchanged_count": 0,
                     "failed_categories": failed_categories
                 }
-            elif failed_categories:
-                return {
-                    "success": True,
-                    "partial": True,
-                    "updated_count": updated_count,
-                    "failed_categories": failed_categories,
-                    "message": f"עודכנו {updated_count} קטגוריות, {len(failed_categories)} נכשלו"
-                }
+            
+            # API Call #3 (only when something changed): one batchUpdate with merged ranges
+            batch_updates = self._merge_cell_updates(working_sheet, changed_cells)
+            if batch_updates:
+                print(f"📤 Writing {len(changed_cells)} changed cells in {len(batch_updates)} ranges...")
+                self._execute_with_retry(
+                    self.service.spreadsheets().values().batchUpdate(
+                        spreadsheetId=self.budget_spreadsheet_id,
+                        body={"valueInputOption": "RAW", "data": batch_updates}
+                    )
+                )
+                self._bump_data_version()
             else:
-                return {
-                    "success": True,
-                    "updated_count": updated_count,
-                    "message": f"עודכנו בהצלחה {updated_count} קטגוריות בשיטה מהירה!"
-                }
+                print("✅ All categories up to date, nothing to write")
+            
+            result = {
+                "success": True,
+                "updated_count": len(changed_categories),
+                "unchanged_count": unchanged_count,
+                "updated_categories": changed_categories,
+                "cells_written": len(changed_cells),
+                "ranges_written": len(batch_updates),
+                "failed_categories": failed_categories,
+                "budget_info": budget_info,
+                "message": f"עודכנו {len(changed_categories)} קטגוריות, {unchanged_count} ללא שינוי"
+            }
+            if failed_categories:
+                result["partial"] = True
+            return result
                 
         except Exception as e:
             print(f"❌ Error in optimized batch refresh: {e}")
@@ -526,9 +577,57 @@ class SheetsIO:
                 "success": False,
                 "error": f"שגיאה כללית ברענון: {e}",
                 "updated_count": 0,
+                "unchanged_count": 0,
                 "failed_categories": []
             }
 
+    @staticmethod
+    def _same_number(current: Union[str, float, None], value: float) -> bool:
+        """True if a cell already holds `value` (tolerating float noise)."""
+        if current is None or current == "":
+            return False
+        try:
+            return abs(float(current) - value) < 1e-6
+        except (TypeError, ValueError):
+            return False
+
+    @staticmethod
+    def _merge_cell_updates(sheet: str, cells: Dict[tuple, float]) -> List[Dict]:
+        """
+        Turn {(row, col): value} into batchUpdate ranges: runs of adjacent columns
+        in a row become one range, and identical runs on consecutive rows one block.
+        """
+        runs_by_row: Dict[int, List[tuple]] = {}
+        for row in sorted({r for r, _ in cells}):
+            cols = sorted(c for r, c in cells if r == row)
+            runs = []
+            for col in cols:
+                if runs and col == runs[-1][1] + 1:
+                    runs[-1][1] = col
+                else:
+                    runs.append([col, col])
+            runs_by_row[row] = [tuple(run) for run in runs]
+        
+        blocks = []  # [first_row, last_row, first_col, last_col]
+        open_blocks: Dict[tuple, list] = {}  # (first_col, last_col) -> block ending on the previous row
+        for row, runs in runs_by_row.items():
+            for run in runs:
+                block = open_blocks.get(run)
+                if block and block[1] == row - 1:
+                    block[1] = row
+                else:
+                    block = [row, row, run[0], run[1]]
+                    blocks.append(block)
+                    open_blocks[run] = block
+        
+        return [
+            {
+                "range": f"{sheet}!{chr(65 + c0)}{r0}:{chr(65 + c1)}{r1}" if (r0, c0) != (r1, c1) else f"{sheet}!{chr(65 + c0)}{r0}",
+                "values": [[cells[(r, c)] for c in range(c0, c1 + 1)] for r in range(r0, r1 + 1)]
+            }
+            for r0, r1, c0, c1 in blocks
+        ]
+
     def get_recent_transactions(self, limit: int = 20) -> List[Dict]:
         """Get recent transactions from tracker sheet."""
         try:
@@ -565,6 +664,50 @@ class SheetsIO:
             print(f"Error getting recent transactions: {e}")
             return []
 
+    def get_tracker_history(self) -> List[Dict]:
+        """Get transactions from every tracker sheet (all months) in one batch read."""
+        try:
+            meta = self._execute_with_retry(
+                self.service.spreadsheets().get(
+                    spreadsheetId=self.tracker_spreadsheet_id,
+                    fields="sheets.properties.title"
+                )
+            )
+
+            sheet_names = []
+            for sheet in (meta.get("sheets", []) if meta else []):
+                sheet_name = sheet["properties"]["title"]
+                if not sheet_name.startswith("__"):
+                    sheet_names.append(sheet_name)
+            if not sheet_names:
+                return []
+
+            response = self._execute_with_retry(
+                self.service.spreadsheets().values().batchGet(
+                    spreadsheetId=self.tracker_spreadsheet_id,
+                    ranges=[f"'{name}'!A:Z" for name in sheet_names]
+                )
+            )
+
+            transactions = []
+            for value_range in (response.get("valueRanges", []) if response else []):
+                values = value_range.get("values", [])
+                if not values:
+                    continue
+                headers = values[0]
+                for row in values[1:]:
+                    if len(row) > 0:  # Skip empty rows
+                        transactions.append({
+                            header: row[i] if i < len(row) else ""
+                            for i, header in enumerate(headers)
+                        })
+
+            return transactions
+
+        except Exception as e:
+            print(f"Error getting tracker history: {e}")
+            return []
+
     def get_budget_summary(self) -> List[Dict]:
         """Get budget summary from budget sheet."""
         try:
@@ -617,31 +760,45 @@ class SheetsIO:
 
     def process_expense(self, expense_data: Dict[str, Union[str, int, float]]) -> Dict:
         """Complete expense processing: add to tracker and update budget."""
+        result = self.process_expenses([expense_data])
+        category = str(expense_data.get("קטגוריה", ""))
+        
+        if not result["success"]:
+            return {"success": False, "error": result["error"], "expense": expense_data}
+        return {
+            "success": True,
+            "category": category,
+            "budget_info": result["budget_info"].get(category),
+            "expense": expense_data
+        }
+
+    def process_expenses(self, expenses: List[Dict[str, Union[str, int, float]]]) -> Dict:
+        """
+        Record several expenses as one batch: one tracker append, then one
+        budget batchUpdate covering every touched category.
+        """
         try:
-            category = str(expense_data.get("קטגוריה", ""))
+            categories = list(dict.fromkeys(str(e.get("קטגוריה", "")) for e in expenses))
             
-            # 1. Add to tracker sheet
-            self.add_expense_to_tracker(expense_data)
+            # 1. Add all rows to tracker sheet
+            self.add_expenses_to_tracker(expenses)
             
-            # 2. Update budget sheet
-            self.update_budget_sheet(category)
-            
-            # 3. Get updated budget info
-            budget_info = self.get_category_budget_info(category)
+            # 2. Update budget sheet (also returns the updated budget info)
+            budget_info = self.update_budget_categories(categories)
             
             return {
                 "success": True,
-                "category": category,
+                "categories": categories,
                 "budget_info": budget_info,
-                "expense": expense_data
+                "expenses": expenses
             }
             
         except Exception as e:
-            print(f"Error processing expense: {e}")
+            print(f"Error processing expenses: {e}")
             return {
                 "success": False,
                 "error": str(e),
-                "expense": expense_data
+                "expenses": expenses
             }
 
     # ------------------------------------------------------------------
@@ -717,6 +874,10 @@ class SheetsIO:
     def update_working_sheet_config(self, new_sheet_name: str) -> Dict:
         """Update the working_sheet value in __configs sheet."""
         try:
+            # The working sheet changes, so every derived cache is stale
+            self._working_sheet_cache = None
+            self._bump_data_version()
+            
             # First, read the entire __configs sheet to find the correct row
             config_range = "__configs!A:B"
             response = self._execute_with_retry(
@@ -817,6 +978,7 @@ class SheetsIO:
                         body={"values": rows}
                     )
                 )
+                self._bump_data_version()
             
             return {"success": True, "categories_added": len(rows)}
             
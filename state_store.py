@@ -0,0 +1,323 @@
+import json
+import time
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# ---------------------------------------------------------------------------
+# Pluggable key/value store for conversation state shared across workers
+# ---------------------------------------------------------------------------
+# Values are JSON documents, so every backend stores the same thing and
+# callers always get a fresh copy (mutating it never changes the store).
+# All backends support per-key TTLs and two atomic operations:
+#   add(key, value, ttl)                      set only if the key is absent
+#   compare_and_set(key, expected, new, ttl)  swap only if the value is unchanged
+#
+#   memory://                 one process (default)
+#   sqlite:////tmp/x.sqlite3  every worker process on the host
+#   redis://host:6379/0       every instance (needs the `redis` package)
+# ---------------------------------------------------------------------------
+
+
+def _dump(value: Any) -> str:
+    # Canonical form, so equal documents compare equal as text
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def _expires_at(ttl: Optional[float]) -> Optional[float]:
+    return time.time() + ttl if ttl else None
+
+
+class StateStore(ABC):
+    """Interface shared by the backends; update() is built on compare_and_set."""
+
+    backend = "base"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Store the value only if the key is absent (or expired). True if stored."""
+
+    @abstractmethod
+    def compare_and_set(self, key: str, expected: Optional[Any], new: Optional[Any],
+                        ttl: Optional[float] = None) -> bool:
+        """
+        Replace the value only if it still equals `expected`. True if swapped.
+        expected=None means "key absent"; new=None deletes the key.
+        """
+
+    def update(self, key: str, change: Callable[[Optional[Any]], Optional[Any]], ttl: Optional[float] = None,
+               retries: int = 5) -> Tuple[bool, Optional[Any]]:
+        """Read-modify-write with retries on conflict: (succeeded, value written)."""
+        for _ in range(retries):
+            current = self.get(key)
+            new = change(json.loads(_dump(current)) if current is not None else None)
+            if self.compare_and_set(key, current, new, ttl):
+                return True, new
+        return False, None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend}
+
+
+# ------------------------------------------------------------------
+# 1) In-memory (single process)
+# ------------------------------------------------------------------
+
+class MemoryStateStore(StateStore):
+    backend = "memory"
+
+    def __init__(self, purge_every: int = 200):
+        self.purge_every = purge_every
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}  # key -> (json, expires_at)
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            raw = self._live(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._write(key, _dump(value), ttl)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._write(key, _dump(value), ttl)
+            return True
+
+    def compare_and_set(self, key: str, expected: Optional[Any], new: Optional[Any],
+                        ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._live(key) != (_dump(expected) if expected is not None else None):
+                return False
+            if new is None:
+                self._data.pop(key, None)
+            else:
+                self._write(key, _dump(new), ttl)
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"backend": self.backend, "keys": len(self._data)}
+
+    # Caller holds the lock
+
+    def _live(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.time():
+            del self._data[key]
+            return None
+        return entry[0]
+
+    def _write(self, key: str, raw: str, ttl: Optional[float]) -> None:
+        self._data[key] = (raw, _expires_at(ttl))
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            now = time.time()
+            for stale in [k for k, (_, exp) in self._data.items() if exp is not None and exp <= now]:
+                del self._data[stale]
+
+
+# ------------------------------------------------------------------
+# 2) SQLite (all worker processes on one host)
+# ------------------------------------------------------------------
+
+class SQLiteStateStore(StateStore):
+    backend = "sqlite"
+
+    def __init__(self, path: str, table: str = "state", purge_every: int = 200):
+        self.path = path
+        self.table = table
+        self.purge_every = purge_every
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            raw = self._live(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._write(key, _dump(value), ttl)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        with self._lock, self._transaction():
+            if self._live(key) is not None:
+                return False
+            self._write(key, _dump(value), ttl)
+            return True
+
+    def compare_and_set(self, key: str, expected: Optional[Any], new: Optional[Any],
+                        ttl: Optional[float] = None) -> bool:
+        with self._lock, self._transaction():
+            if self._live(key) != (_dump(expected) if expected is not None else None):
+                return False
+            if new is None:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            else:
+                self._write(key, _dump(new), ttl)
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            keys = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        return {"backend": self.backend, "keys": keys, "path": self.path}
+
+    # Caller holds the lock
+
+    def _transaction(self) -> "_SQLiteTransaction":
+        return _SQLiteTransaction(self._conn)
+
+    def _live(self, key: str) -> Optional[str]:
+        row = self._conn.execute(f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= time.time():
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            return None
+        return row[0]
+
+    def _write(self, key: str, raw: str, ttl: Optional[float]) -> None:
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, raw, _expires_at(ttl))
+        )
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                               (time.time(),))
+
+
+class _SQLiteTransaction:
+    """BEGIN IMMEDIATE ... COMMIT: takes the write lock before reading, so check-and-write is atomic."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __enter__(self) -> None:
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+# ------------------------------------------------------------------
+# 3) Redis-compatible (all instances)
+# ------------------------------------------------------------------
+
+class RedisStateStore(StateStore):
+    """
+    Works with any redis-py compatible client (redis.Redis, or a local
+    stand-in such as fakeredis). CAS uses WATCH/MULTI, so no Lua is needed.
+    """
+
+    backend = "redis"
+
+    def __init__(self, client: Any, prefix: str = "budgetbot:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.client.set(self.prefix + key, _dump(value), px=self._px(ttl))
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        return bool(self.client.set(self.prefix + key, _dump(value), nx=True, px=self._px(ttl)))
+
+    def compare_and_set(self, key: str, expected: Optional[Any], new: Optional[Any],
+                        ttl: Optional[float] = None) -> bool:
+        name = self.prefix + key
+        wanted = _dump(expected) if expected is not None else None
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(name)
+                raw = pipe.get(name)
+                if isinstance(raw, bytes):
+                    raw = raw.decode()
+                if raw != wanted:
+                    return False
+                pipe.multi()
+                if new is None:
+                    pipe.delete(name)
+                else:
+                    pipe.set(name, _dump(new), px=self._px(ttl))
+                pipe.execute()
+                return True
+            except self._watch_error():
+                return False  # Someone else wrote the key between WATCH and EXEC
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "prefix": self.prefix}
+
+    @staticmethod
+    def _px(ttl: Optional[float]) -> Optional[int]:
+        return max(int(ttl * 1000), 1) if ttl else None
+
+    @staticmethod
+    def _watch_error() -> type:
+        try:
+            from redis.exceptions import WatchError
+            return WatchError
+        except ImportError:
+            return RuntimeError
+
+
+# ------------------------------------------------------------------
+# 4) Factory
+# ------------------------------------------------------------------
+
+def open_state_store(url: Optional[str] = None) -> StateStore:
+    """Build a store from a URL (see the header); falls back to memory if the backend is unavailable."""
+    url = (url or "").strip()
+    try:
+        if url.startswith("sqlite:///"):
+            return SQLiteStateStore(url[len("sqlite:///"):])
+        if url.startswith(("redis://", "rediss://", "unix://")):
+            import redis  # Optional dependency, only needed for this backend
+            return RedisStateStore(redis.Redis.from_url(url))
+        if url and not url.startswith("memory://"):
+            print(f"Unknown state store URL {url!r}, using memory")
+    except Exception as e:
+        print(f"State store {url!r} unavailable, using memory: {e}")
+    return MemoryStateStore()
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from async_gpt import AsyncOptimizedGPT_API
+
+
+class FakeCompletions:
+    """Async stand-in for client.chat.completions that tracks how many calls overlap."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+
+    async def create(self, messages, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        content = messages[-1]["content"]
+        if content == "fail":
+            raise ValueError("bad request")
+        return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content=f" {content} "))])
+
+
+@pytest.fixture
+def gpt():
+    client = AsyncOptimizedGPT_API(api_key="test", max_concurrency=2, deadline=1.0)
+    client.async_client.chat = SimpleNamespace(completions=FakeCompletions())
+    yield client
+    client.close()
+
+
+def test_call_many_runs_concurrently_up_to_the_limit(gpt):
+    requests = [[{"role": "user", "content": str(n)}] for n in range(6)]
+    started = time.time()
+    assert gpt.call_many(requests) == [str(n) for n in range(6)]
+    assert gpt.async_client.chat.completions.peak == 2
+    assert time.time() - started < 6 * 0.05  # Overlapped, not sequential
+    assert gpt.get_concurrency_stats()["max_in_flight"] == 2
+
+
+def test_failed_calls_yield_empty_strings(gpt):
+    requests = [[{"role": "user", "content": "ok"}], [{"role": "user", "content": "fail"}]]
+    assert gpt.call_many(requests) == ["ok", ""]
+    assert gpt.get_concurrency_stats()["errors"] == 1
+
+
+def test_sync_calls_from_worker_threads_overlap(gpt):
+    results = []
+    threads = [threading.Thread(target=lambda n=n: results.append(
+        gpt._create_completion([{"role": "user", "content": str(n)}], 0.0, 5))) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == ["0", "1", "2", "3"]
+    assert gpt.async_client.chat.completions.peak == 2
+
+
+def test_deadline_raises_timeout(gpt):
+    gpt.async_client.chat.completions.delay = 0.5
+    with pytest.raises(TimeoutError):
+        gpt._create_completion([{"role": "user", "content": "slow"}], 0.0, 5, timeout=0.05)
+    assert gpt.get_concurrency_stats()["timeouts"] == 1
@@ -0,0 +1,58 @@
+import os
+import time
+
+from category_memory import CategoryMemory
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_lookup_by_phrase_token_and_fuzzy():
+    memory = CategoryMemory(path=None)
+    memory.build_from_rows([
+        {"פירוט": "נטפליקס", "קטגוריה": "בידור"},
+        {"פירוט": "קפה ומאפה", "קטגוריה": "אוכל בחוץ"},
+        {"פירוט": "סופר רמי לוי", "קטגוריה": "קניות"},
+    ])
+    assert memory.lookup("נטפליקס 39.9")["match"] == "phrase"
+    assert memory.lookup("רמי לוי 250")["category"] == "קניות"
+    assert memory.lookup("בנטפליקס")["category"] == "בידור"
+    assert memory.lookup("נטפליקסס")["match"] == "fuzzy"
+    assert memory.lookup("נטפליקס", categories=["קניות"]) is None
+
+
+def test_learn_does_not_write_on_the_request_path(tmp_path):
+    path = str(tmp_path / "memory.json")
+    memory = CategoryMemory(path=path, flush_seconds=60, flush_every=100)
+    memory.learn("נטפליקס", "בידור")
+    time.sleep(0.05)
+    assert not os.path.exists(path)
+    memory.close()
+    assert CategoryMemory(path=path).lookup("נטפליקס")["category"] == "בידור"
+
+
+def test_background_flush_after_enough_learns(tmp_path):
+    path = str(tmp_path / "memory.json")
+    memory = CategoryMemory(path=path, flush_seconds=60, flush_every=3)
+    for item in ("חלב", "לחם", "ביצים"):
+        memory.learn(item, "קניות")
+    assert wait_for(lambda: os.path.exists(path))
+    memory.close()
+
+
+def test_background_flush_after_interval(tmp_path):
+    path = str(tmp_path / "memory.json")
+    memory = CategoryMemory(path=path, flush_seconds=0.05, flush_every=100)
+    memory.learn("חלב", "קניות")
+    assert wait_for(lambda: os.path.exists(path))
+    memory.close()
+
+
+def test_build_from_rows_saves_immediately(tmp_path):
+    path = str(tmp_path / "memory.json")
+    CategoryMemory(path=path).build_from_rows([{"פירוט": "חלב", "קטגוריה": "קניות"}])
+    assert os.path.exists(path)
@@ -0,0 +1,122 @@
+import time
+
+import httpx
+import openai
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, ProviderUnavailableError
+from optimized_gpt import is_provider_failure
+
+
+def wait_for_state(breaker, state, timeout=1.0):
+    deadline = time.time() + timeout
+    while breaker.state != state and time.time() < deadline:
+        time.sleep(0.01)
+    return breaker.state
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(consecutive_failures=3, min_calls=100)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_success_resets_the_failure_streak():
+    breaker = CircuitBreaker(consecutive_failures=3, min_calls=100)
+    for _ in range(5):
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+
+
+def test_opens_on_failure_rate_in_the_window():
+    breaker = CircuitBreaker(consecutive_failures=100, min_calls=4, failure_rate=0.5)
+    breaker.record_success(0.1)
+    breaker.record_failure()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    breaker.record_failure()  # 2 of 4
+    assert breaker.state == OPEN
+
+
+def test_slow_threshold_can_be_set_per_call():
+    breaker = CircuitBreaker(consecutive_failures=100, min_calls=2, failure_rate=0.5, slow_call_seconds=5.0)
+    breaker.record_success(10.0, slow_after=20.0)  # A strong-tier call: not slow
+    breaker.record_success(10.0, slow_after=20.0)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["window_failure_rate"] == 0.0
+    breaker.record_success(6.0)  # Default threshold: slow
+    breaker.record_success(6.0)
+    assert breaker.state == OPEN
+
+
+def test_old_calls_leave_the_window():
+    breaker = CircuitBreaker(consecutive_failures=100, min_calls=2, failure_rate=0.5, window_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.1)
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["window_calls"] == 2
+
+
+def test_probe_success_closes():
+    breaker = CircuitBreaker(probe=lambda: None, consecutive_failures=1, open_seconds=0.0)
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # Starts the probe; the user request itself never probes
+    assert wait_for_state(breaker, CLOSED) == CLOSED
+    breaker.before_call()
+    assert breaker.stats()["window_calls"] == 0
+
+
+def test_probe_failure_reopens():
+    def failing_probe():
+        raise TimeoutError("still down")
+
+    breaker = CircuitBreaker(probe=failing_probe, consecutive_failures=1, open_seconds=0.0)
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert wait_for_state(breaker, OPEN) == OPEN
+    assert breaker.stats()["probe_failures"] == 1
+
+
+def test_half_open_rejects_while_probing():
+    breaker = CircuitBreaker(probe=lambda: time.sleep(0.2), consecutive_failures=1, open_seconds=0.0)
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert wait_for_state(breaker, CLOSED) == CLOSED
+
+
+def test_provider_unavailable_is_handled_as_open_circuit():
+    assert issubclass(ProviderUnavailableError, CircuitOpenError)
+
+
+def _status_error(cls, status):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return cls("error", response=httpx.Response(status, request=request), body=None)
+
+
+@pytest.mark.parametrize("error,expected", [
+    (TimeoutError(), True),
+    (ConnectionError(), True),
+    (_status_error(openai.RateLimitError, 429), True),
+    (_status_error(openai.InternalServerError, 503), True),
+    (_status_error(openai.BadRequestError, 400), False),
+    (_status_error(openai.AuthenticationError, 401), False),
+    (ValueError("unusable reply"), False),
+])
+def test_only_provider_failures_count(error, expected):
+    assert is_provider_failure(error) is expected
@@ -0,0 +1,28 @@
+import pytest
+
+from confirmation import classify_confirmation
+
+
+@pytest.mark.parametrize("text", [
+    "כן", "כן תודה", "בטח!", "למה לא", "אישור בבקשה", "בוא נעשה את זה", "סבבה", "👍", "OK",
+])
+def test_yes(text):
+    assert classify_confirmation(text) == "yes"
+
+
+@pytest.mark.parametrize("text", [
+    "לא", "לא תודה", "ביטול", "אולי אחר כך", "לא מתאים לי", "עזוב", "👎", "cancel",
+])
+def test_no(text):
+    assert classify_confirmation(text) == "no"
+
+
+@pytest.mark.parametrize("text", [
+    "",                                       # Nothing to go on
+    "כן... בעצם לא",                          # Both labels
+    "👍 לא",                                  # Emoji contradicts the words
+    "כן אבל תשנה את הקניות לשמונה מאות שקל",  # Too much else going on
+    "מה זה אומר",                             # Unrelated
+])
+def test_unsure(text):
+    assert classify_confirmation(text) == "unsure"
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from dedup_store import DedupStore
+from state_store import MemoryStateStore, SQLiteStateStore
+
+
+def test_second_delivery_is_a_duplicate():
+    dedup = DedupStore()
+    assert not dedup.seen_before("wamid.1")
+    assert dedup.seen_before("wamid.1")
+    assert not dedup.seen_before("wamid.2")
+    assert dedup.stats()["duplicates"] == 1
+
+
+def test_ids_expire_after_ttl():
+    dedup = DedupStore(ttl=0.05)
+    assert not dedup.seen_before("wamid.1")
+    time.sleep(0.1)
+    assert not dedup.seen_before("wamid.1")
+
+
+def test_oldest_ids_are_evicted_at_capacity():
+    dedup = DedupStore(max_entries=2)
+    for message_id in ("a", "b", "c"):
+        dedup.seen_before(message_id)
+    assert dedup.stats()["size"] == 2
+    assert not dedup.seen_before("a")
+
+
+def test_forget_allows_redelivery():
+    dedup = DedupStore()
+    dedup.seen_before("wamid.1")
+    dedup.forget("wamid.1")
+    assert not dedup.seen_before("wamid.1")
+
+
+def test_workers_share_the_sqlite_file(tmp_path):
+    path = str(tmp_path / "dedup.sqlite3")
+    first, second = DedupStore(path=path), DedupStore(path=path)
+    assert not first.seen_before("wamid.1")
+    assert second.seen_before("wamid.1")
+    first.forget("wamid.1")
+    assert not second.seen_before("wamid.1")
+
+
+def test_expired_sqlite_row_is_claimed_again(tmp_path):
+    path = str(tmp_path / "dedup.sqlite3")
+    first, second = DedupStore(ttl=0.05, path=path), DedupStore(ttl=0.05, path=path)
+    assert not first.seen_before("wamid.1")
+    time.sleep(0.1)
+    assert not second.seen_before("wamid.1")
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def shared_store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStateStore()
+    return SQLiteStateStore(str(tmp_path / "state.sqlite3"))
+
+
+def test_instances_share_a_state_store(shared_store):
+    first, second = DedupStore(store=shared_store), DedupStore(store=shared_store)
+    assert not first.seen_before("wamid.1")
+    assert second.seen_before("wamid.1")
+    first.forget("wamid.1")
+    assert not second.seen_before("wamid.1")
+    assert first.stats()["shared_store"] == shared_store.backend
+
+
+def test_expired_sqlite_row_is_reclaimed_by_one_worker_only(tmp_path):
+    path = str(tmp_path / "dedup.sqlite3")
+    workers = [DedupStore(ttl=0.05, path=path) for _ in range(4)]
+    assert not workers[0].seen_before("wamid.1")
+    time.sleep(0.1)
+
+    claims = []
+    barrier = threading.Barrier(len(workers) - 1)
+
+    def reclaim(dedup):
+        barrier.wait()
+        claims.append(not dedup.seen_before("wamid.1"))
+
+    threads = [threading.Thread(target=reclaim, args=(dedup,)) for dedup in workers[1:]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert claims.count(True) == 1
@@ -0,0 +1,118 @@
+import time
+
+from gpt_cache import LRUCache, SQLiteCache, TieredCache
+
+
+def test_lru_order_and_entry_cap():
+    cache = LRUCache(max_entries=2, ttl=None)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")  # "b" is now least recently used
+    cache.put("c", 3)
+    assert cache.get("a") == 1 and cache.get("b") is None and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry_and_age():
+    cache = LRUCache(ttl=0.05)
+    cache.put("a", 1)
+    value, age = cache.get_entry("a")
+    assert value == 1 and age < 0.05
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_stored_at_is_kept_for_promoted_entries():
+    cache = LRUCache(ttl=10)
+    cache.put("old", 1, stored_at=time.time() - 11)
+    assert cache.get("old") is None
+
+
+def test_byte_accounting_evicts_least_recently_used():
+    cache = LRUCache(ttl=None, max_bytes=30, sizeof=lambda key, value: len(value))
+    cache.put("a", "x" * 10)
+    cache.put("b", "y" * 10)
+    cache.put("c", "z" * 15)
+    assert cache.get("a") is None and cache.get("b") == "y" * 10
+    assert cache.stats()["bytes"] == 25
+
+
+def test_replacing_a_key_updates_the_byte_count():
+    cache = LRUCache(ttl=None, sizeof=lambda key, value: len(value))
+    cache.put("a", "x" * 10)
+    cache.put("a", "x" * 4)
+    assert cache.stats()["bytes"] == 4 and len(cache) == 1
+
+
+def test_oversized_entry_is_skipped_without_flushing_the_cache():
+    cache = LRUCache(ttl=None, max_bytes=100, sizeof=lambda key, value: len(value))
+    cache.put("a", "x" * 10)
+    cache.put("b", "y" * 10)
+    cache.put("big", "z" * 500)
+    assert cache.get("a") == "x" * 10 and cache.get("b") == "y" * 10
+    assert cache.get("big") is None
+    assert cache.stats()["oversized"] == 1 and cache.stats()["evictions"] == 0
+
+
+def test_oversized_replacement_drops_the_stale_value():
+    cache = LRUCache(ttl=None, max_bytes=100, sizeof=lambda key, value: len(value))
+    cache.put("a", "old")
+    cache.put("a", "n" * 500)
+    assert cache.get("a") is None
+
+
+def test_get_or_compute_computes_once():
+    cache = LRUCache(ttl=None)
+    calls = []
+    assert cache.get_or_compute("k", lambda: calls.append(1) or "v") == "v"
+    assert cache.get_or_compute("k", lambda: calls.append(1) or "v") == "v"
+    assert len(calls) == 1
+
+
+def test_sqlite_cache_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first, second = SQLiteCache(path), SQLiteCache(path)
+    first.put("q", {"answer": "נשארו 120₪"})
+    value, age, stored_at = second.get_entry("q")
+    assert value == {"answer": "נשארו 120₪"} and age >= 0
+    assert second.get_entry("missing") is None
+
+
+def test_sqlite_cache_ttl(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl=10)
+    cache.put("old", 1, stored_at=time.time() - 11)
+    assert cache.get_entry("old") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_sqlite_compaction_keeps_the_newest_entries(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl=None, max_entries=2, compact_every=1000)
+    for index, key in enumerate("abc"):
+        cache.put(key, key, stored_at=1000.0 + index)
+    cache.compact()
+    assert cache.get_entry("a") is None
+    assert cache.get_entry("c")[0] == "c" and len(cache) == 2
+
+
+def test_sqlite_oversized_entry_does_not_flush_the_rest(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLiteCache(path, ttl=None, max_bytes=100, compact_every=1000)
+    cache.put("a", "x" * 10, stored_at=1000.0)
+    cache.put("b", "y" * 10, stored_at=1001.0)
+    cache.put("big", "z" * 500)
+    # A worker configured with a larger budget wrote the newest row
+    SQLiteCache(path, ttl=None, max_bytes=None).put("huge", "h" * 500, stored_at=2000.0)
+    cache.compact()
+    assert cache.get_entry("big") is None and cache.get_entry("huge") is None
+    assert cache.get_entry("a")[0] == "x" * 10 and cache.get_entry("b")[0] == "y" * 10
+
+
+def test_tiered_cache_promotes_l2_hits(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    writer = TieredCache(LRUCache(ttl=None), SQLiteCache(path))
+    reader = TieredCache(LRUCache(ttl=None), SQLiteCache(path))
+    writer.put("shared", "v")
+    writer.put("local", "v", persist=False)
+    assert reader.get("shared") == "v" and "shared" in reader.l1
+    assert reader.get("local") is None
@@ -0,0 +1,82 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from health_monitor import HealthMonitor
+from optimized_gpt import OptimizedGPT_API
+from sheets_IO import SheetsIO
+
+
+def failing_sheets() -> SheetsIO:
+    """A SheetsIO whose API calls fail the way a broken credential or outage does."""
+    class Request:
+        def execute(self):
+            raise RuntimeError("HttpError 403: caller does not have permission")
+
+    values = SimpleNamespace(get=lambda **kwargs: Request())
+    service = SimpleNamespace(spreadsheets=lambda: SimpleNamespace(values=lambda: values))
+    sheets = SheetsIO.__new__(SheetsIO)
+    sheets._local = threading.local()
+    sheets._local.service = service
+    sheets.budget_spreadsheet_id = "budget"
+    return sheets
+
+
+def test_snapshot_reports_healthy_and_failing_checks():
+    monitor = HealthMonitor()
+    monitor.add_check("ok", lambda: {"rows": 3}, interval=60)
+    monitor.add_check("down", lambda: 1 / 0, interval=60)
+    monitor.run_once()
+    monitor.run_once("down")
+
+    snapshot = monitor.snapshot()
+    assert not snapshot["healthy"]
+    assert snapshot["components"]["ok"]["healthy"] and snapshot["components"]["ok"]["rows"] == 3
+    assert snapshot["components"]["down"]["healthy"] is False
+    assert snapshot["components"]["down"]["consecutive_failures"] == 2
+
+
+def test_unchecked_and_stale_results_are_unhealthy():
+    monitor = HealthMonitor(stale_factor=1.0)
+    monitor.add_check("slow", lambda: None, interval=0.05)
+    assert not monitor.snapshot()["healthy"]
+    monitor.run_once()
+    assert monitor.snapshot()["healthy"]
+    time.sleep(0.1)
+    assert monitor.snapshot()["components"]["slow"]["stale"]
+
+
+def test_background_loop_runs_checks():
+    runs = []
+    monitor = HealthMonitor()
+    monitor.add_check("tick", lambda: runs.append(1), interval=0.02)
+    monitor.start()
+    time.sleep(0.15)
+    monitor.stop()
+    assert len(runs) >= 2
+
+
+def test_failing_sheets_probe_is_unhealthy():
+    sheets = failing_sheets()
+    monitor = HealthMonitor()
+    monitor.add_check("google_sheets", sheets.ping, interval=60)
+    monitor.run_once()
+    component = monitor.snapshot()["components"]["google_sheets"]
+    assert component["healthy"] is False
+    assert "403" in component["error"]
+
+
+def test_gpt_probe_bypasses_the_breaker():
+    def create(**kwargs):
+        raise TimeoutError("provider timed out")
+
+    gpt = OptimizedGPT_API(api_key="test")
+    gpt.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monitor = HealthMonitor()
+    monitor.add_check("gpt_api", gpt.probe_provider, interval=60)
+    for _ in range(5):
+        monitor.run_once()
+
+    assert monitor.snapshot()["components"]["gpt_api"]["consecutive_failures"] == 5
+    assert gpt.breaker.state == "closed"
+    assert gpt.breaker.stats()["window_calls"] == 0
@@ -0,0 +1,83 @@
+from datetime import date
+
+import pytest
+
+from hebrew_normalizer import normalize_dates, normalize_message, normalize_numbers
+
+TODAY = date(2025, 7, 16)  # A Wednesday
+
+TEENS = [
+    ("אחד עשר", 11), ("אחת עשרה", 11),
+    ("שנים עשר", 12), ("שניים עשר", 12), ("שתים עשרה", 12), ("שתיים עשרה", 12),
+    ("שלושה עשר", 13), ("שלוש עשרה", 13),
+    ("ארבעה עשר", 14), ("ארבע עשרה", 14),
+    ("חמישה עשר", 15), ("חמש עשרה", 15),
+    ("שישה עשר", 16), ("שש עשרה", 16),
+    ("שבעה עשר", 17), ("שבע עשרה", 17),
+    ("שמונה עשר", 18), ("שמונה עשרה", 18),
+    ("תשעה עשר", 19), ("תשע עשרה", 19),
+]
+
+
+@pytest.mark.parametrize("words,value", TEENS)
+def test_teens(words, value):
+    assert normalize_numbers(f"{words} שקל") == f"{value} שקל"
+
+
+def test_teen_from_the_review():
+    assert normalize_message("שתים עשרה שקל", TODAY) == "12 שקל"
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("חמישים ושלוש שקל", "53 שקל"),
+    ("עשרים ושתיים שקל", "22 שקל"),
+    ("מאתיים שקל", "200 שקל"),
+    ("שלוש מאות וחמישים", "350"),
+    ("אלף ומאתיים", "1200"),
+    ("שלושת אלפים", "3000"),
+    ("שלושים וחצי", "30.5"),
+    ("קפה בעשרים", "קפה ב-20"),
+    ("עשרים, ותודה", "20, ותודה"),
+])
+def test_numbers(text, expected):
+    assert normalize_numbers(text) == expected
+
+
+def test_lone_small_number_needs_a_unit():
+    assert normalize_numbers("יום שני") == "יום שני"
+    assert normalize_numbers("אחת הבעיות") == "אחת הבעיות"
+    assert normalize_numbers("שלוש שקל") == "3 שקל"
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("קפה היום", "קפה 2025-07-16"),
+    ("קפה אתמול", "קפה 2025-07-15"),
+    ("קפה שלשום", "קפה 2025-07-14"),
+    ("לפני יומיים", "2025-07-14"),
+    ("לפני שבוע", "2025-07-09"),
+    ("לפני 3 ימים", "2025-07-13"),
+    ("לפני 2 שבועות", "2025-07-02"),
+    ("ביום שני", "2025-07-14"),
+    ("ביום רביעי", "2025-07-16"),
+    ("ביום רביעי שעבר", "2025-07-09"),
+    ("בשבת", "2025-07-12"),
+    ("השבת", "2025-07-12"),
+    ("יום שבת", "2025-07-12"),
+    ("בשבת שעברה", "2025-07-12"),
+])
+def test_dates(text, expected):
+    assert normalize_dates(text, TODAY) == expected
+
+
+def test_message_normalizes_numbers_before_dates():
+    assert normalize_message("פיצה בשמונים שקל לפני שלושה ימים", TODAY) == "פיצה ב-80 שקל 2025-07-13"
+
+
+def test_normalizing_is_stable():
+    once = normalize_message("קניות במאה ועשרים אתמול", TODAY)
+    assert normalize_message(once, TODAY) == once
+
+
+@pytest.mark.parametrize("text", ["נרות שבת 30", "ארוחת שבת 200", "שבת שלום", "חלות לשבת 25"])
+def test_shabbat_as_a_noun_is_not_a_date(text):
+    assert normalize_message(text, TODAY) == text
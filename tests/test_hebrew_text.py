@@ -0,0 +1,36 @@
+from hebrew_text import question_signature, strip_prefix, tokenize
+
+CATEGORIES = ["קניות", "בילויים", "אוכל בחוץ"]
+
+
+def test_tokenize_drops_punctuation_and_numbers():
+    assert tokenize("קפה, 12 ש\"ח!") == ["קפה", "ש", "ח"]
+    assert tokenize("קפה 12", drop_numbers=False) == ["קפה", "12"]
+
+
+def test_strip_prefix_only_when_rest_is_known():
+    known = {"קניות", "חודש"}
+    assert strip_prefix("בקניות", known) == "קניות"
+    assert strip_prefix("בחודש", known) == "חודש"
+    # Root letters that look like prefixes are kept
+    assert strip_prefix("הוצאתי", known) == "הוצאתי"
+    assert strip_prefix("משכורת", known) == "משכורת"
+    assert strip_prefix("קניות", known) == "קניות"
+
+
+def test_signature_ignores_stopwords_and_category_prefixes():
+    assert (question_signature("כמה נשאר בקניות?", CATEGORIES)
+            == question_signature("כמה נשאר לי קניות", CATEGORIES))
+
+
+def test_signature_keeps_word_order():
+    first = question_signature("הוצאתי יותר על אוכל מאשר בילויים", CATEGORIES)
+    second = question_signature("הוצאתי יותר על בילויים מאשר אוכל", CATEGORIES)
+    assert first != second
+
+
+def test_signature_keeps_numbers_negations_and_roots():
+    assert question_signature("כמה הוצאתי ב-3 הימים") != question_signature("כמה הוצאתי ב-4 הימים")
+    assert question_signature("לא הוצאתי על אוכל") != question_signature("הוצאתי על אוכל")
+    assert "הוצאתי" in question_signature("מה הוצאתי בחודש").split()
+    assert "חודש" in question_signature("מה הוצאתי בחודש").split()
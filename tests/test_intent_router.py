@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from hebrew_text import tokenize
+from intent_router import NATURAL_INTENTS, IntentRouter
+
+QUICK_COMMANDS = {"יתרה": "show_remaining_budgets", "עזרה": "show_help", "רענון": "refresh_budgets"}
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouter(NATURAL_INTENTS, exact=QUICK_COMMANDS)
+
+
+def test_exact_quick_command(router):
+    match = router.route("  יתרה! ")
+    assert match.intent == "show_remaining_budgets" and match.exact
+
+
+def test_quick_command_inside_a_sentence_is_not_exact(router):
+    match = router.route("צריך עזרה עם משהו")
+    assert match.intent == "show_help" and not match.exact
+
+
+@pytest.mark.parametrize("text,intent", [
+    ("כמה נשאר לי?", "show_remaining_budgets"),
+    ("מה הקטגוריות", "show_categories"),
+    ("איך זה עובד", "show_help"),
+    ("עדכן יתרות בבקשה", "refresh_budgets"),
+    ("תודה רבה!", "thanks"),
+    ("היי", "greeting"),
+])
+def test_natural_phrases(router, text, intent):
+    assert router.route(text).intent == intent
+
+
+def test_phrases_match_whole_tokens(router):
+    # "הי" must not fire inside "היום"
+    assert router.route("קניתי היום פיתה ב-5") is None
+
+
+def test_longer_overlapping_phrase_wins(router):
+    # "מה המצב" (greeting) is part of the longer balance query
+    assert router.route("מה המצב עם הכסף").intent == "show_remaining_budgets"
+    # "מה אפשר" (categories) is part of the longer help phrase
+    assert router.route("מה אפשר לעשות פה").intent == "show_help"
+
+
+def test_priority_breaks_ties_between_separate_matches(router):
+    assert router.route("שלום, כמה נשאר").intent == "show_remaining_budgets"
+
+
+def test_matches_agree_with_brute_force():
+    phrases = {(intent, phrase): tokenize(phrase, drop_numbers=False)
+               for intent, group in NATURAL_INTENTS for phrase in group}
+    vocabulary = sorted({t for tokens in phrases.values() for t in tokens} | {"קפה", "50"})
+    router = IntentRouter(NATURAL_INTENTS)
+    rng = random.Random(7)
+    for _ in range(500):
+        tokens = [rng.choice(vocabulary) for _ in range(rng.randint(1, 8))]
+        expected = sorted(
+            (intent, phrase, start)
+            for (intent, phrase), pattern in phrases.items()
+            for start in range(len(tokens) - len(pattern) + 1)
+            if tokens[start:start + len(pattern)] == pattern
+        )
+        found = sorted((m.intent, m.phrase, m.start) for m in router.matches(" ".join(tokens)))
+        assert found == expected
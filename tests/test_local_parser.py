@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+
+import pytest
+
+from local_parser import parse_price, parse_simple_expense
+
+TODAY = date.today().isoformat()
+
+
+@pytest.mark.parametrize("text,price", [
+    ("נטפליקס 39.9", 39.9),
+    ("קפה 12", 12),
+    ("מחשב 1,250", 1250),
+    ("קפה", None),
+    ("קפה 12 ועוגה 8", None),
+])
+def test_parse_price(text, price):
+    assert parse_price(text) == price
+
+
+@pytest.mark.parametrize("text,description,price", [
+    ("נטפליקס 39.9", "נטפליקס", 39.9),
+    ("קניתי פלאפל ב-18", "פלאפל", 18),
+    ("פלאפל עשרים", "פלאפל", 20),
+    ("שילמתי על חשמל 350 שקל", "חשמל", 350),
+])
+def test_parse_simple_expense(text, description, price):
+    assert parse_simple_expense(text) == {"פירוט": description, "מחיר": price, "תאריך": TODAY}
+
+
+def test_relative_date_is_resolved():
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    assert parse_simple_expense("פיצה 60 אתמול")["תאריך"] == yesterday
+
+
+@pytest.mark.parametrize("text", [
+    "כמה נשאר בקניות 100",          # Question word
+    "קפה 12?",                      # Question mark
+    "קפה 12 ועוגה 8",               # Two amounts
+    "קפה",                          # No amount
+    "קפה 0",                        # Zero
+    "פיצה 60 אתמול או שלשום",        # Two dates
+    "קפה עוגה לחם חלב ביצים גבינה 40",  # Too long to be a simple expense
+])
+def test_not_a_simple_expense(text):
+    assert parse_simple_expense(text) is None
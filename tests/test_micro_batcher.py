@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from circuit_breaker import CircuitOpenError, ProviderUnavailableError
+from micro_batcher import MicroBatcher
+from optimized_gpt import OptimizedGPT_API
+
+
+def submit_all(batcher, items, timeout=2.0):
+    results = {}
+
+    def submit(item):
+        results[item] = batcher.submit(item, timeout=timeout)
+
+    threads = [threading.Thread(target=submit, args=(item,)) for item in items]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_flushes_when_the_batch_is_full():
+    batches = []
+
+    def process(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(process, max_batch=3, max_wait=5.0)
+    started = time.time()
+    assert submit_all(batcher, [1, 2, 3]) == {1: 2, 2: 4, 3: 6}
+    assert time.time() - started < 1.0  # Did not wait for max_wait
+    assert sorted(batches[0]) == [1, 2, 3]
+    batcher.close()
+
+
+def test_flushes_a_partial_batch_after_max_wait():
+    batches = []
+
+    def process(items):
+        batches.append(list(items))
+        return list(items)
+
+    batcher = MicroBatcher(process, max_batch=10, max_wait=0.05)
+    assert batcher.submit("only", timeout=2.0) == "only"
+    assert batches == [["only"]]
+    batcher.close()
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    def process(items):
+        raise ValueError("bad batch")
+
+    batcher = MicroBatcher(process, max_batch=2, max_wait=0.05)
+    with pytest.raises(ValueError):
+        batcher.submit("a", timeout=2.0)
+    batcher.close()
+
+
+def test_batch_wait_timeout_is_answered_in_limited_mode():
+    gpt = OptimizedGPT_API(api_key="test", tier_deadline=0.05)
+    gpt._analyze_messages = lambda items: time.sleep(1.5) or [None] * len(items)  # A hung batch call
+    gpt._analyze_message = lambda *args: pytest.fail("must not retry alone after the budget is spent")
+    gpt.enable_micro_batching(max_batch=2, max_wait=0.01)
+    started = time.time()
+    with pytest.raises(ProviderUnavailableError):
+        gpt.process_message_batch("קפה 12", ["אוכל בחוץ"])
+    assert time.time() - started < 1.4
+    assert issubclass(ProviderUnavailableError, CircuitOpenError)
@@ -0,0 +1,41 @@
+import pytest
+
+from month_calendar import looks_like_month, next_month_name, parse_month
+
+
+@pytest.mark.parametrize("current,expected", [
+    ("יולי", "אוגוסט"),
+    ("דצמבר 2025", "ינואר 2026"),
+    ("תקציב יולי 2025", "תקציב אוגוסט 2025"),
+    ("July", "August"),
+    ("JULY 2025", "AUGUST 2025"),
+    ("dec-25", "jan-26"),
+    ("Sept 2025", "Oct 2025"),
+    ("2025-07", "2025-08"),
+    ("2025-12", "2026-01"),
+    ("12/2025", "01/2026"),
+    ("7.25", "8.25"),
+])
+def test_next_month_name(current, expected):
+    assert next_month_name(current) == expected
+
+
+def test_unknown_names_are_left_to_the_caller():
+    assert next_month_name("Sheet1") is None
+    assert next_month_name("2025-13") is None
+
+
+@pytest.mark.parametrize("name,expected", [
+    ("מרס 2025", (3, 2025)),
+    ("Jul-25", (7, 2025)),
+    ("07/2025", (7, 2025)),
+    ("אוגוסט", (8, None)),
+    ("תקציב", None),
+])
+def test_parse_month(name, expected):
+    assert parse_month(name) == expected
+
+
+def test_looks_like_month():
+    assert looks_like_month("יולי 2025")
+    assert not looks_like_month("כמה נשאר לי בקניות ביולי")
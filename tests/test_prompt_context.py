@@ -0,0 +1,37 @@
+from datetime import date
+
+from prompt_context import build_prompt_context
+
+TODAY = date(2025, 7, 16)  # A Wednesday; the week started on Sunday the 13th
+SUMMARY = [
+    {"קטגוריה": "קניות", "תקציב": "1,000", "כמה יצא": "450", "כמה נשאר": "550"},
+    {"קטגוריה": "בילויים", "תקציב": 200, "כמה יצא": "", "כמה נשאר": ""},
+]
+TRANSACTIONS = [
+    {"קטגוריה": "קניות", "פירוט": "סופר", "מחיר": 450, "תאריך": "01/07/2025"},
+    {"קטגוריה": "בילויים", "פירוט": "סרט", "מחיר": "250", "תאריך": "2025-07-14"},
+]
+
+
+def test_digest_sections():
+    lines = build_prompt_context(SUMMARY, TRANSACTIONS, today=TODAY).split("\n")
+    assert lines[0] == "היום 2025-07-16"
+    assert "קניות 1000/450/550" in lines
+    # Blank sheet figures fall back to the transactions, and overspending is flagged
+    assert "בילויים 200/250/-50 !חריגה" in lines
+    assert "סה\"כ 1200/700/500" in lines
+    assert "השבוע 250" in lines and "29/06 450" in lines
+    assert lines.index("הגדולות:") + 1 == lines.index("סופר 450 קניות 01/07")
+    assert lines[lines.index("אחרונות:") + 1] == "סרט 250 בילויים 14/07"  # Newest (last row) first
+
+
+def test_character_budget_keeps_whole_lines_in_priority_order():
+    full = build_prompt_context(SUMMARY, TRANSACTIONS, today=TODAY)
+    short = build_prompt_context(SUMMARY, TRANSACTIONS, today=TODAY, max_chars=60)
+    assert len(short) <= 60
+    assert full.startswith(short)
+    assert short.split("\n")[0] == "היום 2025-07-16"
+
+
+def test_empty_data():
+    assert build_prompt_context([], [], today=TODAY) == "היום 2025-07-16"
@@ -0,0 +1,120 @@
+from datetime import date
+
+import pytest
+
+from response_validation import (ResponseValidationError, coerce_date, coerce_price, extract_json,
+                                 snap_category, validate_batch_result, validate_budget_categories,
+                                 validate_multi_batch_result)
+
+CATEGORIES = ["קניות", "אוכל בחוץ", "תחבורה"]
+TODAY = date(2025, 7, 16)
+
+
+def test_mixed_valid_and_invalid_expenses_keep_the_rejected_items():
+    result = validate_batch_result({
+        "message_type": "budget_entry",
+        "confidence": 0.9,
+        "expenses": [
+            {"קטגוריה": "קניות", "פירוט": "חלב", "מחיר": 12, "תאריך": "2025-07-16"},
+            {"קטגוריה": "חופשה", "פירוט": "טיסה", "מחיר": 900, "תאריך": "2025-07-16"},
+            {"קטגוריה": "תחבורה", "פירוט": "מונית", "מחיר": "", "תאריך": "2025-07-16"},
+        ]
+    }, CATEGORIES, TODAY)
+
+    assert [e["פירוט"] for e in result["expenses"]] == ["חלב"]
+    assert result["rejected"] == [
+        {"קטגוריה": "חופשה", "פירוט": "טיסה", "מחיר": 900, "תאריך": "2025-07-16", "reason": "unknown_category"},
+        {"קטגוריה": "תחבורה", "פירוט": "מונית", "מחיר": None, "תאריך": "2025-07-16", "reason": "missing_price"},
+    ]
+    assert result["expense_data"] == result["expenses"][0]
+
+
+def test_all_items_rejected_leaves_no_expenses():
+    result = validate_batch_result({
+        "message_type": "budget_entry",
+        "expenses": [{"קטגוריה": "חופשה", "פירוט": "טיסה", "מחיר": 900}]
+    }, CATEGORIES, TODAY)
+    assert result["expenses"] == [] and result["expense_data"] == {}
+    assert result["rejected"][0]["reason"] == "unknown_category"
+
+
+def test_budget_entry_without_expenses_is_unusable():
+    with pytest.raises(ResponseValidationError):
+        validate_batch_result({"message_type": "budget_entry", "expenses": []}, CATEGORIES, TODAY)
+
+
+@pytest.mark.parametrize("raw,expected", [
+    ('{"a": 1}', {"a": 1}),
+    ('```json\n{"a": 1}\n```', {"a": 1}),
+    ('הנה התשובה: {"a": [1, 2,],} בהצלחה', {"a": [1, 2]}),
+    ('{\n  "a": 1, // comment\n  "b": 2\n}', {"a": 1, "b": 2}),
+    ('[{"index": 0}]', [{"index": 0}]),
+])
+def test_extract_json_repairs_common_damage(raw, expected):
+    assert extract_json(raw) == expected
+
+
+@pytest.mark.parametrize("raw", ["no json here", '{"a": 1', '{"a": }'])
+def test_extract_json_gives_up_on_hopeless_replies(raw):
+    with pytest.raises(ResponseValidationError):
+        extract_json(raw)
+
+
+@pytest.mark.parametrize("value,expected", [
+    (39.9, 39.9), ("39.9₪", 39.9), ("1,200 ש\"ח", 1200), (18, 18), ("", None), (0, None), (-5, None), (True, None),
+])
+def test_coerce_price(value, expected):
+    assert coerce_price(value) == expected
+
+
+@pytest.mark.parametrize("value,expected", [
+    ("2025-07-10", "2025-07-10"), ("10/07/2025", "2025-07-10"), ("אתמול", "2025-07-15"),
+    ("28/12", "2024-12-28"), ("", "2025-07-16"), ("לא תאריך", "2025-07-16"),
+])
+def test_coerce_date(value, expected):
+    assert coerce_date(value, TODAY) == expected
+
+
+@pytest.mark.parametrize("value,expected", [
+    ("קניות", "קניות"),
+    ("בקניות", "קניות"),
+    ("אוכל-בחוץ", "אוכל בחוץ"),
+    ("תחבורא", "תחבורה"),
+    ("חופשה", None),
+])
+def test_snap_category(value, expected):
+    assert snap_category(value, CATEGORIES) == expected
+
+
+def test_validate_batch_result_repairs_fields():
+    result = validate_batch_result({
+        "message_type": " Budget_Entry ",
+        "confidence": "1.7",
+        "expense_data": {"קטגוריה": "בקניות", "פירוט": " חלב ", "מחיר": "12₪", "תאריך": "אתמול"}
+    }, CATEGORIES, TODAY)
+    assert result["message_type"] == "budget_entry" and result["confidence"] == 1.0
+    assert result["expenses"] == [{"קטגוריה": "קניות", "פירוט": "חלב", "מחיר": 12, "תאריך": "2025-07-15"}]
+
+
+def test_validate_batch_result_rejects_unknown_message_types():
+    with pytest.raises(ResponseValidationError):
+        validate_batch_result({"message_type": "spam"}, CATEGORIES, TODAY)
+    with pytest.raises(ResponseValidationError):
+        validate_batch_result(["not", "an", "object"], CATEGORIES, TODAY)
+
+
+def test_validate_multi_batch_result_maps_by_index():
+    results = validate_multi_batch_result({"results": [
+        {"index": 2, "message_type": "question"},
+        {"index": 0, "message_type": "budget_entry", "expenses": [{"קטגוריה": "קניות", "מחיר": 5}]},
+        {"index": 1, "message_type": "nonsense"},
+    ]}, 3, CATEGORIES, TODAY)
+    assert results[0]["expenses"][0]["מחיר"] == 5
+    assert results[1] is None  # Left for the caller to retry alone
+    assert results[2]["message_type"] == "question"
+
+
+def test_validate_budget_categories():
+    assert validate_budget_categories({"categories": [
+        {"קטגוריה": "קניות", "תקציב": "1,500"}, {"קטגוריה": "", "תקציב": 100}, {"קטגוריה": "רכב"}
+    ]}) == [{"קטגוריה": "קניות", "תקציב": 1500.0}]
@@ -0,0 +1,55 @@
+import random
+import re
+
+import pytest
+
+from sheets_IO import SheetsIO
+
+
+@pytest.mark.parametrize("current,value,same", [
+    (100, 100.0, True),
+    ("100", 100.0, True),
+    (0.1 + 0.2, 0.3, True),
+    (100, 100.5, False),
+    ("", 0.0, False),
+    (None, 0.0, False),
+    ("#REF!", 0.0, False),
+])
+def test_same_number(current, value, same):
+    assert SheetsIO._same_number(current, value) is same
+
+
+def test_single_cell():
+    assert SheetsIO._merge_cell_updates("S", {(5, 3): 7.0}) == [{"range": "S!D5", "values": [[7.0]]}]
+
+
+def test_row_run_and_block():
+    cells = {(2, 2): 1, (2, 3): 2, (3, 2): 3, (3, 3): 4, (5, 3): 5}
+    assert SheetsIO._merge_cell_updates("S", cells) == [
+        {"range": "S!C2:D3", "values": [[1, 2], [3, 4]]},
+        {"range": "S!D5", "values": [[5]]},
+    ]
+
+
+def test_different_runs_on_consecutive_rows_stay_separate():
+    cells = {(2, 2): 1, (2, 3): 2, (3, 3): 3}
+    assert [u["range"] for u in SheetsIO._merge_cell_updates("S", cells)] == ["S!C2:D2", "S!D3"]
+
+
+def _cells_of(update):
+    sheet_range = update["range"].split("!")[1]
+    corners = [(int(m.group(2)), ord(m.group(1)) - 65) for m in re.finditer(r"([A-Z])(\d+)", sheet_range)]
+    (r0, c0), (r1, c1) = corners[0], corners[-1]
+    return {(r, c): update["values"][r - r0][c - c0] for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)}
+
+
+def test_updates_cover_exactly_the_changed_cells():
+    rng = random.Random(3)
+    for _ in range(200):
+        cells = {(rng.randint(2, 12), rng.randint(1, 4)): float(rng.randint(0, 999)) for _ in range(rng.randint(1, 20))}
+        written = {}
+        for update in SheetsIO._merge_cell_updates("Budget", cells):
+            block = _cells_of(update)
+            assert not set(block) & set(written)
+            written.update(block)
+        assert written == cells
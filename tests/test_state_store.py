@@ -0,0 +1,206 @@
+import threading
+import time
+
+import pytest
+
+from state_store import MemoryStateStore, RedisStateStore, SQLiteStateStore, StateStore, open_state_store
+
+
+class FakeRedis:
+    """
+    Minimal in-process stand-in for the redis-py calls RedisStateStore makes:
+    GET, SET (NX, PX), DELETE and WATCH/MULTI/EXEC pipelines. Values come back
+    as bytes, as from a real server.
+    """
+
+    def __init__(self):
+        self._data = {}      # name -> (bytes, expires_at)
+        self._versions = {}  # name -> writes so far, for WATCH
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            return self._live(name)
+
+    def set(self, name, value, nx=False, px=None):
+        with self._lock:
+            if nx and self._live(name) is not None:
+                return None
+            self._write(name, value, px)
+            return True
+
+    def delete(self, name):
+        with self._lock:
+            self._data.pop(name, None)
+            self._versions[name] = self._versions.get(name, 0) + 1
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def _live(self, name):
+        entry = self._data.get(name)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self._data[name]
+            entry = None
+        return entry[0] if entry else None
+
+    def _write(self, name, value, px):
+        self._data[name] = (value.encode(), time.time() + px / 1000 if px else None)
+        self._versions[name] = self._versions.get(name, 0) + 1
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self._watched = {}
+        self._queued = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def watch(self, name):
+        self._watched[name] = self.client._versions.get(name, 0)
+
+    def get(self, name):
+        return self.client.get(name)
+
+    def multi(self):
+        self._queued = []
+
+    def set(self, name, value, px=None):
+        self._queued.append(("set", name, value, px))
+
+    def delete(self, name):
+        self._queued.append(("delete", name))
+
+    def execute(self):
+        with self.client._lock:
+            if any(self.client._versions.get(name, 0) != seen for name, seen in self._watched.items()):
+                raise RedisStateStore._watch_error()("Watched variable changed")
+            for command in self._queued:
+                if command[0] == "set":
+                    self.client._write(command[1], command[2], command[3])
+                else:
+                    self.client._data.pop(command[1], None)
+                    self.client._versions[command[1]] = self.client._versions.get(command[1], 0) + 1
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis", "fakeredis"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStateStore()
+    if request.param == "redis":
+        return RedisStateStore(FakeRedis())
+    if request.param == "fakeredis":
+        fakeredis = pytest.importorskip("fakeredis")
+        return RedisStateStore(fakeredis.FakeRedis())
+    return SQLiteStateStore(str(tmp_path / "state.sqlite3"))
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        StateStore()
+
+
+def test_get_set_delete(store):
+    assert store.get("k") is None
+    store.set("k", {"step": 1, "items": ["a"]})
+    assert store.get("k") == {"step": 1, "items": ["a"]}
+    store.delete("k")
+    assert store.get("k") is None
+
+
+def test_values_are_copies(store):
+    store.set("k", {"items": []})
+    store.get("k")["items"].append("x")
+    assert store.get("k") == {"items": []}
+
+
+def test_add_only_when_absent(store):
+    assert store.add("k", 1)
+    assert not store.add("k", 2)
+    assert store.get("k") == 1
+
+
+def test_ttl_expires(store):
+    store.set("short", 1, ttl=0.05)
+    assert store.add("lease", "a", ttl=0.05)
+    time.sleep(0.1)
+    assert store.get("short") is None
+    assert store.add("lease", "b", ttl=0.05)
+
+
+def test_compare_and_set(store):
+    assert store.compare_and_set("k", None, {"v": 1})      # Absent → create
+    assert not store.compare_and_set("k", None, {"v": 2})  # No longer absent
+    assert not store.compare_and_set("k", {"v": 0}, {"v": 2})
+    assert store.compare_and_set("k", {"v": 1}, {"v": 2})
+    assert store.get("k") == {"v": 2}
+    assert store.compare_and_set("k", {"v": 2}, None)      # new=None deletes
+    assert store.get("k") is None
+
+
+def test_update_retries_after_a_conflict(store):
+    store.set("count", 0)
+    calls = []
+
+    def change(value):
+        calls.append(value)
+        if len(calls) == 1:
+            store.set("count", 10)  # Another writer wins the first round
+        return value + 1
+
+    assert store.update("count", change) == (True, 11)
+    assert calls == [0, 10]
+
+
+def test_update_gives_up_after_retries(store):
+    store.set("count", 0)
+
+    def change(value):
+        store.set("count", store.get("count") + 1)  # Always conflicts
+        return value + 1
+
+    assert store.update("count", change, retries=3) == (False, None)
+
+
+def test_concurrent_updates_are_not_lost(tmp_path):
+    # Two connections to one file stand in for two worker processes
+    path = str(tmp_path / "shared.sqlite3")
+    stores = [SQLiteStateStore(path), SQLiteStateStore(path)]
+
+    def worker(store):
+        for _ in range(50):
+            assert store.update("count", lambda v: (v or 0) + 1, retries=100)[0]
+
+    threads = [threading.Thread(target=worker, args=(stores[i % 2],)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stores[0].get("count") == 200
+
+
+def test_open_state_store(tmp_path):
+    assert open_state_store("").backend == "memory"
+    assert open_state_store("memory://").backend == "memory"
+    assert open_state_store("bogus://x").backend == "memory"
+    assert open_state_store(f"sqlite:///{tmp_path}/s.sqlite3").backend == "sqlite"
+
+
+def test_redis_cas_loses_to_a_write_between_watch_and_exec():
+    client = FakeRedis()
+    store = RedisStateStore(client)
+    store.set("k", {"v": 1})
+
+    class Interfering(FakePipeline):
+        def multi(self):
+            client.set("budgetbot:k", '{"v":9}')  # Another instance writes after WATCH
+            super().multi()
+
+    client.pipeline = lambda: Interfering(client)
+    assert not store.compare_and_set("k", {"v": 1}, {"v": 2})
+    assert store.get("k") == {"v": 9}
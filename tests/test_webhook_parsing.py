@@ -0,0 +1,49 @@
+import pytest
+
+whatsapp = pytest.importorskip("whatsapp")
+
+
+def _message(msg_id, ts, text=None, msg_type="text", sender="972500000000"):
+    message = {"from": sender, "id": msg_id, "timestamp": str(ts), "type": msg_type}
+    if text is not None:
+        message["text"] = {"body": text}
+    return message
+
+
+def _payload(*values):
+    return {"entry": [{"changes": [{"value": value}]} for value in values]}
+
+
+def test_batched_messages_are_flattened_oldest_first():
+    data = _payload(
+        {"messages": [_message("m3", 300, "שלישי"), _message("m1", 100, "ראשון")]},
+        {"messages": [_message("m2", 200, "שני", sender="972511111111")]},
+    )
+    parsed = whatsapp.parse_meta_webhook(data)
+    assert [m["message_id"] for m in parsed] == ["m1", "m2", "m3"]
+    assert parsed[0] == {"sender": "972500000000", "message": "ראשון", "message_id": "m1", "timestamp": 100.0}
+    assert parsed[1]["sender"] == "972511111111"
+
+
+def test_non_text_messages_get_a_type_placeholder():
+    parsed = whatsapp.parse_meta_webhook(_payload({"messages": [_message("img", 100, msg_type="image")]}))
+    assert parsed[0]["message"] == "[image]"
+
+
+def test_statuses_are_counted_not_returned(monkeypatch):
+    monkeypatch.setattr(whatsapp, "WEBHOOK_STATUS_COUNTS", {})
+    data = _payload({"statuses": [{"status": "delivered"}, {"status": "read"}, {"status": "delivered"}]})
+    assert whatsapp.parse_meta_webhook(data) == []
+    assert whatsapp.WEBHOOK_STATUS_COUNTS == {"delivered": 2, "read": 1}
+
+
+def test_bad_timestamp_falls_back_to_now():
+    message = _message("m1", 0, "היי")
+    message["timestamp"] = "not-a-number"
+    parsed = whatsapp.parse_meta_webhook(_payload({"messages": [message]}))
+    assert parsed[0]["timestamp"] > 0
+
+
+def test_empty_or_malformed_payload():
+    assert whatsapp.parse_meta_webhook({}) == []
+    assert whatsapp.parse_meta_webhook({"entry": [{"changes": [{"value": None}]}]}) == []
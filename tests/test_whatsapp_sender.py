@@ -0,0 +1,96 @@
+import json
+
+import pytest
+import requests
+
+from whatsapp_sender import WhatsAppSender
+
+
+def response(status, body=None, headers=None):
+    r = requests.Response()
+    r.status_code = status
+    r._content = json.dumps(body).encode() if body is not None else b"not json"
+    r.headers.update(headers or {})
+    return r
+
+
+class FakeSession:
+    """Returns (or raises) the scripted outcomes in order and records the payloads."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.payloads = []
+
+    def post(self, url, json=None, timeout=None):
+        self.payloads.append(json)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def sender():
+    sender = WhatsAppSender("token", "123", max_retries=3, backoff_base=0.001, backoff_max=0.01,
+                            rate_per_second=1000)
+    yield sender
+    sender.close()
+
+
+@pytest.mark.parametrize("reply,retry", [
+    (response(429), True),
+    (response(500), True),
+    (response(503), True),
+    (response(400, {"error": {"code": 131056}}), True),   # Pair rate limit sent as HTTP 400
+    (response(400, {"error": {"code": 4}}), True),        # App-level throttling
+    (response(400, {"error": {"code": 100}}), False),     # Invalid parameter
+    (response(401, {"error": {"code": 190}}), False),     # Bad token
+    (response(400), False),                               # Body is not JSON
+])
+def test_should_retry(sender, reply, retry):
+    assert sender._should_retry(reply) is retry
+
+
+def test_rate_limits_are_counted(sender):
+    sender._should_retry(response(429))
+    sender._should_retry(response(400, {"error": {"code": 130429}}))
+    assert sender.stats()["rate_limited"] == 2
+
+
+@pytest.mark.parametrize("header,delay", [("0.005", 0.005), ("120", 0.01), ("soon", None), (None, None)])
+def test_retry_after_is_capped_at_backoff_max(sender, header, delay):
+    reply = response(429, headers={"Retry-After": header} if header else {})
+    assert sender._retry_after(reply) == delay
+
+
+def test_backoff_is_jittered_and_capped(sender):
+    assert all(0 <= sender._backoff(attempt) <= 0.01 for attempt in range(10))
+
+
+def test_transient_failures_are_retried(sender):
+    sender.session = FakeSession(response(503), requests.exceptions.ConnectionError("reset"), response(200, {}))
+    assert sender.send_text("whatsapp:972500000000", "שלום")
+    assert len(sender.session.payloads) == 3
+    assert sender.session.payloads[0]["to"] == "972500000000"
+    assert sender.stats()["retries"] == 2 and sender.stats()["sent"] == 1
+
+
+def test_read_timeout_is_not_retried(sender):
+    sender.session = FakeSession(requests.exceptions.ReadTimeout("slow"), response(200, {}))
+    assert not sender.send_text("972500000000", "שלום")
+    assert len(sender.session.payloads) == 1  # The first attempt may have been delivered
+
+
+def test_permanent_errors_are_not_retried(sender):
+    sender.session = FakeSession(response(400, {"error": {"code": 100}}))
+    assert not sender.send_text("972500000000", "שלום")
+    assert sender.stats()["failed"] == 1
+
+
+def test_gives_up_after_max_retries(sender):
+    sender.session = FakeSession(*[response(503)] * 4)
+    assert not sender.send_text("972500000000", "שלום")
+    assert len(sender.session.payloads) == 4
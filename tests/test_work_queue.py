@@ -0,0 +1,89 @@
+import threading
+import time
+
+from work_queue import WorkQueue, _percentile
+
+
+def make_queue(workers=1, **kwargs):
+    done = []
+    gate = threading.Event()
+
+    def handler(job):
+        if job.get("wait"):
+            gate.wait(timeout=2)
+        time.sleep(job.get("sleep", 0))
+        done.append((job["sender"], job["n"]))
+
+    queue = WorkQueue(handler, workers=workers, lane_key=lambda job: job["sender"], **kwargs)
+    return queue, done, gate
+
+
+def test_each_sender_is_processed_in_order():
+    queue, done, _ = make_queue(workers=4)
+    for n in range(20):
+        for sender in ("a", "b", "c"):
+            queue.submit({"sender": sender, "n": n, "sleep": 0.001})
+    queue.close()
+    for sender in ("a", "b", "c"):
+        assert [n for s, n in done if s == sender] == list(range(20))
+
+
+def test_one_sender_runs_one_job_at_a_time():
+    running, overlaps = [], []
+
+    def handler(job):
+        running.append(job["n"])
+        if len(running) > 1:
+            overlaps.append(job["n"])
+        time.sleep(0.005)
+        running.remove(job["n"])
+
+    queue = WorkQueue(handler, workers=4, lane_key=lambda job: job["sender"])
+    for n in range(10):
+        queue.submit({"sender": "a", "n": n})
+    queue.close()
+    assert overlaps == []
+
+
+def test_lanes_take_turns():
+    queue, done, gate = make_queue(workers=1)
+    queue.submit({"sender": "chatty", "n": 1, "wait": True})
+    time.sleep(0.05)  # The worker is now busy with chatty's first message
+    queue.submit({"sender": "chatty", "n": 2})
+    queue.submit({"sender": "chatty", "n": 3})
+    queue.submit({"sender": "quiet", "n": 1})
+    gate.set()
+    queue.close()
+    assert done == [("chatty", 1), ("quiet", 1), ("chatty", 2), ("chatty", 3)]
+
+
+def test_full_queue_and_full_lane_reject():
+    queue, _, gate = make_queue(workers=1, max_size=3, max_lane_depth=1)
+    assert queue.submit({"sender": "a", "n": 1, "wait": True})
+    time.sleep(0.05)
+    assert queue.submit({"sender": "a", "n": 2})
+    assert not queue.submit({"sender": "a", "n": 3})  # Lane full
+    assert queue.submit({"sender": "b", "n": 1})
+    assert queue.submit({"sender": "c", "n": 1})
+    assert not queue.submit({"sender": "d", "n": 1})  # Queue full
+    assert queue.stats()["rejected"] == 2
+    gate.set()
+    queue.close()
+
+
+def test_failures_are_counted_and_close_rejects_new_jobs():
+    def handler(job):
+        raise RuntimeError("boom")
+
+    queue = WorkQueue(handler, workers=2)
+    for n in range(3):
+        queue.submit({"n": n})
+    queue.close()
+    assert queue.stats()["failed"] == 3
+    assert not queue.submit({"n": 4})
+
+
+def test_percentile():
+    assert _percentile([], 0.5) is None
+    assert _percentile([0.001, 0.002, 0.010], 0.5) == 2
+    assert _percentile([0.001, 0.002, 0.010], 0.95) == 10
@@ -1,14 +1,27 @@
 import os
-import requests
+import copy
+import atexit
 import json
 import time
-import hashlib
 import threading
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from flask import Flask, request
 from sheets_IO import SheetsIO, Sheets_analyzer
-from optimized_gpt import OptimizedGPT_API as GPT_API
+from async_gpt import AsyncOptimizedGPT_API as GPT_API
+from category_memory import CategoryMemory, DEFAULT_MEMORY_PATH
+from local_parser import parse_simple_expense
+from hebrew_normalizer import normalize_message
+from intent_router import IntentRouter, NATURAL_INTENTS
+from work_queue import WorkQueue
+from dedup_store import DedupStore
+from state_store import open_state_store
+from whatsapp_sender import WhatsAppSender
+from health_monitor import HealthMonitor
+from confirmation import classify_confirmation
+from circuit_breaker import CircuitOpenError
+from hebrew_text import description_tokens
+from month_calendar import next_month_name, looks_like_month
 
 # ---------------------------------------------------------------------------
 # Load configuration - Environment variables for production or keys.json for local
@@ -65,9 +78,26 @@ print(f"DEBUG: Final TRACKER_SPREADSHEET_ID = '{TRACKER_SPREADSHEET_ID}'")
 sheets_io = SheetsIO(BUDGET_SPREADSHEET_ID, TRACKER_SPREADSHEET_ID) if BUDGET_SPREADSHEET_ID and TRACKER_SPREADSHEET_ID else None
 gpt = None
 
-# Smart deduplication with persistent storage
+# Optional SQLite file for GPT responses shared by workers on this host
+GPT_CACHE_PATH = os.getenv("GPT_CACHE_PATH") or None
+GPT_MAX_CONCURRENCY = int(os.getenv("GPT_MAX_CONCURRENCY", "8"))  # In-flight completions per process
+GPT_CALL_DEADLINE = float(os.getenv("GPT_CALL_DEADLINE", "20"))     # Seconds per completion, including queueing
+GPT_TIER_DEADLINE = float(os.getenv("GPT_TIER_DEADLINE", "30"))     # Seconds for a whole tier fallback chain
+GPT_FAST_MODEL = os.getenv("GPT_FAST_MODEL", "gpt-4.1-nano")     # Short extractions and yes/no
+GPT_STRONG_MODEL = os.getenv("GPT_STRONG_MODEL", "gpt-4.1")       # Analytical questions and long plans
+GPT_MICRO_BATCH_MS = int(os.getenv("GPT_MICRO_BATCH_MS", "0"))       # Extraction batching window, 0 = off
+# Webhook jobs run in the background: one FIFO lane per sender, lanes in parallel
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+WEBHOOK_MAX_PER_SENDER = int(os.getenv("WEBHOOK_MAX_PER_SENDER", "50"))
+# Outbound replies: per-number send rate and an optional send queue (0 = send from the webhook worker)
+WHATSAPP_SEND_RATE = float(os.getenv("WHATSAPP_SEND_RATE", "80"))
+WHATSAPP_SEND_WORKERS = int(os.getenv("WHATSAPP_SEND_WORKERS", "0"))
+
+# Budget refresh runs in the background under a lease in the state store (no Sheets round trip)
 REFRESH_COOLDOWN_SECONDS = 30  # Prevent refresh spam
-LAST_REFRESH_CELL = "Config!E1"  # Store last refresh timestamp in sheets
+REFRESH_MAX_RUN_SECONDS = 300  # Lease while running; a crashed run frees it after this
+REFRESH_LEASE_KEY = "budget_refresh_lease"
 
 # ---------------------------------------------------------------------------
 # Initialize helpers with new architecture
@@ -79,71 +109,182 @@ analyzer = Sheets_analyzer(BUDGET_SPREADSHEET_ID)
 analyzer.sheets_io = sheets_io  # type: ignore  # Link for compatibility
 app = Flask(__name__)
 
-# Use message ID for deduplication instead of content hash
-PROCESSED_MESSAGE_IDS = {}  # {message_id: timestamp}
-MESSAGE_ID_CACHE_TTL = 300  # 5 minutes
+# Conversation state shared by workers and instances (memory://, sqlite:///path or redis://host)
+STATE_STORE_URL = os.getenv("STATE_STORE_URL", "")
+state_store = open_state_store(STATE_STORE_URL)
+if sheets_io:
+    sheets_io.version_store = state_store  # Every worker's writes invalidate every worker's cached answers
+
+# Deduplicate Meta redeliveries by WhatsApp message ID (shared by workers via SQLite if configured,
+# and across instances when the state store is shared, e.g. Redis)
+MESSAGE_ID_CACHE_TTL = 24 * 3600  # Meta retries failed deliveries for a long time
+message_dedup = DedupStore(ttl=MESSAGE_ID_CACHE_TTL, path=os.getenv("MESSAGE_DEDUP_PATH") or None,
+                           store=state_store if state_store.backend == "redis" else None)
+
+# Pooled connection to graph.facebook.com with timeouts, retries and throttling
+whatsapp_sender = WhatsAppSender(WHATSAPP_TOKEN, WHATSAPP_PHONE_NUMBER_ID, rate_per_second=WHATSAPP_SEND_RATE,
+                                 pool_size=max(WEBHOOK_WORKERS, WHATSAPP_SEND_WORKERS, 1),
+                                 queue_workers=WHATSAPP_SEND_WORKERS)
+atexit.register(whatsapp_sender.close)  # atexit is LIFO: runs after the webhook queue (registered later) drains
+
+# Learned description → category memory (fast path without GPT)
+category_memory = CategoryMemory(os.getenv("CATEGORY_MEMORY_PATH", DEFAULT_MEMORY_PATH))
+atexit.register(category_memory.close)  # Runs after the webhook queue drains (atexit is LIFO)
+FAST_PATH_MIN_CONFIDENCE = 0.8  # Share of past votes for the winning category
+FAST_PATH_MIN_COUNT = 2         # Times the category was seen for this item
+QUESTION_CONTEXT_TX_LIMIT = 1000  # Transactions summarized into the question prompt
+
+def seed_category_memory():
+    """Build the category memory from tracker history if nothing was persisted."""
+    if not sheets_io or len(category_memory) > 0:
+        return
+    try:
+        rows = sheets_io.get_tracker_history()
+        learned = category_memory.build_from_rows(rows)
+        print(f"Category memory seeded with {learned} past expenses")
+    except Exception as e:
+        print(f"Error seeding category memory: {e}")
+
+_gpt_lock = threading.Lock()
 
 def get_gpt():
-    """Get GPT client, initializing it if needed."""
+    """Get GPT client, building it if needed. Never makes a network call."""
     global gpt
     if gpt is None:
-        try:
-            print("Initializing GPT API with gpt-4.1-mini...")
-            gpt = GPT_API(api_key=GPT_API_KEY, model="gpt-4.1-mini")
-            test_response = gpt._call_chat([{"role": "user", "content": "Hello"}], temp=0, max_t=25)
-            print("GPT-4.1-mini initialization successful!")
-        except Exception as e:
-            print(f"ERROR: GPT-4.1-mini initialization failed: {e}")
-            print(f"API Key length: {len(GPT_API_KEY) if GPT_API_KEY else 'None'}")
-            print(f"API Key prefix: {GPT_API_KEY[:10] if GPT_API_KEY else 'None'}...")
-            gpt = None
+        with _gpt_lock:
+            if gpt is None:
+                try:
+                    print("Initializing GPT API with gpt-4.1-mini...")
+                    gpt = GPT_API(
+                        api_key=GPT_API_KEY,
+                        model="gpt-4.1-mini",
+                        cache_path=GPT_CACHE_PATH,
+                        max_concurrency=GPT_MAX_CONCURRENCY,
+                        deadline=GPT_CALL_DEADLINE,
+                        tier_deadline=GPT_TIER_DEADLINE,
+                        model_tiers={"fast": {"model": GPT_FAST_MODEL}, "strong": {"model": GPT_STRONG_MODEL}}
+                    )
+                    if GPT_MICRO_BATCH_MS > 0:
+                        gpt.enable_micro_batching(max_wait=GPT_MICRO_BATCH_MS / 1000)
+                except Exception as e:
+                    print(f"ERROR: GPT-4.1-mini initialization failed: {e}")
+                    print(f"API Key length: {len(GPT_API_KEY) if GPT_API_KEY else 'None'}")
+                    gpt = None
     return gpt
 
-def is_refresh_allowed(sender: str) -> tuple[bool, int, int]:
-    """Check if refresh is allowed using Google Sheets as persistent storage.
-    Returns (is_allowed, remaining_seconds, elapsed_seconds)"""
+# ---------------------------------------------------------------------------
+# Startup warm-up and background health probes (kept off the request path)
+# ---------------------------------------------------------------------------
+
+GPT_PROBE_INTERVAL = 300    # One tiny uncached completion every 5 minutes
+SHEETS_PROBE_INTERVAL = 60  # One single-cell read every minute
+_warmup_done = threading.Event()
+
+def check_gpt() -> dict:
+    """Health check: one tiny fast-tier completion outside the circuit breaker."""
+    gpt_client = get_gpt()
+    if not gpt_client:
+        raise RuntimeError("GPT client could not be created")
+    return gpt_client.probe_provider()
+
+def check_sheets() -> dict:
+    """Health check: a raw one-cell read (get_budget_categories hides errors behind defaults)."""
+    if not sheets_io:
+        raise RuntimeError("Sheets client is not configured")
+    sheets_io.ping()
+    return {}
+
+health_monitor = HealthMonitor()
+health_monitor.add_check("gpt_api", check_gpt, interval=GPT_PROBE_INTERVAL)
+health_monitor.add_check("google_sheets", check_sheets, interval=SHEETS_PROBE_INTERVAL)
+
+def warm_up():
+    """Initialize everything a first user request would otherwise pay for."""
     try:
-        # Get last refresh timestamp from sheets
-        last_refresh_str = sheets_io.get_config_value("last_refresh_timestamp")
-        if not last_refresh_str:
-            return (True, 0, 0)
-            
-        last_refresh = float(last_refresh_str)
-        current_time = time.time()
-        elapsed = int(current_time - last_refresh)
-        
-        # Check cooldown period
-        if elapsed < REFRESH_COOLDOWN_SECONDS:
-            remaining = int(REFRESH_COOLDOWN_SECONDS - elapsed)
-            return (False, remaining, elapsed)
-            
-        return (True, 0, elapsed)
+        get_gpt()
+        seed_category_memory()
+        if sheets_io:
+            sheets_io.get_working_sheet_name()  # Prime the working sheet cache
+        health_monitor.run_once()  # First probes, so /health has results right away
     except Exception as e:
-        print(f"Error checking refresh cooldown: {e}")
-        return (True, 0, 0)  # Allow refresh if we can't check
+        print(f"Warm-up error: {e}")
+    finally:
+        _warmup_done.set()
+        health_monitor.start()
+
+threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
 
-def set_refresh_timestamp():
-    """Set current timestamp as last refresh time in sheets."""
+# In-process refresh job: concurrent requests join the running job instead of starting another
+REFRESH_JOB = {"running": False, "waiters": [], "runs": 0, "coalesced": 0, "last_duration_ms": None}
+_refresh_lock = threading.Lock()
+
+def acquire_refresh_lease(sender: str) -> tuple[bool, dict]:
+    """Take the refresh lease; returns (acquired, current lease)."""
+    lease = {"state": "running", "started_at": time.time(), "by": sender}
     try:
-        current_time = str(time.time())
-        sheets_io.set_config_value("last_refresh_timestamp", current_time)
+        if state_store.add(REFRESH_LEASE_KEY, lease, ttl=REFRESH_MAX_RUN_SECONDS):
+            return True, lease
+        return False, state_store.get(REFRESH_LEASE_KEY) or {}
     except Exception as e:
-        print(f"Error setting refresh timestamp: {e}")
+        print(f"Error taking refresh lease: {e}")
+        return True, lease  # Allow refresh if we can't check
 
-def perform_smart_refresh(sender: str, user_info: dict) -> dict:
-    """Perform refresh with smart optimizations and return results."""
+def release_refresh_lease() -> None:
+    """Finish the run: the lease becomes the cooldown, counted from now."""
     try:
-        print(f"Starting smart refresh for {sender}")
+        state_store.set(REFRESH_LEASE_KEY, {"state": "done", "finished_at": time.time()},
+                        ttl=REFRESH_COOLDOWN_SECONDS)
+    except Exception as e:
+        print(f"Error releasing refresh lease: {e}")
+
+def request_budget_refresh(sender: str) -> str:
+    """Start (or join) a background refresh and return the immediate reply."""
+    user_info = get_user_info(sender)
+    
+    with _refresh_lock:
+        if REFRESH_JOB["running"]:
+            if sender not in REFRESH_JOB["waiters"]:
+                REFRESH_JOB["waiters"].append(sender)
+            REFRESH_JOB["coalesced"] += 1
+            return f"{user_info['emoji']} 🔄 **רענון התקציב כבר מתבצע**\n📬 אשלח את התוצאה כשיסתיים"
         
-        # Set refresh timestamp first
-        set_refresh_timestamp()
+        acquired, lease = acquire_refresh_lease(sender)
+        if not acquired:
+            if lease.get("state") == "running":
+                return f"{user_info['emoji']} 🔄 **רענון התקציב כבר מתבצע**\n⏱️ נסו שוב בעוד כדקה"
+            elapsed_seconds = int(time.time() - lease.get("finished_at", time.time()))
+            remaining_seconds = max(REFRESH_COOLDOWN_SECONDS - elapsed_seconds, 1)
+            return f"{user_info['emoji']} ⏳ **רענון התקציב בוצע לאחרונה לפני {elapsed_seconds} שניות**\n⏱️ נסו שוב בעוד {remaining_seconds} שניות"
         
-        # Get categories efficiently
-        categories = sheets_io.get_budget_categories()
-        if not categories:
-            return {"success": False, "message": "❌ לא נמצאו קטגוריות"}
+        REFRESH_JOB["running"] = True
+        REFRESH_JOB["waiters"] = [sender]
+    
+    threading.Thread(target=run_refresh_job, name="budget-refresh", daemon=True).start()
+    return f"{user_info['emoji']} 🔄 **מרענן את התקציב...**\n📬 אשלח את התוצאה בעוד כמה שניות"
+
+def run_refresh_job() -> None:
+    """Background job: refresh once, then send the result to everyone who asked."""
+    started = time.time()
+    try:
+        result = perform_smart_refresh()
+    except Exception as e:
+        result = {"success": False, "message": f"⚠️ שגיאה ברענון: {e}"}
+    finally:
+        release_refresh_lease()
+        with _refresh_lock:
+            waiters = REFRESH_JOB["waiters"]
+            REFRESH_JOB.update(running=False, waiters=[], runs=REFRESH_JOB["runs"] + 1,
+                               last_duration_ms=round((time.time() - started) * 1000))
+    
+    for waiter in waiters:
+        send_whatsapp_message(waiter, f"{get_user_info(waiter)['emoji']} {result['message']}")
+
+def perform_smart_refresh() -> dict:
+    """Perform refresh with smart optimizations and return results (message without the user's emoji)."""
+    try:
+        print("Starting smart refresh")
         
-        # Refresh all budgets efficiently
+        # Refresh all budgets: two reads, and a write only for cells that changed
         refresh_result = sheets_io.refresh_all_budgets()
         
         # Check if refresh was successful
@@ -151,34 +292,22 @@ def perform_smart_refresh(sender: str, user_info: dict) -> dict:
             error_msg = refresh_result.get("error", "שגיאה לא ידועה")
             return {"success": False, "message": f"❌ {error_msg}"}
         
-        # Get updated budget summary after refresh
-        try:
-            budget_summary = sheets_io.get_budget_summary()
-            if not budget_summary:
-                return {"success": False, "message": "❌ לא ניתן לקבל סיכום תקציב"}
-        except Exception as e:
-            print(f"Error getting budget summary after refresh: {e}")
-            return {"success": False, "message": f"❌ שגיאה בקבלת סיכום: {e}"}
-        
-        # Build response message
-        message_parts = [f"{user_info['emoji']} ✅ **רענון התקציב הושלם!**\n"]
+        # Build response message from the values the refresh just computed (no extra read)
+        message_parts = ["✅ **רענון התקציב הושלם!**\n"]
         
         # Add budget information
-        for item in budget_summary:
-            category = item.get('קטגוריה', '')
-            if category:
-                spent = float(item.get('כמה יצא', 0)) if item.get('כמה יצא') else 0
-                remaining = float(item.get('כמה נשאר', 0)) if item.get('כמה נשאר') else 0
-                message_parts.append(f"💰 **{category}**: יצא {spent}₪, נשאר {remaining}₪")
+        for category, info in refresh_result.get("budget_info", {}).items():
+            message_parts.append(f"💰 **{category}**: יצא {info['כמה יצא']}₪, נשאר {info['כמה נשאר']}₪")
         
         # Add refresh statistics
         updated_count = refresh_result.get("updated_count", 0)
+        unchanged_count = refresh_result.get("unchanged_count", 0)
         failed_categories = refresh_result.get("failed_categories", [])
         
         if failed_categories:
             message_parts.append(f"\n⚠️ לא עודכנו: {', '.join(failed_categories)}")
         
-        message_parts.append(f"\n📊 עודכנו {updated_count} קטגוריות")
+        message_parts.append(f"\n📊 עודכנו {updated_count} קטגוריות, {unchanged_count} ללא שינוי")
         
         return {"success": True, "message": "\n".join(message_parts)}
         
@@ -209,8 +338,25 @@ QUICK_COMMANDS = {
     "רענון": "refresh_budgets"
 }
 
-# Budget building pipeline state management
-BUDGET_SETUP_STATES = {}  # phone_number -> state_info
+# Quick commands (whole message) and natural phrases, compiled once into one automaton
+intent_router = IntentRouter(NATURAL_INTENTS, exact=QUICK_COMMANDS)
+COMMAND_INTENTS = set(QUICK_COMMANDS.values())
+
+# Budget building pipeline state management (in the shared state store, so any worker can continue it)
+SETUP_STATE_TTL = 3600  # An abandoned setup conversation expires after an hour
+
+def _setup_key(sender: str) -> str:
+    return f"budget_setup:{sender}"
+
+def get_setup_state(sender: str) -> Optional[dict]:
+    """The sender's budget setup state, or None when no setup is in progress."""
+    return state_store.get(_setup_key(sender))
+
+def start_setup_state(sender: str, state: dict) -> None:
+    state_store.set(_setup_key(sender), state, ttl=SETUP_STATE_TTL)
+
+def clear_setup_state(sender: str) -> None:
+    state_store.delete(_setup_key(sender))
 
 def get_user_info(phone_number: str) -> dict:
     """Get user information from phone number."""
@@ -237,12 +383,13 @@ def get_smart_budget_warning(category: str, remaining: float, total_budget: floa
     else:
         return f"✅ נותרו {remaining}₪ ב‹{category}›"
 
-def check_potential_duplicate(entry: dict) -> str:
-    """Check for potential duplicate transactions today."""
+def check_potential_duplicate(entry: dict, recent_transactions: Optional[List[Dict]] = None) -> str:
+    """Check for potential duplicate transactions today (pass recent_transactions to skip the read)."""
     try:
         # Get today's transactions
         today = datetime.now().strftime("%Y-%m-%d")
-        recent_transactions = sheets_io.get_recent_transactions(limit=10)
+        if recent_transactions is None:
+            recent_transactions = sheets_io.get_recent_transactions(limit=10)
         
         # Check for similar transactions today
         for tx in recent_transactions:
@@ -261,41 +408,6 @@ def check_potential_duplicate(entry: dict) -> str:
     except Exception:
         return ""
 
-def detect_natural_commands(text: str) -> List[str]:
-    """Detect natural language alternatives to quick commands."""
-    text_lower = text.lower()
-    commands = []
-    
-    # Budget balance queries
-    if any(phrase in text_lower for phrase in [
-        "כמה נשאר", "מה היתרה", "תראה לי את היתרה", "מה המצב עם הכסף",
-        "איך אני עומד", "מה יש לי", "כמה יש לי", "מה הסטטוס"
-    ]):
-        commands.append("show_remaining_budgets")
-    
-    # Category listing
-    if any(phrase in text_lower for phrase in [
-        "איזה קטגוריות", "מה הקטגוריות", "תראה לי קטגוריות", "רשימת קטגוריות",
-        "איזה אפשרויות", "מה אפשר", "איך מחלקים"
-    ]):
-        commands.append("show_categories")
-    
-    # Help requests
-    if any(phrase in text_lower for phrase in [
-        "איך זה עובד", "מה אפשר לעשות", "איך להשתמש", "מה הפקודות",
-        "עזרה", "הדרכה", "מדריך", "איך אני משתמש"
-    ]):
-        commands.append("show_help")
-    
-    # Refresh/recalculate
-    if any(phrase in text_lower for phrase in [
-        "רענן", "עדכן", "חשב מחדש", "בדוק שוב", "תקן את המספרים",
-        "עדכן יתרות", "תסנכרן"
-    ]):
-        commands.append("refresh_budgets")
-    
-    return commands
-
 def handle_natural_commands(sender: str, commands: List[str], original_text: str) -> str:
     """Handle natural language command alternatives."""
     user_info = get_user_info(sender)
@@ -393,14 +505,8 @@ def handle_quick_command(command: str, sender: str) -> str:
 
     elif command == "refresh_budgets":
         try:
-            # Check if refresh is allowed (cooldown protection)
-            is_allowed, remaining_seconds, elapsed_seconds = is_refresh_allowed(sender)
-            if not is_allowed:
-                return f"{user_info['emoji']} ⏳ **רענון התקציב בוצע לאחרונה לפני {elapsed_seconds} שניות**\n⏱️ נסו שוב בעוד {remaining_seconds} שניות"
-            
-            # Perform smart refresh synchronously
-            result = perform_smart_refresh(sender, user_info)
-            return result["message"]
+            # Acknowledge now; the refresh runs in the background and replies when done
+            return request_budget_refresh(sender)
             
         except Exception as e:
             return f"⚠️ שגיאה ברענון: {e}"
@@ -416,20 +522,22 @@ def start_budget_setup(sender: str) -> str:
     user_info = get_user_info(sender)
     
     try:
-        # Get current month for smart suggestion
+        # Get current month for smart suggestion (local calendar first, GPT for unknown names)
         current_month = sheets_io.get_working_sheet_name()
-        gpt_client = get_gpt()
-        if gpt_client:
-            suggested_month = gpt_client.suggest_next_month(current_month)
-        else:
-            suggested_month = "חודש חדש"
+        suggested_month = next_month_name(current_month)
+        if not suggested_month:
+            gpt_client = get_gpt()
+            if gpt_client:
+                suggested_month = gpt_client.suggest_next_month(current_month)
+            else:
+                suggested_month = "חודש חדש"
         
         # Store state
-        BUDGET_SETUP_STATES[sender] = {
+        start_setup_state(sender, {
             "step": "awaiting_confirmation",
             "suggested_month": suggested_month,
             "current_month": current_month
-        }
+        })
         
         return f"""{user_info['emoji']} **הגדרת תקציב חדש**
 
@@ -450,34 +558,49 @@ def handle_budget_setup_step(sender: str, text: str) -> str:
     """Handle budget setup conversation steps."""
     user_info = get_user_info(sender)
     
-    if sender not in BUDGET_SETUP_STATES:
+    state = get_setup_state(sender)
+    if state is None:
         return "❌ לא נמצא תהליך הגדרת תקציב פעיל. כתבו 'תקציב חדש' להתחלה."
     
-    state = BUDGET_SETUP_STATES[sender]
+    original = copy.deepcopy(state)
     
     try:
         if state["step"] == "awaiting_confirmation":
-            return _handle_month_confirmation(sender, text, state)
+            reply = _handle_month_confirmation(sender, text, state)
         elif state["step"] == "awaiting_categories":
-            return _handle_categories_input(sender, text, state)
+            reply = _handle_categories_input(sender, text, state)
         elif state["step"] == "awaiting_final_confirmation":
-            return _handle_final_confirmation(sender, text, state)
+            reply = _handle_final_confirmation(sender, text, state)
         else:
             return "❌ שגיאה במצב ההגדרה. נתחיל מחדש - כתבו 'תקציב חדש'."
+        
+        # Save the step's changes only if nobody else moved the conversation meanwhile
+        # (steps that cancel or finish clear the state and leave `state` unchanged)
+        if state != original and not state_store.compare_and_set(_setup_key(sender), original, state,
+                                                                 ttl=SETUP_STATE_TTL):
+            print(f"Budget setup state for {sender} changed concurrently, step not saved")
+        return reply
             
     except Exception as e:
         # Clean up state on error
-        if sender in BUDGET_SETUP_STATES:
-            del BUDGET_SETUP_STATES[sender]
+        clear_setup_state(sender)
         return f"⚠️ שגיאה בהגדרת התקציב: {e}\nכתבו 'תקציב חדש' לנסות שוב."
 
+def is_confirmed(text: str, ask_gpt: bool = True) -> bool:
+    """Detect yes/no locally, asking GPT only when the reply is ambiguous."""
+    answer = classify_confirmation(text)
+    if answer != "unsure" or not ask_gpt:
+        return answer == "yes"
+    
+    gpt_client = get_gpt()
+    return bool(gpt_client and gpt_client.parse_confirmation(text))
+
 def _handle_month_confirmation(sender: str, text: str, state: dict) -> str:
     """Handle month confirmation step."""
     user_info = get_user_info(sender)
     
-    # Check if user confirmed suggested month
-    gpt_client = get_gpt()
-    if gpt_client and gpt_client.parse_confirmation(text):
+    # Check if user confirmed suggested month (a month name is an answer, not a confirmation)
+    if is_confirmed(text, ask_gpt=not looks_like_month(text)):
         month_name = state["suggested_month"]
     else:
         # Check if user provided a custom month name
@@ -485,7 +608,7 @@ def _handle_month_confirmation(sender: str, text: str, state: dict) -> str:
             month_name = text.strip()
         else:
             # User declined
-            del BUDGET_SETUP_STATES[sender]
+            clear_setup_state(sender)
             return f"{user_info['emoji']} בסדר, ביטלתי את יצירת התקציב החדש."
     
     # Get previous month's categories for template
@@ -531,15 +654,16 @@ def _handle_categories_input(sender: str, text: str, state: dict) -> str:
     
     # Check for cancellation
     if any(word in text.lower() for word in ["ביטול", "לא", "עצור"]):
-        del BUDGET_SETUP_STATES[sender]
+        clear_setup_state(sender)
         return f"{user_info['emoji']} ביטלתי את הגדרת התקציב."
     
-    # Check if user approved suggested categories
-    gpt_client = get_gpt()
-    if gpt_client and gpt_client.parse_confirmation(text) and state.get("suggested_categories"):
+    # Check if user approved suggested categories (a reply with amounts is a new list, not a confirmation)
+    has_amounts = any(ch.isdigit() for ch in text)
+    if state.get("suggested_categories") and is_confirmed(text, ask_gpt=not has_amounts):
         categories = state["suggested_categories"]
     else:
         # Parse user input
+        gpt_client = get_gpt()
         try:
             if gpt_client:
                 categories = gpt_client.parse_budget_categories(text)
@@ -580,9 +704,8 @@ def _handle_final_confirmation(sender: str, text: str, state: dict) -> str:
     """Handle final confirmation and create the budget."""
     user_info = get_user_info(sender)
     
-    gpt_client = get_gpt()
-    if not gpt_client or not gpt_client.parse_confirmation(text):
-        del BUDGET_SETUP_STATES[sender]
+    if not is_confirmed(text):
+        clear_setup_state(sender)
         return f"{user_info['emoji']} ביטלתי את יצירת התקציב החדש."
 
     # Create the budget!
@@ -593,7 +716,7 @@ def _handle_final_confirmation(sender: str, text: str, state: dict) -> str:
         result = sheets_io.complete_budget_setup(month_name, categories)
 
         # Clean up state
-        del BUDGET_SETUP_STATES[sender]
+        clear_setup_state(sender)
 
         if result["success"]:
             return f"""{user_info['emoji']} 🎉 **התקציב החדש נוצר בהצלחה!**
@@ -609,7 +732,7 @@ def _handle_final_confirmation(sender: str, text: str, state: dict) -> str:
 
     except Exception as e:
         # Clean up state
-        del BUDGET_SETUP_STATES[sender]
+        clear_setup_state(sender)
         return f"⚠️ שגיאה ביצירת התקציב: {e}\nנסו שוב עם 'תקציב חדש'."
 
 # ---------------------------------------------------------------------------
@@ -619,98 +742,80 @@ def _handle_final_confirmation(sender: str, text: str, state: dict) -> str:
 def send_whatsapp_message(to: str, message: str) -> bool:
     """Send a WhatsApp message using Meta's API."""
     try:
-        url = f"https://graph.facebook.com/v17.0/{WHATSAPP_PHONE_NUMBER_ID}/messages"
-        headers = {
-            'Authorization': f'Bearer {WHATSAPP_TOKEN}',
-            'Content-Type': 'application/json'
-        }
-        
-        # Clean phone number - remove any 'whatsapp:' prefix
-        if to.startswith('whatsapp:'):
-            to = to[9:]
-        
-        data = {
-            "messaging_product": "whatsapp",
-            "to": to,
-            "type": "text",
-            "text": {
-                "body": message
-            }
-        }
-        
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        
-        return True
-        
+        return whatsapp_sender.send_later(to, message)
     except Exception as e:
         print(f"Error sending message: {e}")
         return False
 
-def parse_meta_webhook(webhook_data: dict) -> dict:
-    """Parse Meta's webhook payload and extract message data."""
+# Delivery/read receipts Meta sends to the same webhook, counted by status
+WEBHOOK_STATUS_COUNTS: Dict[str, int] = {}
+
+def parse_meta_webhook(webhook_data: dict) -> List[dict]:
+    """
+    Parse Meta's webhook payload into one dict per incoming message.
+    Meta may batch several entries, changes and messages into one delivery.
+    Status callbacks (sent/delivered/read) are only counted.
+    """
+    parsed = []
     try:
-        # Navigate Meta's webhook structure
-        entry = webhook_data.get('entry', [{}])[0]
-        changes = entry.get('changes', [{}])[0]
-        value = changes.get('value', {})
-        
-        # Get message data
-        messages = value.get('messages', [])
-        if not messages:
-            return {}
-        
-        message = messages[0]
-        
-        # Extract sender, message, and message ID
-        sender = message.get('from', '')
-        message_type = message.get('type', '')
-        message_id = message.get('id', '')  # WhatsApp's unique message ID
-        
-        if message_type == 'text':
-            body = message.get('text', {}).get('body', '')
-        else:
-            body = f"[{message_type}]"
-        
-        # Create content hash for deduplication
-        content_hash = hashlib.md5(f"{sender}:{body}:{int(time.time()//10)}".encode()).hexdigest()[:8]
-        
-        return {
-            'sender': sender,
-            'message': body,
-            'message_id': message_id,
-            'content_hash': content_hash,
-            'timestamp': time.time()
-        }
+        for entry in webhook_data.get('entry', []) or []:
+            for change in entry.get('changes', []) or []:
+                value = change.get('value', {}) or {}
+                
+                for status in value.get('statuses', []) or []:
+                    name = status.get('status', 'unknown')
+                    WEBHOOK_STATUS_COUNTS[name] = WEBHOOK_STATUS_COUNTS.get(name, 0) + 1
+                
+                for message in value.get('messages', []) or []:
+                    # Extract sender, message, and message ID
+                    message_type = message.get('type', '')
+                    if message_type == 'text':
+                        body = message.get('text', {}).get('body', '')
+                    else:
+                        body = f"[{message_type}]"
+                    
+                    try:
+                        sent_at = float(message.get('timestamp', 0)) or time.time()
+                    except (TypeError, ValueError):
+                        sent_at = time.time()
+                    
+                    parsed.append({
+                        'sender': message.get('from', ''),
+                        'message': body,
+                        'message_id': message.get('id', ''),  # WhatsApp's unique message ID
+                        'timestamp': sent_at
+                    })
     except Exception as e:
         print(f"Error parsing webhook: {e}")
-        return {}
-
-# Message deduplication with content hash
-RECENT_MESSAGES = {}  # {content_hash: timestamp}
-MESSAGE_CACHE_TTL = 60  # 1 minute
-
-def is_duplicate_message(content_hash: str) -> bool:
-    """Check if message is duplicate and clean old entries."""
-    current_time = time.time()
-    
-    # Clean old entries
-    expired_hashes = [h for h, t in RECENT_MESSAGES.items() if current_time - t > MESSAGE_CACHE_TTL]
-    for h in expired_hashes:
-        del RECENT_MESSAGES[h]
-    
-    # Check if current message is duplicate
-    if content_hash in RECENT_MESSAGES:
-        return True
     
-    # Store current message
-    RECENT_MESSAGES[content_hash] = current_time
-    return False
+    # Oldest first, so each sender's lane receives them in order
+    parsed.sort(key=lambda m: m['timestamp'])
+    return parsed
+
+def is_duplicate_message(message_id: str) -> bool:
+    """True if this WhatsApp message ID was already received (marks it as seen otherwise)."""
+    if not message_id:
+        return False  # Nothing to key on; process it
+    return message_dedup.seen_before(message_id)
 
 # ---------------------------------------------------------------------------
 # Main webhook route - Meta WhatsApp Business API
 # ---------------------------------------------------------------------------
 
+def handle_incoming_message(job: dict) -> None:
+    """Background job: process one message and send the reply."""
+    sender, text = job["sender"], job["text"]
+    print(f"PROCESSING: {sender} - {text}")
+    
+    response = process_message(sender, text)
+    if response:
+        send_whatsapp_message(sender, response)
+
+webhook_queue = WorkQueue(handle_incoming_message, workers=WEBHOOK_WORKERS, max_size=WEBHOOK_QUEUE_SIZE,
+                          lane_key=lambda job: job["sender"], max_lane_depth=WEBHOOK_MAX_PER_SENDER,
+                          name="webhook-worker")
+atexit.register(webhook_queue.close)  # Drain queued messages when gunicorn recycles the worker
+
 @app.route("/webhook", methods=["POST", "GET"])
 def webhook():
     """Main webhook endpoint for Meta WhatsApp Business API."""
@@ -733,31 +838,36 @@ def webhook():
         try:
             webhook_data = request.get_json()
             
-            # Parse message from Meta's webhook
-            message_data = parse_meta_webhook(webhook_data)
-            
-            if not message_data or not message_data.get('sender') or not message_data.get('message'):
-                return "OK", 200
-            
-            sender = message_data['sender']
-            text = message_data['message'].strip()
-            
-            # **CRITICAL: Deduplication check at the very beginning**
-            # Use content hash for reliable deduplication
-            content_hash = message_data.get('content_hash')
-            
-            if is_duplicate_message(content_hash):
-                print(f"DUPLICATE MESSAGE BLOCKED: {sender} - {text}")
-                return "OK", 200
-            
-            print(f"PROCESSING: {sender} - {text}")
-            
-            # Process the message
-            response = process_message(sender, text)
-            
-            if response:
-                send_whatsapp_message(sender, response)
+            # Parse every message in Meta's (possibly batched) webhook
+            deferred = 0
+            for message_data in parse_meta_webhook(webhook_data or {}):
+                if not message_data.get('sender') or not message_data.get('message'):
+                    continue
+                
+                sender = message_data['sender']
+                text = message_data['message'].strip()
+                
+                # **CRITICAL: Deduplication check at the very beginning**
+                # Keyed on WhatsApp's message ID, so a repeated purchase is still recorded
+                message_id = message_data.get('message_id', '')
+                
+                if is_duplicate_message(message_id):
+                    print(f"DUPLICATE MESSAGE BLOCKED: {sender} - {text}")
+                    continue
+                
+                # Acknowledge right away; a background worker processes and replies
+                job = {"sender": sender, "text": text, "message_id": message_id, "timestamp": message_data['timestamp']}
+                if not webhook_queue.submit(job):
+                    print(f"QUEUE FULL, message deferred: {sender} - {text}")
+                    if message_id:
+                        message_dedup.forget(message_id)  # Let the redelivery through
+                    deferred += 1
+                    continue
+                
+                print(f"QUEUED: {sender} - {text}")
             
+            if deferred:
+                return "Busy", 503  # Meta redelivers; messages already queued are deduplicated
             return "OK", 200
             
         except Exception as e:
@@ -766,6 +876,173 @@ def webhook():
 
     return "OK", 200
 
+def try_fast_expense(text: str, cats: List[str]) -> Optional[dict]:
+    """Parse a repeat expense locally using the learned category memory."""
+    expense_data = parse_simple_expense(text)
+    if not expense_data:
+        return None
+    
+    learned = category_memory.lookup(str(expense_data["פירוט"]), cats)
+    if (not learned or
+        learned["confidence"] < FAST_PATH_MIN_CONFIDENCE or
+        learned["count"] < FAST_PATH_MIN_COUNT):
+        return None
+    
+    expense_data["קטגוריה"] = learned["category"]
+    print(f"FAST PATH: '{text}' → {learned['category']} ({learned['match']}, {learned['confidence']:.2f})")
+    return expense_data
+
+def record_expense(sender: str, expense_data: dict, cats: List[str], confidence: float, processing_time: float) -> str:
+    """Validate, store and confirm a parsed expense."""
+    user_info = get_user_info(sender)
+    
+    try:
+        category = expense_data["קטגוריה"]
+        
+        # Step 1: Validate category exists in budget sheet
+        if category not in cats:
+            return f"⚠️ הקטגוריה '{category}' אינה קיימת בגליון התקציב."
+
+        # Step 2: Check for potential duplicates
+        duplicate_warning = check_potential_duplicate(expense_data)
+        
+        # Step 3: Process the expense (add to tracker + update budget)
+        result = sheets_io.process_expense(expense_data)
+        
+        if not result["success"]:
+            return f"⚠️ שגיאה בעיבוד: {result['error']}"
+        
+        # Learn the item → category mapping for next time
+        category_memory.learn(str(expense_data.get("פירוט", "")), category)
+        
+        # Step 4: Get updated budget info and send confirmation
+        budget_info = result["budget_info"]
+        if budget_info:
+            smart_warning = get_smart_budget_warning(
+                category, 
+                budget_info["כמה נשאר"], 
+                budget_info["תקציב"]
+            )
+        else:
+            smart_warning = "לא נמצא מידע על יתרה"
+
+        # Build personalized reply with performance info
+        reply = f"{user_info['emoji']} **נרשם בהצלחה!**\n"
+        reply += f"📝 {expense_data.get('פירוט', '')} - {expense_data.get('מחיר', '')}₪\n"
+        reply += f"💰 {smart_warning}\n"
+        
+        # Add confidence indicator if low
+        if confidence < 0.8:
+            reply += f"🤔 דחיפות: {confidence:.1f} (אולי בדקו שהפרטים נכונים)\n"
+        
+        if duplicate_warning:
+            reply += f"\n{duplicate_warning}"
+        
+        # Add performance indicator for very fast processing
+        if processing_time < 1000:  # Less than 1 second
+            reply += f"\n⚡ עובד מהר היום! ({processing_time:.0f}ms)"
+        
+        return reply
+        
+    except Exception as exc:
+        return f"⚠️ שגיאה בעיבוד: {exc}"
+
+def describe_rejected_expenses(rejected: List[dict]) -> str:
+    """Reply lines naming the items of a message that were not recorded (empty if none)."""
+    if not rejected:
+        return ""
+    lines = []
+    for item in rejected:
+        name = item.get("פירוט") or "פריט ללא פירוט"
+        if item.get("reason") == "missing_price":
+            lines.append(f"• {name} - חסר מחיר")
+        else:
+            category = item.get("קטגוריה")
+            price = f" {item['מחיר']:g}₪" if item.get("מחיר") else ""
+            reason = f"הקטגוריה '{category}' לא קיימת" if category else "לא זוהתה קטגוריה"
+            lines.append(f"• {name}{price} - {reason}")
+    return "\n\n⚠️ לא נרשמו (שלחו אותם שוב עם מחיר וקטגוריה):\n" + "\n".join(lines)
+
+def record_expenses(sender: str, expenses: List[dict], cats: List[str], confidence: float, processing_time: float) -> str:
+    """Store several expenses from one message as a single batch and confirm them in one reply."""
+    if len(expenses) == 1:
+        return record_expense(sender, expenses[0], cats, confidence, processing_time)
+    
+    user_info = get_user_info(sender)
+    
+    try:
+        # Step 1: Validate every category before writing anything
+        unknown = [e["קטגוריה"] for e in expenses if e.get("קטגוריה") not in cats]
+        if unknown:
+            return f"⚠️ הקטגוריות {', '.join(map(str, unknown))} אינן קיימות בגליון התקציב. לא נרשמו הוצאות."
+        
+        # Step 2: Check for potential duplicates with one read
+        recent_transactions = sheets_io.get_recent_transactions(limit=10)
+        duplicate_warnings = [w for w in (check_potential_duplicate(e, recent_transactions) for e in expenses) if w]
+        
+        # Step 3: One tracker append + one budget batchUpdate for all items
+        result = sheets_io.process_expenses(expenses)
+        if not result["success"]:
+            return f"⚠️ שגיאה בעיבוד: {result['error']}"
+        
+        for expense in expenses:
+            category_memory.learn(str(expense.get("פירוט", "")), expense["קטגוריה"])
+        
+        # Step 4: Combined confirmation
+        total = sum(float(e.get("מחיר", 0) or 0) for e in expenses)
+        reply = f"{user_info['emoji']} **נרשמו {len(expenses)} הוצאות!** (סה\"כ {total:g}₪)\n"
+        for expense in expenses:
+            reply += f"📝 {expense.get('פירוט', '')} - {expense.get('מחיר', '')}₪ ({expense['קטגוריה']})\n"
+        
+        for category in result["categories"]:
+            budget_info = result["budget_info"].get(category)
+            if budget_info:
+                reply += f"💰 {get_smart_budget_warning(category, budget_info['כמה נשאר'], budget_info['תקציב'])}\n"
+        
+        if confidence < 0.8:
+            reply += f"🤔 דחיפות: {confidence:.1f} (אולי בדקו שהפרטים נכונים)\n"
+        if duplicate_warnings:
+            reply += "\n" + "\n".join(duplicate_warnings)
+        if processing_time < 1000:
+            reply += f"\n⚡ עובד מהר היום! ({processing_time:.0f}ms)"
+        
+        return reply
+        
+    except Exception as exc:
+        return f"⚠️ שגיאה בעיבוד: {exc}"
+
+LIMITED_MODE_NOTE = "\n\n⚠️ מצב מוגבל: שירות הבינה המלאכותית לא זמין כרגע, אני עונה בעזרת כללים מקומיים."
+
+def limited_mode_reply(sender: str, text: str, cats: List[str], start_time: float) -> str:
+    """Answer without GPT while its circuit is open: rule-based expenses, sheet-based answers."""
+    expense_data = parse_simple_expense(text)
+    if expense_data:
+        # Any learned category will do here; otherwise the category must be named in the text
+        learned = category_memory.lookup(str(expense_data["פירוט"]), cats)
+        category = str(learned["category"]) if learned else None
+        if not category:
+            words = set(description_tokens(text))
+            category = next((c for c in cats if c in text or set(description_tokens(c)) & words), None)
+        if category:
+            expense_data["קטגוריה"] = category
+            processing_time = (time.time() - start_time) * 1000  # Includes the failed GPT attempt
+            return record_expense(sender, expense_data, cats, 0.7, processing_time) + LIMITED_MODE_NOTE
+        return ("🤔 לא זיהיתי את הקטגוריה. ציינו אותה בהודעה, לדוגמה: "
+                f"'{cats[0] if cats else 'קניות'} {expense_data['מחיר']}'" + LIMITED_MODE_NOTE)
+    
+    # Questions: answer from the budget sheet for a named category, else all balances
+    named = [c for c in cats if c in text]
+    if named:
+        lines = []
+        for category in named:
+            info = sheets_io.get_category_budget_info(category)
+            if info:
+                lines.append(f"• {get_smart_budget_warning(category, info['כמה נשאר'], info['תקציב'])} "
+                             f"(יצא {info['כמה יצא']:g}₪ מתוך {info['תקציב']:g}₪)")
+        if lines:
+            return f"{get_user_info(sender)['emoji']} " + "\n".join(lines) + LIMITED_MODE_NOTE
+    return handle_quick_command("show_remaining_budgets", sender) + LIMITED_MODE_NOTE
+
 def process_message(sender: str, text: str) -> str:
     """Process incoming message and return response."""
     try:
@@ -776,35 +1053,55 @@ def process_message(sender: str, text: str) -> str:
         # Get user info for personalization
         user_info = get_user_info(sender)
         
-        # Handle quick commands first
-        if text in QUICK_COMMANDS:
-            return handle_quick_command(QUICK_COMMANDS[text], sender)
+        # One pass over the message: quick commands, natural command phrases, thanks and greetings
+        intent = intent_router.route(text)
+        if intent and intent.exact:
+            return handle_quick_command(intent.intent, sender)
         
         # Handle natural language alternatives to quick commands
-        natural_commands = detect_natural_commands(text)
-        if natural_commands:
-            return handle_natural_commands(sender, natural_commands, text)
+        if intent and intent.intent in COMMAND_INTENTS:
+            return handle_natural_commands(sender, [intent.intent], text)
 
         # Handle context-aware responses
-        if any(word in text.lower() for word in ["תודה", "תודה רבה", "יפה", "מעולה", "כל הכבוד"]):
+        if intent and intent.intent == "thanks":
             return f"{user_info['emoji']} בכיף! יש עוד הוצאות להזין?"
         
-        if any(word in text.lower() for word in ["שלום", "היי", "הי", "מה נשמע", "מה המצב"]):
+        if intent and intent.intent == "greeting":
             return f"שלום {user_info['name']}! {user_info['emoji']}\nאפשר לעזור לך עם התקציב?"
 
         # First check if user is in budget setup flow
-        if sender in BUDGET_SETUP_STATES:
+        if get_setup_state(sender) is not None:
             return handle_budget_setup_step(sender, text)
 
         # Get categories from budget sheet
         cats = sheets_io.get_budget_categories()
+
+        # Relative dates and spelled-out amounts → ISO dates and digits (local, deterministic)
+        expense_text = normalize_message(text)
+        
+        # ⚡ Fast path: known item + amount → record without any GPT call
+        start_time = time.time()
+        fast_expense = try_fast_expense(expense_text, cats)
+        if fast_expense:
+            processing_time = (time.time() - start_time) * 1000
+            return record_expense(sender, fast_expense, cats, 1.0, processing_time)
         
         # Get GPT client
         gpt_client = get_gpt()
         if not gpt_client:
             return "⚠️ שירות הבינה המלאכותית אינו זמין כרגע. אנא נסו שוב מאוחר יותר."
             
-        msg_type = gpt_client.classify_message(text, cats)
+        # One GPT call both classifies the message and extracts its expenses
+        start_time = time.time()
+        learned = category_memory.lookup(expense_text, cats)
+        category_hint = str(learned["category"]) if learned else None
+        try:
+            batch_result = gpt_client.process_message_batch(expense_text, cats, category_hint)
+        except CircuitOpenError:
+            return limited_mode_reply(sender, expense_text, cats, start_time)
+        msg_type = batch_result.get("message_type", "error")
+        if msg_type not in {"budget_entry", "question", "budget_setup"}:
+            msg_type = "error"
 
         # -------------------------------------------------------------------
         # 1️⃣  Budget setup – NEW FEATURE
@@ -817,65 +1114,20 @@ def process_message(sender: str, text: str) -> str:
         # -------------------------------------------------------------------
         if msg_type == "budget_entry":
             try:
-                # 🚀 OPTIMIZATION: Use batch processing instead of separate classify+parse calls
-                start_time = time.time()
-                batch_result = gpt_client.process_message_batch(text, cats)
+                # 🚀 OPTIMIZATION: The classification call already parsed the expenses
                 processing_time = (time.time() - start_time) * 1000
                 
-                # Validate the batch result
-                if not batch_result or batch_result.get("message_type") != "budget_entry":
-                    return f"⚠️ לא הצלחתי לזהות את ההוצאה. נסו שוב בפורמט: 'קניתי פלאפל ב-18'"
-                
-                # Extract expense data from batch result
-                expense_data = batch_result.get("expense_data", {})
+                # Extract all expenses from batch result ("קפה 12, לחם 8" → two)
+                expenses = [e for e in batch_result.get("expenses", []) if e.get("קטגוריה")]
+                rejected = batch_result.get("rejected", [])
                 confidence = batch_result.get("confidence", 0)
                 
-                if not expense_data or not expense_data.get("קטגוריה"):
-                    return f"⚠️ לא הצלחתי לזהות את פרטי ההוצאה. נסו שוב בפורמט: 'קניתי פלאפל ב-18'"
-                
-                category = expense_data["קטגוריה"]
-                
-                # Step 1: Validate category exists in budget sheet
-                if category not in cats:
-                    return f"⚠️ הקטגוריה '{category}' אינה קיימת בגליון התקציב."
-
-                # Step 2: Check for potential duplicates
-                duplicate_warning = check_potential_duplicate(expense_data)
-                
-                # Step 3: Process the expense (add to tracker + update budget)
-                result = sheets_io.process_expense(expense_data)
-                
-                if not result["success"]:
-                    return f"⚠️ שגיאה בעיבוד: {result['error']}"
+                if not expenses:
+                    return (f"⚠️ לא הצלחתי לזהות את פרטי ההוצאה. נסו שוב בפורמט: 'קניתי פלאפל ב-18'"
+                            + describe_rejected_expenses(rejected))
                 
-                # Step 4: Get updated budget info and send confirmation
-                budget_info = result["budget_info"]
-                if budget_info:
-                    smart_warning = get_smart_budget_warning(
-                        category, 
-                        budget_info["כמה נשאר"], 
-                        budget_info["תקציב"]
-                    )
-                else:
-                    smart_warning = "לא נמצא מידע על יתרה"
-
-                # Build personalized reply with performance info
-                reply = f"{user_info['emoji']} **נרשם בהצלחה!**\n"
-                reply += f"📝 {expense_data.get('פירוט', '')} - {expense_data.get('מחיר', '')}₪\n"
-                reply += f"💰 {smart_warning}\n"
-                
-                # Add confidence indicator if low
-                if confidence < 0.8:
-                    reply += f"🤔 דחיפות: {confidence:.1f} (אולי בדקו שהפרטים נכונים)\n"
-                
-                if duplicate_warning:
-                    reply += f"\n{duplicate_warning}"
-                
-                # Add performance indicator for very fast processing
-                if processing_time < 1000:  # Less than 1 second
-                    reply += f"\n⚡ עובד מהר היום! ({processing_time:.0f}ms)"
-                
-                return reply
+                return record_expenses(sender, expenses, cats, confidence, processing_time) + \
+                    describe_rejected_expenses(rejected)
                 
             except Exception as exc:
                 return f"⚠️ שגיאה בעיבוד: {exc}"
@@ -885,13 +1137,18 @@ def process_message(sender: str, text: str) -> str:
         # -------------------------------------------------------------------
         if msg_type == "question":
             try:
-                # Get data from both sheets
-                summary = sheets_io.get_budget_summary()
-                tx_rows = sheets_io.get_recent_transactions(limit=20)
-                
-                # 🚀 OPTIMIZATION: Use cached question answering
+                # 🚀 OPTIMIZATION: Answer repeated questions before reading the sheets
                 start_time = time.time()
-                cached_result = gpt_client.answer_question_cached(text, summary, tx_rows)
+                data_version = sheets_io.data_version
+                cached_result = (gpt_client.get_cached_answer(text, data_version, cats)
+                                 if data_version is not None else None)
+                
+                if not cached_result:
+                    # Get data from both sheets (the whole month: GPT only sees a compact digest of it)
+                    summary = sheets_io.get_budget_summary()
+                    tx_rows = sheets_io.get_recent_transactions(limit=QUESTION_CONTEXT_TX_LIMIT)
+                    cached_result = gpt_client.answer_question_cached(text, summary, tx_rows, data_version,
+                                                                  lookup=False, categories=cats)
                 processing_time = (time.time() - start_time) * 1000
                 
                 answer = cached_result["answer"]
@@ -912,6 +1169,8 @@ def process_message(sender: str, text: str) -> str:
                 
                 return reply
                 
+            except CircuitOpenError:
+                return limited_mode_reply(sender, text, cats, start_time)
             except Exception as exc:
                 return f"⚠️ לא הצלחתי לענות: {exc}"
 
@@ -971,23 +1230,28 @@ def health_check():
         "timestamp": datetime.now().isoformat()
     }, 200
 
+@app.route("/_ah/warmup")
+def warmup():
+    """App Engine warmup request: finish initialization before user traffic arrives."""
+    _warmup_done.wait(timeout=30)
+    return {"status": "warm", "health": health_monitor.snapshot()}, 200
+
 @app.route("/health")
 def health_detailed():
     """Detailed health check endpoint with optimization statistics."""
     try:
-        # Test Google Sheets connection
-        categories = sheets_io.get_budget_categories() if sheets_io else []
-        sheets_healthy = len(categories) > 0
-        
-        # Test GPT API and get cache statistics
-        gpt_healthy = True
+        # Sheets and GPT health come from the background monitor's cached snapshot, never a live call
+        health = health_monitor.snapshot()
+        sheets_status = health["components"]["google_sheets"]
+        gpt_status = health["components"]["gpt_api"]
+        sheets_healthy = bool(sheets_status["healthy"]) and not sheets_status["stale"]
+        gpt_healthy = bool(gpt_status["healthy"]) and not gpt_status["stale"]
         cache_stats = {"hits": 0, "misses": 0, "hit_rate": 0.0, "cache_size": 0}
         
         gpt_client = get_gpt()
         if gpt_client and hasattr(gpt_client, 'get_cache_stats'):
             try:
                 cache_stats = gpt_client.get_cache_stats()
-                gpt_healthy = True
             except Exception:
                 gpt_healthy = False
         
@@ -1007,10 +1271,23 @@ def health_detailed():
             "components": {
                 "google_sheets": "healthy" if sheets_healthy else "unhealthy",
                 "gpt_api": "healthy" if gpt_healthy else "unhealthy",
-                "categories_count": len(categories) if sheets_healthy else 0
+                "google_sheets_probe": sheets_status,
+                "gpt_probe": gpt_status,
+                "monitor_running": health["monitor_running"],
+                "categories_count": sheets_status.get("categories_count", 0)
             },
             "performance": {
                 "cache_stats": cache_stats,
+                "gpt_concurrency": gpt_client.get_concurrency_stats() if gpt_client and hasattr(gpt_client, 'get_concurrency_stats') else {},
+                "gpt_tiers": gpt_client.get_tier_stats() if gpt_client else {},
+                "gpt_micro_batching": gpt_client.get_batching_stats() if gpt_client else {},
+                "gpt_circuit": gpt_client.breaker.stats() if gpt_client else {},
+                "webhook_queue": webhook_queue.stats(),
+                "message_dedup": message_dedup.stats(),
+                "state_store": state_store.stats(),
+                "budget_refresh": {k: v for k, v in REFRESH_JOB.items() if k != "waiters"},
+                "webhook_statuses": dict(WEBHOOK_STATUS_COUNTS),
+                "whatsapp_sender": whatsapp_sender.stats(),
                 "total_requests": total_requests,
                 "performance_score": performance_score,
                 "optimizations": {
@@ -0,0 +1,202 @@
+import time
+import random
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from work_queue import WorkQueue, _percentile
+
+# ---------------------------------------------------------------------------
+# Outbound WhatsApp sender (Meta Cloud API)
+# ---------------------------------------------------------------------------
+# One persistent requests.Session keeps TLS connections to graph.facebook.com
+# open between replies. Every request has connect/read timeouts, so a hung
+# socket cannot block a worker. 429 and 5xx replies (and connection failures)
+# are retried with exponential backoff and jitter, honouring Retry-After.
+# A read timeout is NOT retried: the message may already have been delivered.
+#
+# Sends are throttled by a token bucket to the business number's send rate.
+# Meta has no multi-message send endpoint, so instead of batching requests an
+# optional queue (one lane per recipient) takes sends off the caller's thread.
+# ---------------------------------------------------------------------------
+
+GRAPH_URL = "https://graph.facebook.com"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Meta error codes that mean "slow down" even when the HTTP status is 400
+RATE_LIMIT_ERROR_CODES = {4, 80007, 130429, 131048, 131056}
+
+
+class WhatsAppSender:
+    """Pooled, retried and rate-limited sender for WhatsApp text messages."""
+
+    def __init__(self, token: str, phone_number_id: str, api_version: str = "v17.0",
+                 connect_timeout: float = 3.05, read_timeout: float = 10.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0, rate_per_second: float = 80.0,
+                 pool_size: int = 10, queue_workers: int = 0, queue_size: int = 1000):
+        self.token = token
+        self.phone_number_id = phone_number_id
+        self.url = f"{GRAPH_URL}/{api_version}/{phone_number_id}/messages"
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json"
+        })
+
+        # Token bucket: `rate_per_second` sends per second, bursts up to one second's worth
+        self.rate_per_second = rate_per_second
+        self._tokens = rate_per_second
+        self._refilled_at = time.monotonic()
+        self._bucket_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._stats = {"sent": 0, "failed": 0, "retries": 0, "throttled": 0, "rate_limited": 0}
+        self._latencies: "deque[float]" = deque(maxlen=500)
+
+        self.queue: Optional[WorkQueue] = None
+        if queue_workers > 0:
+            self.queue = WorkQueue(lambda job: self.send_text(job["to"], job["message"]),
+                                   workers=queue_workers, max_size=queue_size,
+                                   lane_key=lambda job: job["to"], name="whatsapp-sender")
+
+    # ------------------------------------------------------------------
+    # 1) Sending
+    # ------------------------------------------------------------------
+
+    def send_text(self, to: str, message: str) -> bool:
+        """Send a text message now; returns True once Meta accepted it."""
+        # Clean phone number - remove any 'whatsapp:' prefix
+        if to.startswith("whatsapp:"):
+            to = to[9:]
+        payload = {
+            "messaging_product": "whatsapp",
+            "to": to,
+            "type": "text",
+            "text": {"body": message}
+        }
+
+        started = time.time()
+        for attempt in range(self.max_retries + 1):
+            self._throttle()
+            delay = None
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout)
+                if response.ok:
+                    self._record(True, time.time() - started)
+                    return True
+
+                if self._should_retry(response):
+                    delay = self._retry_after(response)
+                else:
+                    print(f"Error sending message: HTTP {response.status_code} {response.text[:200]}")
+                    break
+            except requests.exceptions.ReadTimeout as e:
+                # The request reached Meta; retrying could deliver the reply twice
+                print(f"Error sending message (read timeout, not retried): {e}")
+                break
+            except (requests.exceptions.ConnectionError, requests.exceptions.ConnectTimeout) as e:
+                print(f"Send attempt {attempt + 1} failed to connect: {e}")
+            except requests.exceptions.RequestException as e:
+                print(f"Error sending message: {e}")
+                break
+
+            if attempt < self.max_retries:
+                with self._stats_lock:
+                    self._stats["retries"] += 1
+                time.sleep(delay if delay is not None else self._backoff(attempt))
+
+        self._record(False, time.time() - started)
+        return False
+
+    def send_later(self, to: str, message: str) -> bool:
+        """Queue a send (in order per recipient); sends inline when no queue is configured."""
+        if self.queue is None:
+            return self.send_text(to, message)
+        if self.queue.submit({"to": to, "message": message}):
+            return True
+        print(f"Send queue full, sending inline to {to}")
+        return self.send_text(to, message)
+
+    def close(self) -> None:
+        """Drain queued sends and close pooled connections."""
+        if self.queue is not None:
+            self.queue.close()
+        self.session.close()
+
+    # ------------------------------------------------------------------
+    # 2) Statistics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            latencies = list(self._latencies)
+            result: Dict[str, Any] = {
+                **self._stats,
+                "latency_p50_ms": _percentile(latencies, 0.5),
+                "latency_p95_ms": _percentile(latencies, 0.95),
+                "rate_per_second": self.rate_per_second
+            }
+        if self.queue is not None:
+            result["queue"] = self.queue.stats()
+        return result
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    def _throttle(self) -> None:
+        """Block until the token bucket allows one more send."""
+        while True:
+            with self._bucket_lock:
+                now = time.monotonic()
+                self._tokens = min(self.rate_per_second,
+                                   self._tokens + (now - self._refilled_at) * self.rate_per_second)
+                self._refilled_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate_per_second
+            with self._stats_lock:
+                self._stats["throttled"] += 1
+            time.sleep(wait)
+
+    def _should_retry(self, response: requests.Response) -> bool:
+        if response.status_code in RETRY_STATUSES:
+            if response.status_code == 429:
+                with self._stats_lock:
+                    self._stats["rate_limited"] += 1
+            return True
+        try:
+            code = response.json().get("error", {}).get("code")
+        except ValueError:
+            return False
+        if code in RATE_LIMIT_ERROR_CODES:
+            with self._stats_lock:
+                self._stats["rate_limited"] += 1
+            return True
+        return False
+
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        value = response.headers.get("Retry-After")
+        try:
+            return min(float(value), self.backoff_max) if value else None
+        except ValueError:
+            return None
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _record(self, ok: bool, latency: float) -> None:
+        with self._stats_lock:
+            self._stats["sent" if ok else "failed"] += 1
+            self._latencies.append(latency)
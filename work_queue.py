@@ -0,0 +1,140 @@
+import time
+import itertools
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Set, Tuple
+
+# ---------------------------------------------------------------------------
+# Background work queue for webhook processing
+# ---------------------------------------------------------------------------
+# The webhook handler only validates and enqueues; worker threads run the
+# slow part (GPT, Sheets, sending the reply). Queue depth, wait time (enqueue
+# → start) and processing time are tracked for /health.
+#
+# Jobs are grouped into lanes by `lane_key` (the sender). A lane runs one job
+# at a time, so each conversation stays in order, while different lanes run
+# in parallel up to `workers`. Ready lanes take turns: after each job the
+# lane goes to the back of the line, so a chatty sender cannot starve others.
+# Without a lane_key every job gets its own lane (a plain FIFO pool).
+# ---------------------------------------------------------------------------
+
+Job = Dict[str, Any]
+
+
+def _percentile(samples: List[float], fraction: float) -> Optional[int]:
+    """Percentile of samples in seconds, as whole milliseconds."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] * 1000)
+
+
+class WorkQueue:
+    """Bounded job queue with per-lane FIFO order and round-robin fairness across lanes."""
+
+    def __init__(self, handler: Callable[[Job], None], workers: int = 1, max_size: int = 1000,
+                 lane_key: Optional[Callable[[Job], Hashable]] = None, max_lane_depth: Optional[int] = None,
+                 name: str = "work-queue"):
+        self.handler = handler
+        self.workers = workers
+        self.max_size = max_size
+        self.lane_key = lane_key
+        self.max_lane_depth = max_lane_depth
+
+        self._cond = threading.Condition()
+        self._lanes: Dict[Hashable, Deque[Tuple[float, Job]]] = {}
+        self._ready: Deque[Hashable] = deque()  # Lanes with pending jobs and no job running
+        self._running: Set[Hashable] = set()
+        self._pending = 0
+        self._closing = False
+        self._job_ids = itertools.count()
+
+        self._stats = {"enqueued": 0, "processed": 0, "failed": 0, "rejected": 0, "max_depth": 0,
+                       "max_lane_depth": 0}
+        self._wait_times: "deque[float]" = deque(maxlen=500)
+        self._run_times: "deque[float]" = deque(maxlen=500)
+
+        self._threads = [
+            threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True) for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, job: Job) -> bool:
+        """Enqueue a job without blocking. Returns False if the queue (or its lane) is full."""
+        key = self.lane_key(job) if self.lane_key else next(self._job_ids)
+        with self._cond:
+            lane = self._lanes.get(key)
+            if (self._closing or self._pending >= self.max_size or
+                    (lane is not None and self.max_lane_depth is not None and len(lane) >= self.max_lane_depth)):
+                self._stats["rejected"] += 1
+                return False
+
+            if lane is None:
+                lane = self._lanes[key] = deque()
+            lane.append((time.time(), job))
+            self._pending += 1
+            if key not in self._running and len(lane) == 1:
+                self._ready.append(key)
+                self._cond.notify()
+
+            self._stats["enqueued"] += 1
+            self._stats["max_depth"] = max(self._stats["max_depth"], self._pending)
+            self._stats["max_lane_depth"] = max(self._stats["max_lane_depth"], len(lane))
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                **self._stats,
+                "depth": self._pending,
+                "busy": len(self._running),
+                "lanes": len(self._lanes),
+                "workers": self.workers,
+                "wait_p50_ms": _percentile(list(self._wait_times), 0.5),
+                "wait_p95_ms": _percentile(list(self._wait_times), 0.95),
+                "run_p50_ms": _percentile(list(self._run_times), 0.5),
+                "run_p95_ms": _percentile(list(self._run_times), 0.95)
+            }
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Stop accepting jobs, let the workers finish the queued ones, then stop them."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while not self._ready and not (self._closing and self._pending == 0):
+                    self._cond.wait()
+                if not self._ready:
+                    return  # Closing and drained
+
+                key = self._ready.popleft()
+                enqueued_at, job = self._lanes[key].popleft()
+                self._pending -= 1
+                self._running.add(key)
+                started = time.time()
+                self._wait_times.append(started - enqueued_at)
+
+            failed = False
+            try:
+                self.handler(job)
+            except Exception as e:
+                failed = True
+                print(f"Background job failed: {e}")
+
+            with self._cond:
+                self._run_times.append(time.time() - started)
+                self._stats["failed" if failed else "processed"] += 1
+                self._running.discard(key)
+                if self._lanes[key]:
+                    self._ready.append(key)  # Back of the line: other lanes go first
+                    self._cond.notify()
+                else:
+                    del self._lanes[key]
+                if self._closing:
+                    self._cond.notify_all()